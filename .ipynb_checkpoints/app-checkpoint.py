@@ -1,9 +1,5 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import numpy as np
 
 # =====================================================
 # FUNGSI BANTU (HELPER FUNCTIONS)
@@ -56,6 +52,19 @@ def format_angka_tanpa_rp(value):
         return result[3:]
     return result
 
+def muat_plotly():
+    """
+    Impor pustaka plotting saat halaman bergrafik pertama kali dirender,
+    sehingga halaman tabel dan startup sesi baru tidak menunggu plotly
+    
+    Returns:
+    - Tuple (px, go, make_subplots)
+    """
+    import plotly.express as px
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    return px, go, make_subplots
+
 def tambahkan_hover_uang(fig, df, kolom, tipe="bar"):
     """
     Tambahkan hover template untuk visualisasi uang
@@ -221,6 +230,10 @@ menu = st.sidebar.radio(
     ]
 )
 
+# Semua halaman kecuali tabel data memakai grafik plotly
+if menu != "📋 Tabel Data Lengkap":
+    px, go, make_subplots = muat_plotly()
+
 # =====================================================
 # DASHBOARD UTAMA
 # =====================================================
@@ -1,131 +1,586 @@
-import pandas as pd
-import warnings
-warnings.filterwarnings('ignore', category=FutureWarning)
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from kuesioner import (
+    UKURAN_BLOK, KEBIJAKAN_TIDAK_VALID, muat_skema, dengan_bobot, format_laporan_validasi,
+    periksa_kualitas_berblok, iter_blok, hitung_frekuensi_berblok, ringkas_frekuensi, statistik_lengkap,
+    parse_filter, alias_kueri, parse_kueri, jawab_kueri
+)
+from penyimpanan import baca_header, buka_kode, buka_bobot, path_bobot, iter_blok_kode, muat_kode_tabel, siapkan_cache
+from pantau import INTERVAL_PANTAU, JEDA_TENANG, PemantauFile, tunggu_tenang
+from metrik import ENV_FILE_METRIK, REGISTRI, tulis_textfile
 
-def main():
-    # Baca data dari file Excel
-    df = pd.read_excel("data_kuesioner.xlsx", sheet_name="Kuesioner")
-    
-    # Filter hanya kolom pertanyaan Q1-Q17
-    pertanyaan_cols = [col for col in df.columns if str(col).startswith('Q') and str(col)[1:].isdigit() and 1 <= int(str(col)[1:]) <= 17]
-    df_pertanyaan = df[pertanyaan_cols].copy()
-    
-    # Mapping skala ke skor
-    skala_ke_skor = {'SS': 6, 'S': 5, 'CS': 4, 'CTS': 3, 'TS': 2, 'STS': 1}
-    
-    # Mapping untuk kategori
-    kategori_mapping = {
-        'SS': 'positif',
-        'S': 'positif',
-        'CS': 'netral',
-        'CTS': 'negatif',
-        'TS': 'negatif',
-        'STS': 'negatif'
-    }
-    
-    # Hitung total jawaban keseluruhan
-    total_jawaban = df_pertanyaan.shape[0] * len(pertanyaan_cols)
-    
-    # q1: Skala paling banyak dipilih
-    all_answers = df_pertanyaan.values.flatten()
-    dist_overall = pd.Series(all_answers).value_counts()
-    skala_terbanyak = dist_overall.idxmax()
-    jumlah_terbanyak = dist_overall.max()
-    persen_terbanyak = (jumlah_terbanyak / total_jawaban) * 100
-    
-    # q2: Skala paling sedikit dipilih
-    skala_tersedikit = dist_overall.idxmin()
-    jumlah_tersedikit = dist_overall.min()
-    persen_tersedikit = (jumlah_tersedikit / total_jawaban) * 100
-    
-    # q3-q8: Pertanyaan dengan skala tertentu paling banyak
-    def get_max_question_for_scale(scale):
-        counts_per_q = df_pertanyaan.apply(lambda col: (col == scale).sum())
-        max_q = counts_per_q.idxmax()
-        max_count = counts_per_q.max()
-        persen = (max_count / df_pertanyaan.shape[0]) * 100
-        return max_q, max_count, persen
-    
-    # q9: Pertanyaan dengan STS
-    sts_counts = df_pertanyaan.apply(lambda col: (col == 'STS').sum())
-    sts_persen = (sts_counts / df_pertanyaan.shape[0]) * 100
-    sts_questions = [(q, sts_persen[q]) for q in sts_counts.index if sts_counts[q] > 0]
-    
-    # q10: Skor rata-rata keseluruhan
-    df_skor = df_pertanyaan.replace(skala_ke_skor)
-    rata_rata_keseluruhan = df_skor.values.flatten().mean()
-    
-    # q11: Pertanyaan dengan rata-rata skor tertinggi
-    rata_rata_per_q = df_skor.mean()
-    q_tertinggi = rata_rata_per_q.idxmax()
-    nilai_tertinggi = rata_rata_per_q.max()
-    
-    # q12: Pertanyaan dengan rata-rata skor terendah
-    q_terendah = rata_rata_per_q.idxmin()
-    nilai_terendah = rata_rata_per_q.min()
-    
-    # q13: Distribusi kategori
-    df_kategori = df_pertanyaan.replace(kategori_mapping)
-    kategori_counts = pd.Series(df_kategori.values.flatten()).value_counts()
-    kategori_persen = (kategori_counts / total_jawaban) * 100
-    
-    # Baca input pertanyaan (tanpa prompt untuk kompatibilitas Delcom)
-    target_question = input().strip()
-    
-    if target_question == "q1":
-        print(f"{skala_terbanyak}|{jumlah_terbanyak}|{persen_terbanyak:.1f}")
-    
-    elif target_question == "q2":
-        print(f"{skala_tersedikit}|{jumlah_tersedikit}|{persen_tersedikit:.1f}")
-    
-    elif target_question == "q3":
-        q, count, persen = get_max_question_for_scale('SS')
-        print(f"{q}|{count}|{persen:.1f}")
-    
-    elif target_question == "q4":
-        q, count, persen = get_max_question_for_scale('S')
-        print(f"{q}|{count}|{persen:.1f}")
-    
-    elif target_question == "q5":
-        q, count, persen = get_max_question_for_scale('CS')
-        print(f"{q}|{count}|{persen:.1f}")
-    
-    elif target_question == "q6":
-        q, count, persen = get_max_question_for_scale('CTS')
-        print(f"{q}|{count}|{persen:.1f}")
-    
-    elif target_question == "q7":
-        q, count, persen = get_max_question_for_scale('TS')
-        print(f"{q}|{count}|{persen:.1f}")
-    
-    elif target_question == "q8":
-        q, count, persen = get_max_question_for_scale('STS')
-        print(f"{q}|{count}|{persen:.1f}")
-    
-    elif target_question == "q9":
-        if sts_questions:
-            result = "|".join([f"{q}:{p:.1f}" for q, p in sts_questions])
-            print(result)
+# Metrik Prometheus; pencatatan hanya penjumlahan di memori, file ditulis
+# sekali di akhir proses jika --metrics-file (atau KUESIONER_METRIK_FILE) diisi
+METRIK_PANGGILAN = REGISTRI.penghitung(
+    "kuesioner_cli_invocations_total", "Jumlah pemanggilan answer.py per kueri", ("query", "format"))
+METRIK_TAHAP = REGISTRI.histogram(
+    "kuesioner_cli_stage_seconds", "Lama tahap pemrosesan per sumber data (detik)", ("stage", "source"))
+METRIK_CACHE = REGISTRI.penghitung(
+    "kuesioner_cli_cache_total", "Pemakaian cache .ksr untuk file Excel", ("result",))
+METRIK_GAGAL = REGISTRI.penghitung(
+    "kuesioner_cli_errors_total", "Jumlah pemanggilan answer.py yang berakhir dengan error")
+
+def tambah_argumen_data(parser):
+    """
+    Tambahkan argumen sumber data dan opsi agregasi (dipakai juga oleh api.py)
+
+    Parameters:
+    - parser: argparse.ArgumentParser
+
+    Returns:
+    - parser yang sama
+    """
+    parser.add_argument("--file", nargs="+", default=["data_kuesioner.xlsx"],
+                        help="File Excel data kuesioner (boleh lebih dari satu)")
+    parser.add_argument("--store", nargs="+", default=None,
+                        help="File kode .ksr (hasil penyimpanan.py) yang dibaca via np.memmap, menggantikan --file")
+    parser.add_argument("--sqlite", nargs="+", default=None,
+                        help="Basis data SQLite (hasil basisdata.py); agregat dibaca lewat SQL, menggantikan --file")
+    parser.add_argument("--where", action="append", default=None, metavar="KOLOM=LABEL[,LABEL]",
+                        help="Filter responden (hanya dengan --sqlite), boleh diulang; contoh --where Q3=SS,S")
+    parser.add_argument("--block-size", type=int, default=UKURAN_BLOK,
+                        help="Jumlah baris per blok saat agregasi")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Jumlah thread agregasi per blok (0 = semua core)")
+    parser.add_argument("--schema", default=None,
+                        help="File skema JSON (default skema_kuesioner.json)")
+    parser.add_argument("--weight", default=None, metavar="KOLOM",
+                        help="Kolom bobot survei per responden (menggantikan 'bobot' pada skema); "
+                             "semua agregat dan ukuran sampel efektif dihitung berbobot")
+    parser.add_argument("--exclude-flagged", action="store_true",
+                        help="Buang responden duplikat/straight-liner/varians rendah/longstring sebelum agregasi")
+    parser.add_argument("--batas-std", type=float, default=0.3,
+                        help="Batas standar deviasi skor untuk menandai varians rendah")
+    parser.add_argument("--batas-longstring", type=int, default=10,
+                        help="Panjang run jawaban identik yang ditandai sebagai longstring")
+    parser.add_argument("--invalid-policy", choices=KEBIJAKAN_TIDAK_VALID, default="missing",
+                        help="Penanganan sel kosong/tidak dikenal: drop (buang baris), missing (abaikan sel), fail (hentikan)")
+    parser.add_argument("--validation-report", action="store_true",
+                        help="Tampilkan laporan validasi jawaban ke stderr (membaca ulang file, tanpa cache)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Jangan pakai/buat cache .ksr untuk file Excel")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Folder cache .ksr (default .cache_kuesioner di samping file Excel)")
+    return parser
+
+def skema_dari_argumen(args):
+    """
+    Muat skema dari --schema dan terapkan kolom bobot --weight jika ada
+
+    Parameters:
+    - args: Argumen CLI
+
+    Returns:
+    - Skema terkompilasi
+    """
+    skema = muat_skema(args.schema)
+    return dengan_bobot(skema, args.weight) if args.weight else skema
+
+def daftar_sumber(args):
+    """
+    Susun daftar sumber data dari argumen CLI
+
+    Parameters:
+    - args: Argumen CLI
+
+    Returns:
+    - List dictionary dengan kunci path_file, path_store, path_db (salah satu terisi)
+    """
+    if args.where and not args.sqlite:
+        raise ValueError("--where hanya dapat dipakai bersama --sqlite")
+    if args.sqlite:
+        return [{'path_db': p} for p in args.sqlite]
+    if args.store:
+        return [{'path_store': p} for p in args.store]
+    return [{'path_file': p} for p in args.file]
+
+def parse_args():
+    parser = tambah_argumen_data(argparse.ArgumentParser(description="Analisis data kuesioner (q1-q13)"))
+    parser.add_argument("--format", choices=["teks", "json", "ndjson"], default="teks",
+                        help="teks: jawab satu pertanyaan dari stdin; json/ndjson: keluarkan semua statistik bertipe")
+    parser.add_argument("--output", default=None, metavar="FILE",
+                        help="Tulis keluaran ke file (diganti secara atomik) alih-alih stdout")
+    parser.add_argument("--watch", action="store_true",
+                        help="Pantau file sumber dan perbarui keluaran setiap kali isinya berubah")
+    parser.add_argument("--interval", type=float, default=INTERVAL_PANTAU,
+                        help="Detik antar pemeriksaan mtime/ukuran file pada mode --watch")
+    parser.add_argument("--debounce", type=float, default=JEDA_TENANG,
+                        help="Detik tanpa perubahan sebelum file dibaca ulang pada mode --watch")
+    parser.add_argument("--metrics-file", default=os.environ.get(ENV_FILE_METRIK), metavar="FILE",
+                        help="Akumulasikan metrik Prometheus ke file .prom (textfile collector node_exporter)")
+    return parser.parse_args()
+
+def buka_blok(args, skema, path_file=None, path_store=None, path_db=None):
+    """
+    Buka satu sumber data (Excel, .ksr, atau SQLite) sebagai rangkaian blok
+    matriks kode, tanpa memuat seluruh responden ke memori (kecuali Excel
+    yang dibaca tanpa cache)
+
+    Parameters:
+    - args: Argumen CLI
+    - skema: Skema terkompilasi
+    - path_file: File Excel (dipakai jika path_store dan path_db kosong)
+    - path_store: File kode .ksr
+    - path_db: File basis data SQLite (filter --where diterapkan)
+
+    Returns:
+    - Tuple (kolom pertanyaan, fungsi tanpa argumen yang menghasilkan generator
+      blok, bobot survei per responden atau None jika skema tidak berbobot)
+    """
+    if path_db:
+        # Diimpor di sini agar jalur Excel/.ksr tidak memuat sqlite3
+        import sqlite3
+        from basisdata import baca_meta, iter_blok_db, bobot_db
+        if not os.path.exists(path_db):
+            raise ValueError(f"Basis data {path_db} tidak ditemukan")
+        con = sqlite3.connect(path_db)
+        try:
+            header = baca_meta(con)
+        finally:
+            con.close()
+        if header is None or header['label'] != skema['label']:
+            raise ValueError(f"Label skala pada {path_db} tidak cocok dengan skema {skema['label']}")
+        if skema['kolom_bobot'] is not None and header['kolom_bobot'] != skema['kolom_bobot']:
+            raise ValueError(f"{path_db} tidak menyimpan bobot dari kolom {skema['kolom_bobot']!r}")
+        kondisi = parse_filter(args.where, header)
+        bobot = bobot_db(path_db, kondisi) if skema['kolom_bobot'] is not None else None
+        return header['kolom'], lambda: iter_blok_db(path_db, args.block_size, kondisi), bobot
+    if not path_store and not (args.no_cache or args.validation_report):
+        # Jalur cepat: file Excel dikonversi sekali ke cache .ksr (openpyxl
+        # hanya diimpor saat cache dingin), pemanggilan berikutnya cukup numpy.
+        # Jika folder cache tidak dapat ditulis, file dibaca langsung tanpa cache.
+        try:
+            path_store, hangat = siapkan_cache(path_file, skema, args.invalid_policy, args.cache_dir, args.block_size)
+            METRIK_CACHE.inc(result="hit" if hangat else "miss")
+        except OSError:
+            path_store = None
+            METRIK_CACHE.inc(result="error")
+    if path_store:
+        # Matriks kode di disk (np.memmap); sudah divalidasi saat konversi
+        header, _ = baca_header(path_store)
+        if header['label'] != skema['label']:
+            raise ValueError(f"Label skala pada {path_store} tidak cocok dengan skema: {header['label']} vs {skema['label']}")
+        return header['kolom'], lambda: iter_blok_kode(path_store, args.block_size), buka_bobot(path_store, skema)
+    # Baca dan validasi file Excel langsung (kolom sesuai skema, default Q1-Q17)
+    kode, pertanyaan_cols, laporan, bobot = muat_kode_tabel(path_file, skema, args.invalid_policy, args.block_size)
+    if args.validation_report:
+        print(format_laporan_validasi(laporan), file=sys.stderr)
+    return pertanyaan_cols, lambda: iter_blok(kode, args.block_size), bobot
+
+def mask_dipakai(args, skema, baca_blok):
+    """
+    Tentukan responden yang dipakai sesuai --exclude-flagged (duplikat,
+    straight-liner, varians rendah, longstring dibuang)
+
+    Parameters:
+    - args: Argumen CLI
+    - skema: Skema terkompilasi
+    - baca_blok: Fungsi penghasil generator blok (lihat buka_blok)
+
+    Returns:
+    - Mask boolean per responden, atau None jika semua responden dipakai
+    """
+    if not args.exclude_flagged:
+        return None
+    tertandai, _ = periksa_kualitas_berblok(
+        baca_blok(), skema['skor_per_kode'], args.batas_std, args.batas_longstring, args.workers
+    )
+    return ~tertandai
+
+def muat_ringkasan(args, skema, path_file=None, path_store=None, path_db=None):
+    """
+    Baca satu sumber data (Excel, .ksr, atau SQLite) dan hitung ringkasannya
+
+    Parameters:
+    - args: Argumen CLI
+    - skema: Skema terkompilasi
+    - path_file: File Excel (dipakai jika path_store dan path_db kosong)
+    - path_store: File kode .ksr
+    - path_db: File basis data SQLite
+
+    Returns:
+    - Dictionary ringkasan (lihat ringkas_frekuensi)
+    """
+    if path_db and not args.exclude_flagged and skema['kolom_bobot'] is None:
+        with METRIK_TAHAP.waktu(stage="aggregate", source="sqlite"):
+            return muat_ringkasan_db(args, skema, path_db)
+    pertanyaan_cols, frekuensi_blok = muat_frekuensi(args, skema, path_file, path_store, path_db)
+    with METRIK_TAHAP.waktu(stage="summarize", source=jenis_sumber(path_file, path_store, path_db)):
+        return ringkas_frekuensi(frekuensi_blok, skema, pertanyaan_cols)
+
+def muat_frekuensi(args, skema, path_file=None, path_store=None, path_db=None):
+    """
+    Hitung matriks frekuensi (berbobot jika skema berbobot) satu sumber data
+    secara berblok
+
+    Parameters:
+    - args: Argumen CLI
+    - skema: Skema terkompilasi
+    - path_file: File Excel (dipakai jika path_store dan path_db kosong)
+    - path_store: File kode .ksr
+    - path_db: File basis data SQLite
+
+    Returns:
+    - Tuple (kolom pertanyaan, matriks frekuensi)
+    """
+    sumber = jenis_sumber(path_file, path_store, path_db)
+    with METRIK_TAHAP.waktu(stage="load", source=sumber):
+        pertanyaan_cols, baca_blok, bobot = buka_blok(args, skema, path_file, path_store, path_db)
+
+    # Blok dibaca dari disk sambil diagregasi, jadi waktu baca blok masuk tahap aggregate
+    with METRIK_TAHAP.waktu(stage="aggregate", source=sumber):
+        # Pemeriksaan kualitas data: duplikat, straight-liner, varians rendah, longstring
+        dipakai = mask_dipakai(args, skema, baca_blok)
+
+        # Semua statistik diturunkan dari matriks frekuensi pertanyaan x skala,
+        # dihitung per blok baris sehingga memori bergantung pada ukuran blok;
+        # bobot survei masuk ke bincount yang sama (tanpa jalur per baris)
+        frekuensi_blok = hitung_frekuensi_berblok(
+            baca_blok(), len(pertanyaan_cols), len(skema['label']), dipakai, args.workers, bobot
+        )
+    return pertanyaan_cols, frekuensi_blok
+
+def jenis_sumber(path_file=None, path_store=None, path_db=None):
+    """
+    Jenis sumber data untuk label metrik (nilai terbatas, bukan path)
+
+    Parameters:
+    - path_file: File Excel/CSV
+    - path_store: File kode .ksr
+    - path_db: File basis data SQLite
+
+    Returns:
+    - 'sqlite', 'ksr', atau 'excel'
+    """
+    return 'sqlite' if path_db else 'ksr' if path_store else 'excel'
+
+def label_kueri(skema, kueri):
+    """
+    Label metrik untuk kueri: alias q1-q13 apa adanya, kueri bebas diwakili
+    nama operasinya agar jumlah seri metrik tetap terbatas
+
+    Parameters:
+    - skema: Skema terkompilasi
+    - kueri: Teks kueri dari stdin (None untuk format json/ndjson)
+
+    Returns:
+    - String label
+    """
+    if not kueri:
+        return "semua" if kueri is None else "kosong"
+    if re.fullmatch(r"q\d+", kueri.lower()):
+        return kueri.lower() if kueri.lower() in alias_kueri(skema) else "tidak_dikenal"
+    try:
+        return parse_kueri(kueri, skema)[0]
+    except ValueError:
+        return "tidak_valid"
+
+def frekuensi_kode(args, skema, path_store, mulai=0, akhir=None):
+    """
+    Hitung matriks frekuensi untuk rentang baris file kode .ksr; karena
+    frekuensi bersifat aditif, baris yang baru ditambahkan cukup dihitung
+    sendiri lalu dijumlahkan ke hasil sebelumnya
+
+    Parameters:
+    - args: Argumen CLI
+    - skema: Skema terkompilasi
+    - path_store: File kode .ksr
+    - mulai: Indeks baris pertama
+    - akhir: Batas baris (eksklusif)
+
+    Returns:
+    - Matriks frekuensi rentang baris tersebut
+    """
+    _, header = buka_kode(path_store, skema)
+    bobot = buka_bobot(path_store, skema)
+    if bobot is not None:
+        if len(bobot) < akhir:
+            raise ValueError(f"{path_bobot(path_store)} baru berisi {len(bobot)} dari {akhir} bobot")
+        bobot = bobot[mulai:akhir]
+    return hitung_frekuensi_berblok(
+        iter_blok_kode(path_store, args.block_size, mulai, akhir), len(header['kolom']), len(skema['label']),
+        None, args.workers, bobot
+    )
+
+def muat_ringkasan_db(args, skema, path_db):
+    """
+    Hitung ringkasan dari basis data SQLite tanpa membangun ulang baris
+    responden: matriks frekuensi dibaca langsung lewat SQL (tabel frekuensi
+    atau GROUP BY terindeks). Dengan --exclude-flagged atau bobot survei,
+    muat_ringkasan memakai jalur berblok (buka_blok).
+
+    Parameters:
+    - args: Argumen CLI
+    - skema: Skema terkompilasi
+    - path_db: File basis data SQLite
+
+    Returns:
+    - Dictionary ringkasan (lihat ringkas_frekuensi)
+    """
+    # Diimpor di sini agar jalur Excel/.ksr tidak memuat sqlite3
+    import sqlite3
+    from basisdata import baca_meta, frekuensi_db
+    if not os.path.exists(path_db):
+        raise ValueError(f"Basis data {path_db} tidak ditemukan")
+    con = sqlite3.connect(path_db)
+    try:
+        header = baca_meta(con)
+        if header is None or header['label'] != skema['label']:
+            raise ValueError(f"Label skala pada {path_db} tidak cocok dengan skema {skema['label']}")
+        kondisi = parse_filter(args.where, header)
+        return ringkas_frekuensi(frekuensi_db(con, kondisi), skema, header['kolom'])
+    finally:
+        con.close()
+
+def format_jawaban(ringkasan, skema, kueri):
+    """
+    Jawab kueri (atau alias q1-q13) sebagai baris teks (protokol Delcom)
+
+    Parameters:
+    - ringkasan: Dictionary hasil ringkas_frekuensi
+    - skema: Skema terkompilasi
+    - kueri: Teks kueri, mis. "q3", "max_q scale=CTS", "pct q=Q7 scale=SS"
+
+    Returns:
+    - String jawaban, atau None jika alias tidak dikenal atau tidak ada data
+    """
+    kueri = kueri.strip()
+    if not kueri or re.fullmatch(r"q\d+", kueri.lower()) and kueri.lower() not in alias_kueri(skema):
+        return None
+    return jawab_kueri(kueri, ringkasan, skema)[1]
+
+def keluaran_sumber(args, skema, nama_sumber, ringkasan, target_question):
+    """
+    Susun keluaran satu sumber data sesuai --format
+
+    Parameters:
+    - args: Argumen CLI
+    - skema: Skema terkompilasi
+    - nama_sumber: Path sumber data
+    - ringkasan: Dictionary hasil ringkas_frekuensi
+    - target_question: Kueri dari stdin (format teks)
+
+    Returns:
+    - Baris teks (teks/ndjson; None jika tidak ada jawaban) atau dictionary (json)
+    """
+    if args.format == "teks":
+        return format_jawaban(ringkasan, skema, target_question)
+    statistik = {'sumber': nama_sumber, **statistik_lengkap(ringkasan, skema)}
+    return statistik if args.format == "json" else json.dumps(statistik, ensure_ascii=False)
+
+def gabung_keluaran(args, keluaran):
+    """
+    Gabungkan keluaran semua sumber menjadi satu teks
+
+    Parameters:
+    - args: Argumen CLI
+    - keluaran: List hasil keluaran_sumber
+
+    Returns:
+    - String keluaran (tanpa baris baru di akhir)
+    """
+    if args.format == "json":
+        return json.dumps(keluaran, ensure_ascii=False, indent=2)
+    return "\n".join(k for k in keluaran if k is not None)
+
+def tulis_keluaran(teks, path_output):
+    """
+    Tulis keluaran ke file secara atomik (file sementara lalu os.replace),
+    sehingga pembaca tidak pernah melihat file setengah tertulis
+
+    Parameters:
+    - teks: Isi keluaran
+    - path_output: File tujuan
+    """
+    sementara = f"{path_output}.{os.getpid()}.tmp"
+    with open(sementara, "w", encoding="utf-8") as f:
+        f.write(teks + "\n" if teks else "")
+    os.replace(sementara, path_output)
+
+# =====================================================
+# MODE PANTAU (--watch)
+# =====================================================
+def file_dipantau(lokasi):
+    """
+    Daftar file yang perubahannya memicu perhitungan ulang satu sumber
+
+    Parameters:
+    - lokasi: Dictionary path_file/path_store/path_db
+
+    Returns:
+    - List path file (file kode .ksr beserta file bobotnya jika ada)
+    """
+    path = next(iter(lokasi.values()))
+    if 'path_store' in lokasi and os.path.exists(path_bobot(path)):
+        return [path, path_bobot(path)]
+    return [path]
+
+def perbarui_sumber(args, skema, status):
+    """
+    Perbarui ringkasan satu sumber setelah filenya berubah: dilewati jika
+    isi identik, inkremental jika file kode .ksr hanya bertambah baris,
+    selain itu dihitung ulang penuh
+
+    Parameters:
+    - args: Argumen CLI
+    - skema: Skema terkompilasi
+    - status: Dictionary status sumber (lokasi, pemantau, ringkasan, ...)
+      yang diperbarui di tempat
+
+    Returns:
+    - Keterangan perubahan untuk log, atau None jika isi tidak berubah
+    """
+    jenis = {p.periksa() for p in status['pemantau']} - {None, 'sama'}
+    if not jenis:
+        return None
+    if 'hilang' in jenis:
+        raise ValueError("file sumber tidak ditemukan")
+    path_store = status['lokasi'].get('path_store')
+    if path_store and not args.exclude_flagged:
+        # Frekuensi aditif: baris baru dihitung sendiri lalu dijumlahkan
+        n_baris = buka_kode(path_store, skema)[0].shape[0]
+        if jenis == {'tambah'} and status.get('frekuensi') is not None:
+            tambahan = frekuensi_kode(args, skema, path_store, status['n_baris'], n_baris)
+            keterangan = f"{n_baris - status['n_baris']} baris baru (inkremental)"
+            status['frekuensi'] = status['frekuensi'] + tambahan
         else:
-            print("")
-    
-    elif target_question == "q10":
-        print(f"{rata_rata_keseluruhan:.2f}")
-    
-    elif target_question == "q11":
-        print(f"{q_tertinggi}:{nilai_tertinggi:.2f}")
-    
-    elif target_question == "q12":
-        print(f"{q_terendah}:{nilai_terendah:.2f}")
-    
-    elif target_question == "q13":
-        pos = kategori_counts.get('positif', 0)
-        net = kategori_counts.get('netral', 0)
-        neg = kategori_counts.get('negatif', 0)
-        pos_p = kategori_persen.get('positif', 0.0)
-        net_p = kategori_persen.get('netral', 0.0)
-        neg_p = kategori_persen.get('negatif', 0.0)
-        print(f"positif={int(pos)}:{pos_p:.1f}|netral={int(net)}:{net_p:.1f}|negatif={int(neg)}:{neg_p:.1f}")
+            status['frekuensi'] = frekuensi_kode(args, skema, path_store, 0, n_baris)
+            keterangan = f"{n_baris} baris dihitung ulang"
+        status['n_baris'] = n_baris
+        status['ringkasan'] = ringkas_frekuensi(status['frekuensi'], skema, baca_header(path_store)[0]['kolom'])
+        return keterangan
+    status['ringkasan'] = muat_ringkasan(args, skema, **status['lokasi'])
+    return "dihitung ulang"
+
+def pantau_sumber(args, skema, sumber, target_question):
+    """
+    Jalankan mode pantau: polling mtime/ukuran setiap --interval detik,
+    tunggu rentetan penulisan selesai (--debounce), lalu perbarui hanya
+    sumber yang isinya berubah dan tulis ulang keluaran
+
+    Parameters:
+    - args: Argumen CLI
+    - skema: Skema terkompilasi
+    - sumber: List lokasi sumber (lihat daftar_sumber)
+    - target_question: Kueri dari stdin (format teks)
+    """
+    semua_status = [
+        {'lokasi': lokasi, 'pemantau': [PemantauFile(p) for p in file_dipantau(lokasi)], 'ringkasan': None}
+        for lokasi in sumber
+    ]
+    while True:
+        berubah = [s for s in semua_status if any(p.berubah() for p in s['pemantau'])]
+        if berubah:
+            tunggu_tenang([p for s in berubah for p in s['pemantau']], args.debounce)
+            diperbarui = False
+            for status in berubah:
+                nama_sumber = next(iter(status['lokasi'].values()))
+                try:
+                    keterangan = perbarui_sumber(args, skema, status)
+                except (OSError, ValueError) as e:
+                    # Dicoba lagi pada polling berikutnya (mis. file masih disalin)
+                    for pemantau in status['pemantau']:
+                        pemantau.stat = None
+                    print(f"[{time.strftime('%H:%M:%S')}] {nama_sumber}: {e}", file=sys.stderr)
+                    continue
+                print(f"[{time.strftime('%H:%M:%S')}] {nama_sumber}: {keterangan or 'isi tidak berubah, dilewati'}", file=sys.stderr)
+                diperbarui = diperbarui or keterangan is not None
+            siap = [s for s in semua_status if s['ringkasan'] is not None]
+            if diperbarui and siap:
+                keluaran = gabung_keluaran(args, [
+                    keluaran_sumber(args, skema, next(iter(s['lokasi'].values())), s['ringkasan'], target_question)
+                    for s in siap
+                ])
+                if args.output:
+                    tulis_keluaran(keluaran, args.output)
+                elif keluaran:
+                    print(keluaran, flush=True)
+            tulis_metrik(args)
+        time.sleep(args.interval)
+
+def tulis_metrik(args):
+    """
+    Akumulasikan metrik proses ini ke --metrics-file (jika diisi); kegagalan
+    menulis metrik tidak menggagalkan analisis
+
+    Parameters:
+    - args: Argumen CLI
+    """
+    if not args.metrics_file:
+        return
+    try:
+        tulis_textfile(args.metrics_file, akumulasi=True)
+    except OSError as e:
+        print(f"Metrik tidak dapat ditulis ke {args.metrics_file}: {e}", file=sys.stderr)
+
+def main():
+    args = parse_args()
+    skema = skema_dari_argumen(args)
+    try:
+        jalankan(args, skema)
+    except SystemExit as e:
+        if e.code:
+            METRIK_GAGAL.inc()
+        raise
+    finally:
+        tulis_metrik(args)
+
+def jalankan(args, skema):
+    """
+    Baca kueri, hitung ringkasan semua sumber, dan tulis keluaran
+
+    Parameters:
+    - args: Argumen CLI
+    - skema: Skema terkompilasi
+    """
+    try:
+        sumber = daftar_sumber(args)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    # Baca input pertanyaan (tanpa prompt untuk kompatibilitas Delcom): alias q1-q13 atau kueri bebas
+    target_question = input().strip() if args.format == "teks" else None
+    METRIK_PANGGILAN.inc(query=label_kueri(skema, target_question), format=args.format)
+    if target_question and not re.fullmatch(r"q\d+", target_question.lower()):
+        # Kesalahan sintaks dilaporkan sebelum data dibaca
+        try:
+            parse_kueri(target_question, skema)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+
+    if args.watch:
+        try:
+            pantau_sumber(args, skema, sumber, target_question)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    hasil = []
+    for lokasi in sumber:
+        try:
+            ringkasan = muat_ringkasan(args, skema, **lokasi)
+            with METRIK_TAHAP.waktu(stage="answer", source=jenis_sumber(**lokasi)):
+                keluaran = keluaran_sumber(args, skema, next(iter(lokasi.values())), ringkasan, target_question)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+
+        if args.format == "json" or args.output:
+            hasil.append(keluaran)
+        elif keluaran is not None:
+            # ndjson: satu dokumen per sumber, langsung dikirim agar konsumen dapat memproses bertahap
+            print(keluaran, flush=args.format == "ndjson")
+
+    if args.output:
+        tulis_keluaran(gabung_keluaran(args, hasil), args.output)
+    elif args.format == "json":
+        print(gabung_keluaran(args, hasil))
 
 if __name__ == "__main__":
     main()
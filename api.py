@@ -0,0 +1,255 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from kuesioner import statistik_lengkap, jawab_kueri
+from penyimpanan import info_sumber
+from answer import tambah_argumen_data, skema_dari_argumen, daftar_sumber, muat_ringkasan, format_jawaban, file_dipantau
+from metrik import REGISTRI, render_keluarga
+
+# =====================================================
+# DATASET DAN SIDIK JARI
+# =====================================================
+class Dataset:
+    """
+    Satu sumber data (Excel, .ksr, atau SQLite) beserta respons JSON yang sudah
+    dihitung untuk sidik jari terakhirnya. Perhitungan ulang hanya terjadi
+    jika file sumber (mtime/ukuran) berubah.
+    """
+
+    def __init__(self, nama, args, skema, lokasi):
+        self.nama = nama
+        self.args = args
+        self.skema = skema
+        self.lokasi = lokasi
+        self.sidik_jari = None
+        self.ringkasan = None
+        self.respons = {}
+        self.kunci = threading.Lock()
+
+    def hitung_sidik_jari(self):
+        """
+        Hitung sidik jari dataset dari stat file sumber (termasuk file bobot
+        .ksr.bobot jika ada), skema, dan opsi agregasi
+
+        Returns:
+        - String heksadesimal sha1
+        """
+        opsi = {
+            'sumber': [info_sumber(p) for p in file_dipantau(self.lokasi)],
+            'filter': self.args.where,
+            'bobot': self.args.weight,
+            'skema': self.skema['sidik_jari'],
+            'kebijakan': self.args.invalid_policy,
+            'exclude_flagged': self.args.exclude_flagged,
+            'batas_std': self.args.batas_std,
+            'batas_longstring': self.args.batas_longstring,
+        }
+        return hashlib.sha1(json.dumps(opsi, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def ambil(self):
+        """
+        Ambil respons yang sudah dihitung, hitung ulang jika sidik jari berubah
+
+        Returns:
+        - Dictionary path endpoint -> (body bytes, etag)
+        """
+        sidik_jari = self.hitung_sidik_jari()
+        if sidik_jari == self.sidik_jari:
+            return self.respons
+        with self.kunci:
+            if sidik_jari != self.sidik_jari:
+                self.ringkasan, self.respons = siapkan_respons(self, sidik_jari)
+                self.sidik_jari = sidik_jari
+        return self.respons
+
+    def kueri(self, teks):
+        """
+        Jawab kueri bebas dari ringkasan yang sudah dihitung
+
+        Parameters:
+        - teks: Teks kueri atau alias q1-q13
+
+        Returns:
+        - Tuple (body bytes, etag)
+        """
+        self.ambil()
+        nilai, jawaban = jawab_kueri(teks, self.ringkasan, self.skema)
+        return enkode_respons({'kueri': teks, 'sidik_jari': self.sidik_jari, 'nilai': nilai, 'teks': jawaban})
+
+
+def enkode_respons(data):
+    """
+    Serialisasi data ke JSON dan hitung ETag dari isinya
+
+    Parameters:
+    - data: Objek yang dapat diserialisasi JSON
+
+    Returns:
+    - Tuple (body bytes, etag)
+    """
+    body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    return body, '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def siapkan_respons(dataset, sidik_jari):
+    """
+    Hitung ringkasan dataset sekali dan susun semua body endpoint
+
+    Parameters:
+    - dataset: Objek Dataset
+    - sidik_jari: Sidik jari dataset saat ini
+
+    Returns:
+    - Tuple (ringkasan, dictionary path endpoint -> (body bytes, etag))
+    """
+    ringkasan = muat_ringkasan(dataset.args, dataset.skema, **dataset.lokasi)
+    statistik = statistik_lengkap(ringkasan, dataset.skema)
+    jawaban = {
+        q: {'nilai': statistik['jawaban'].get(q), 'teks': format_jawaban(ringkasan, dataset.skema, q)}
+        for q in [f"q{i}" for i in range(1, 14)]
+    }
+    data = {
+        '/ringkasan': {'dataset': dataset.nama, 'sidik_jari': sidik_jari, **statistik},
+        '/distribusi': {
+            'total_jawaban': statistik['total_jawaban'], 'skala': statistik['skala'],
+        },
+        '/pertanyaan': [
+            {k: q[k] for k in ['kolom', 'n_valid', 'kosong', 'frekuensi']} for q in statistik['pertanyaan']
+        ],
+        '/rata-rata': {
+            'rata_rata': statistik['rata_rata'],
+            'std': statistik['std'],
+            'per_pertanyaan': {q['kolom']: q['rata_rata'] for q in statistik['pertanyaan']},
+        },
+        '/kategori': {
+            'keseluruhan': statistik['kategori'],
+            'per_pertanyaan': {q['kolom']: q['kategori'] for q in statistik['pertanyaan']},
+        },
+        '/jawaban': jawaban,
+        **{f"/jawaban/{q}": nilai for q, nilai in jawaban.items()},
+    }
+    return ringkasan, {path: enkode_respons(isi) for path, isi in data.items()}
+
+
+# =====================================================
+# HTTP HANDLER
+# =====================================================
+class HandlerKuesioner(BaseHTTPRequestHandler):
+    """
+    Handler GET read-only. Dataset dipilih lewat ?dataset=<nama> (default
+    dataset pertama). Respons memakai ETag; If-None-Match yang cocok
+    dibalas 304 tanpa body. /metrics menyajikan metrik Prometheus dari
+    perhitungan ringkasan (lihat answer.py).
+    """
+    datasets = {}
+    server_version = "KuesionerAPI/1.0"
+
+    def kirim(self, status, body=b"", etag=None, jenis="application/json; charset=utf-8"):
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            # Klien wajib validasi ulang, tetapi cukup dengan If-None-Match
+            self.send_header("Cache-Control", "no-cache")
+        if status != 304:
+            self.send_header("Content-Type", jenis)
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status != 304 and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def kirim_error(self, status, pesan):
+        self.kirim(status, json.dumps({'error': pesan}, ensure_ascii=False).encode("utf-8"))
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/") or "/"
+        if path in ("/", "/datasets"):
+            body, etag = enkode_respons({
+                'datasets': list(self.datasets),
+                'endpoint': ["/ringkasan", "/distribusi", "/pertanyaan", "/rata-rata", "/kategori",
+                             "/jawaban", "/jawaban/q1 ... /jawaban/q13", "/kueri?q=max_q+scale=CTS", "/metrics"],
+            })
+            return self.kirim_dengan_etag(body, etag)
+        if path == "/metrics":
+            return self.kirim(200, render_keluarga(REGISTRI.keluarga()).encode("utf-8"),
+                              jenis="text/plain; version=0.0.4; charset=utf-8")
+
+        query = parse_qs(url.query)
+        nama = query.get('dataset', [next(iter(self.datasets))])[0]
+        if nama not in self.datasets:
+            return self.kirim_error(404, f"Dataset tidak dikenal: {nama}")
+        if path == "/kueri":
+            if 'q' not in query:
+                return self.kirim_error(400, "Parameter q wajib diisi, mis. /kueri?q=mean+q=Q3")
+            try:
+                self.datasets[nama].ambil()
+            except (OSError, ValueError) as e:
+                return self.kirim_error(500, str(e))
+            try:
+                return self.kirim_dengan_etag(*self.datasets[nama].kueri(query['q'][0]))
+            except ValueError as e:
+                return self.kirim_error(400, str(e))
+        try:
+            respons = self.datasets[nama].ambil()
+        except (OSError, ValueError) as e:
+            return self.kirim_error(500, str(e))
+        if path not in respons:
+            return self.kirim_error(404, f"Endpoint tidak dikenal: {path}")
+        self.kirim_dengan_etag(*respons[path])
+
+    do_HEAD = do_GET
+
+    def kirim_dengan_etag(self, body, etag):
+        diminta = self.headers.get("If-None-Match", "")
+        cocok = {t.strip().removeprefix("W/") for t in diminta.split(",")}
+        if etag in cocok or "*" in cocok:
+            return self.kirim(304, etag=etag)
+        self.kirim(200, body, etag)
+
+
+def main():
+    parser = tambah_argumen_data(argparse.ArgumentParser(description="REST API read-only untuk ringkasan kuesioner"))
+    parser.add_argument("--host", default="127.0.0.1", help="Alamat bind (default hanya localhost)")
+    parser.add_argument("--port", type=int, default=8502, help="Port HTTP")
+    args = parser.parse_args()
+    skema = skema_dari_argumen(args)
+
+    try:
+        sumber = daftar_sumber(args)
+    except ValueError as e:
+        parser.error(str(e))
+    datasets = {}
+    for lokasi in sumber:
+        # Nama file yang sama dari folder berbeda diberi akhiran angka (data, data_2, ...)
+        dasar = os.path.splitext(os.path.basename(next(iter(lokasi.values()))))[0]
+        nama, i = dasar, 2
+        while nama in datasets:
+            nama, i = f"{dasar}_{i}", i + 1
+        datasets[nama] = Dataset(nama, args, skema, lokasi)
+
+    # Hitung di awal agar permintaan pertama tidak menunggu dan error data langsung terlihat
+    for dataset in datasets.values():
+        try:
+            dataset.ambil()
+        except (OSError, ValueError) as e:
+            print(f"{dataset.nama}: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    HandlerKuesioner.datasets = datasets
+    server = ThreadingHTTPServer((args.host, args.port), HandlerKuesioner)
+    print(f"API kuesioner di http://{args.host}:{args.port} ({', '.join(datasets)})", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,51 @@
+import json
+import os
+import time
 import streamlit as st
+import numpy as np
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+from kuesioner import (
+    KEBIJAKAN_TIDAK_VALID, muat_skema, kompilasi_skema, pilih_kolom_pertanyaan,
+    validasi_jawaban, validasi_bobot, format_laporan_validasi, periksa_kualitas, hitung_ringkasan,
+    periksa_kualitas_berblok, hitung_frekuensi_berblok, ringkas_frekuensi, kuantil_dari_frekuensi,
+    iter_blok, parse_filter, urutkan_responden, ambil_baris, kelompokkan_pertanyaan,
+    KOTAK_ATAS, KOTAK_BAWAH, peringkat_teratas, ukuran_pertanyaan
+)
+from penyimpanan import buka_kode, buka_bobot, path_bobot, iter_blok_kode
+from basisdata import info_db, iter_blok_db, frekuensi_db, bobot_db, jumlah_responden_db, ambil_responden_db
+from grafik import BATAS_PAYLOAD, siapkan_grafik
+from ruang_kerja import BATAS_CACHE, RuangKerja
+from pantau import INTERVAL_PANTAU, JEDA_TENANG, PemantauFile, tunggu_tenang
+from diagnostik import LOG_KINERJA, mulai_rerun, tercache, tulis_log
+from metrik import ENV_FILE_METRIK, ENV_PORT_METRIK, REGISTRI, mulai_server_metrik, tulis_textfile
+
+# Per-rerun stage timings: each checkpoint closes the stage that ran since the previous one
+diagnostik = mulai_rerun()
+
+# Prometheus metrics, opt-in through the environment (streamlit run passes no app flags):
+# KUESIONER_METRIK_FILE is rewritten after every rerun, KUESIONER_METRIK_PORT serves /metrics.
+# Registration is idempotent, so the counters live in the process across reruns and sessions.
+path_metrik = os.environ.get(ENV_FILE_METRIK)
+port_metrik = os.environ.get(ENV_PORT_METRIK)
+METRIK_RERUN = REGISTRI.penghitung("kuesioner_dashboard_reruns_total", "Jumlah rerun dashboard yang selesai")
+METRIK_RERUN_DETIK = REGISTRI.histogram("kuesioner_dashboard_rerun_seconds", "Lama satu rerun dashboard (detik)")
+METRIK_TAB = REGISTRI.histogram("kuesioner_dashboard_tab_render_seconds", "Lama render per tab termasuk grafik (detik)", ("tab",))
+METRIK_CACHE = REGISTRI.penghitung("kuesioner_dashboard_cache_total", "Panggilan fungsi tercache per hasil", ("function", "result"))
+METRIK_RESPONDEN = REGISTRI.gauge("kuesioner_dashboard_dataset_respondents", "Jumlah responden dataset pada rerun terakhir", ("source",))
+METRIK_PERTANYAAN = REGISTRI.gauge("kuesioner_dashboard_dataset_questions", "Jumlah pertanyaan dataset pada rerun terakhir", ("source",))
+
+
+@st.cache_resource(show_spinner=False)
+def server_metrik(port):
+    # One background /metrics server per process, shared by all sessions
+    return mulai_server_metrik(port)
+
+
+if port_metrik:
+    try:
+        server_metrik(int(port_metrik))
+    except (OSError, ValueError) as e:
+        st.warning(f"Endpoint /metrics tidak dapat dijalankan di port {port_metrik}: {e}")
 
 # Set page configuration
 st.set_page_config(
@@ -46,29 +90,184 @@ st.markdown("""
 # Title
 st.markdown('<p class="main-header">📊 Dashboard Visualisasi Kuesioner</p>', unsafe_allow_html=True)
 
-# Load data directly (without importing answer.py)
-@st.cache_data
-def load_data(file_path):
+# Load data directly (without importing answer.py); mtime_ns keys the cache to the file version on disk
+@tercache()
+def load_data(file_path, sheet_name="Kuesioner", mtime_ns=None):
     try:
-        df = pd.read_excel(file_path, sheet_name="Kuesioner")
+        df = pd.read_excel(file_path, sheet_name=sheet_name)
         return df
     except Exception as e:
         st.error(f"Error loading data: {e}")
         return None
 
+# Out-of-core path: stream the on-disk code matrix block by block
+@tercache(show_spinner="Menghitung ringkasan berblok...")
+def ringkasan_store(path, mtime_ns, size, label, skor, batas_std, batas_longstring, exclude_flagged, n_worker=1, berbobot=False):
+    header_store = buka_kode(path)[1]
+    skor_per_kode = np.concatenate([[np.nan], skor])
+    tertandai, jumlah_tanda = periksa_kualitas_berblok(iter_blok_kode(path), skor_per_kode, batas_std, batas_longstring, n_worker)
+    dipakai = ~tertandai if exclude_flagged else None
+    bobot = buka_bobot(path) if berbobot else None
+    frekuensi = hitung_frekuensi_berblok(iter_blok_kode(path), len(header_store['kolom']), len(label), dipakai, n_worker, bobot)
+    return frekuensi, jumlah_tanda
+
+# SQLite backend: unfiltered/filtered counts are pushed down to indexed SQL;
+# respondent rows are only rebuilt for the quality checks (and for weighted counts)
+@tercache(show_spinner="Menghitung ringkasan dari SQLite...")
+def ringkasan_db(path, mtime_ns, size, label, skor, batas_std, batas_longstring, exclude_flagged, filter_teks=(), berbobot=False):
+    import sqlite3
+    header_db = info_db(path)
+    kondisi = parse_filter(list(filter_teks), header_db)
+    skor_per_kode = np.concatenate([[np.nan], skor])
+    tertandai, jumlah_tanda = periksa_kualitas_berblok(iter_blok_db(path, kondisi=kondisi), skor_per_kode, batas_std, batas_longstring)
+    if exclude_flagged or berbobot:
+        frekuensi = hitung_frekuensi_berblok(
+            iter_blok_db(path, kondisi=kondisi), len(header_db['kolom']), len(label),
+            ~tertandai if exclude_flagged else None, bobot=bobot_db(path, kondisi) if berbobot else None
+        )
+    else:
+        con = sqlite3.connect(path)
+        try:
+            frekuensi = frekuensi_db(con, kondisi)
+        finally:
+            con.close()
+    return frekuensi, jumlah_tanda
+
+# Respondent count matching the SQLite filter, so the totals agree with the filtered aggregates
+@tercache(show_spinner=False)
+def responden_db(path, mtime_ns, size, filter_teks=()):
+    import sqlite3
+    kondisi = parse_filter(list(filter_teks), info_db(path))
+    con = sqlite3.connect(path)
+    try:
+        return jumlah_responden_db(con, kondisi)
+    finally:
+        con.close()
+
+# Respondent explorer: filter + sort pass over the code blocks, keeping only row indices.
+# Pages are cut from the cached index array, so paging never rescans the data
+@tercache(show_spinner="Menyaring responden...", max_entries=16)
+def urutan_penjelajah(kunci_sumber, kondisi, kolom_urut, turun, skor, _baca_blok):
+    skor_per_kode = np.concatenate([[np.nan], skor])
+    return urutkan_responden(_baca_blok(), kondisi, kolom_urut, turun, skor_per_kode)
+
+# Graded response model fit on unique answer patterns; scipy is only imported when the view is enabled
+@tercache(show_spinner="Estimasi graded response model...", max_entries=4)
+def model_irt(kunci_sumber, label, skor, kolom, _baca_blok, _bobot=None):
+    from irt import estimasi_irt, statistik_irt
+    skema_irt = {'label': list(label), 'skor': np.asarray(skor)}
+    model, _, bobot, _, eap, _ = estimasi_irt(_baca_blok, skema_irt, bobot=_bobot)
+    return statistik_irt(model, kolom, skema_irt), model, eap, bobot
+
+# Respondent score index: cumulative counts per distinct score, so rank/percentile lookups are binary searches
+@tercache(show_spinner="Menghitung skor responden...", max_entries=4)
+def indeks_skor(kunci_sumber, sidik_jari_skema, _skema, _baca_blok, _bobot=None):
+    from skor_responden import bangun_indeks_skor
+    return bangun_indeks_skor(_baca_blok(), _skema, bobot=_bobot)
+
+# Plotting library is imported on first use only, so the header, sidebar and
+# metrics reach the browser before plotly is loaded (cached in sys.modules afterwards)
+def load_plotly():
+    import plotly.graph_objects as go
+    return go
+
+# Plotly D3 qualitative palette, kept inline to avoid importing plotly.colors at startup
+PALET_D3 = ['#1F77B4', '#FF7F0E', '#2CA02C', '#D62728', '#9467BD',
+            '#8C564B', '#E377C2', '#7F7F7F', '#BCBD22', '#17BECF']
+
 # Sidebar
 with st.sidebar:
     st.header("⚙️ Pengaturan")
     
     uploaded_file = st.file_uploader("Upload File Excel", type=['xlsx', 'xls'])
+    uploaded_schema = st.file_uploader("Upload Skema (JSON, opsional)", type=['json'])
+    
+    # Scale schema: labels, scores, categories and question pattern
+    try:
+        skema = kompilasi_skema(json.load(uploaded_schema)) if uploaded_schema is not None else muat_skema()
+    except (ValueError, KeyError) as e:
+        st.error(f"Skema tidak valid: {e}")
+        st.stop()
     
-    if uploaded_file is not None:
-        df = load_data(uploaded_file)
+    store_path = st.text_input(
+        "File Kode .ksr / SQLite (opsional)",
+        help="Dataset besar hasil `python penyimpanan.py data.xlsx data.ksr` (dibaca berblok via np.memmap) "
+             "atau `python basisdata.py data.xlsx data.db` (agregat lewat SQL)"
+    ).strip()
+    
+    # Workspace: several surveys registered per session, switched from an LRU cache bounded by bytes;
+    # Excel files are converted once to the on-disk .ksr cache, evicted datasets reload from there
+    with st.expander("🗂️ Ruang Kerja"):
+        daftar_ruang_kerja = [p.strip() for p in st.text_area(
+            "Dataset (satu path Excel/CSV/.ksr per baris)",
+            help="Semua dataset memakai skema yang sama; ringkasan disimpan di memori per dataset"
+        ).splitlines() if p.strip()]
+        batas_ruang_kerja_mb = st.number_input(
+            "Batas memori cache (MB)", min_value=16, max_value=65_536, value=BATAS_CACHE // 2**20, step=64
+        )
+        info_ruang_kerja = st.empty()
+    # The invalid-value policy widget is rendered further down; its value is read from session state
+    kebijakan_ruang_kerja = st.session_state.get('kebijakan_tidak_valid', 'missing')
+    ruang_kerja = st.session_state.get('ruang_kerja')
+    if (ruang_kerja is None or ruang_kerja.skema['sidik_jari'] != skema['sidik_jari']
+            or ruang_kerja.kebijakan != kebijakan_ruang_kerja):
+        ruang_kerja = st.session_state['ruang_kerja'] = RuangKerja(
+            skema, batas_ruang_kerja_mb * 2**20, kebijakan_ruang_kerja
+        )
+    ruang_kerja.cache.atur_batas(batas_ruang_kerja_mb * 2**20)
+    nama_terdaftar = [ruang_kerja.daftarkan(p) for p in daftar_ruang_kerja]
+    for nama in set(ruang_kerja.sumber) - set(nama_terdaftar):
+        ruang_kerja.hapus(nama)
+    nama_aktif = st.radio("Dataset Aktif", nama_terdaftar, horizontal=True) if nama_terdaftar else None
+    mode_ruang_kerja = nama_aktif is not None
+    if mode_ruang_kerja:
+        try:
+            dataset_aktif = ruang_kerja.dataset(nama_aktif)
+        except (OSError, ValueError) as e:
+            st.error(f"Gagal memuat {nama_aktif}: {e}")
+            st.stop()
+        store_path = dataset_aktif['path_kode']
+    
+    mode_store = bool(store_path)
+    mode_db = store_path.lower().endswith(('.db', '.sqlite', '.sqlite3'))
+    filter_db = []
+    if mode_db:
+        filter_db = [f.strip() for f in st.text_input(
+            "Filter Responden (SQLite)", placeholder="Q3=SS; Q1=S,SS",
+            help="Kondisi KOLOM=LABEL[,LABEL] dipisah titik koma, digabung dengan AND"
+        ).split(";") if f.strip()]
+    elif mode_store:
+        n_worker = st.number_input(
+            "Jumlah Thread Agregasi", min_value=0, max_value=64, value=0,
+            help="0 = semua core; blok baris dihitung paralel lalu digabung"
+        )
+    
+    if mode_store:
+        try:
+            if mode_ruang_kerja:
+                kode_jawaban, header_store = dataset_aktif['kode'], dataset_aktif['header']
+                n_responden_store = kode_jawaban.shape[0]
+            elif mode_db:
+                header_store = info_db(store_path, skema)
+                kondisi_pratinjau = parse_filter(filter_db, header_store)
+                # Only the first matching rows are rebuilt, for the data preview
+                kode_jawaban = next(iter_blok_db(store_path, 5, kondisi_pratinjau), np.zeros((0, len(header_store['kolom'])), dtype=np.int8))
+                stat_db = os.stat(store_path)
+                n_responden_store = responden_db(store_path, stat_db.st_mtime_ns, stat_db.st_size, tuple(filter_db)) if filter_db else header_store['n_responden']
+            else:
+                kode_jawaban, header_store = buka_kode(store_path, skema)
+                n_responden_store = kode_jawaban.shape[0]
+        except (OSError, ValueError) as e:
+            st.error(f"Gagal membuka {store_path}: {e}")
+            st.stop()
+        st.success(f"✓ {nama_aktif if mode_ruang_kerja else 'Basis data' if mode_db else 'File kode'} dimuat ({n_responden_store:,} responden)")
+    elif uploaded_file is not None:
+        df = load_data(uploaded_file, skema['sheet'])
         if df is not None:
             st.success("✓ Data berhasil dimuat!")
     else:
         try:
-            df = load_data("data_kuesioner.xlsx")
+            df = load_data("data_kuesioner.xlsx", skema['sheet'], os.stat("data_kuesioner.xlsx").st_mtime_ns)
             if df is not None:
                 st.success("✓ Data default berhasil dimuat!")
             else:
@@ -78,44 +277,289 @@ with st.sidebar:
             st.error("File data_kuesioner.xlsx tidak ditemukan!")
             st.stop()
     
-    # Filter only Q1-Q17 columns
-    pertanyaan_cols = [col for col in df.columns if str(col).startswith('Q') and str(col)[1:].isdigit() and 1 <= int(str(col)[1:]) <= 17]
-    df_pertanyaan = df[pertanyaan_cols].copy()
+    # Filter question columns according to the schema (default Q1-Q17)
+    if mode_store:
+        pertanyaan_cols = header_store['kolom']
+        total_responden = n_responden_store
+    else:
+        pertanyaan_cols = pilih_kolom_pertanyaan(df.columns, skema)
+        df_pertanyaan = df[pertanyaan_cols]
+        total_responden = len(df_pertanyaan)
+    
+    # Survey weights: every count, mean and chart below comes from the weighted count matrix
+    if mode_store:
+        kolom_bobot = header_store.get('kolom_bobot')
+        if kolom_bobot and not st.checkbox(f"Terapkan bobot survei ({kolom_bobot})", value=True):
+            kolom_bobot = None
+    else:
+        pilihan_bobot = [None] + [str(k) for k in df.columns if k not in pertanyaan_cols]
+        kolom_bobot = st.selectbox(
+            "Kolom Bobot Survei", pilihan_bobot,
+            index=pilihan_bobot.index(skema['kolom_bobot']) if skema['kolom_bobot'] in pilihan_bobot else 0,
+            format_func=lambda k: "(tanpa bobot)" if k is None else k
+        )
+        bobot_jawaban = None
+        if kolom_bobot:
+            try:
+                bobot_jawaban = validasi_bobot(df[kolom_bobot].values, kolom_bobot)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+                st.stop()
     
     # Display basic info
     st.header("📋 Informasi Data")
-    total_responden = len(df_pertanyaan)
     total_pertanyaan = len(pertanyaan_cols)
     total_jawaban = total_responden * total_pertanyaan
     
     st.metric("Total Responden", total_responden)
     st.metric("Total Pertanyaan", total_pertanyaan)
     st.metric("Total Jawaban", total_jawaban)
+diagnostik.titik("muat data")
+
+# Count columns rendered as in-cell bars (replaces Styler.background_gradient)
+def kolom_batang(label, nilai_maks):
+    return st.column_config.ProgressColumn(
+        label, format="%.1f" if desimal else "%d", min_value=0, max_value=max(float(nilai_maks), 1)
+    )
+
+# Scale labels, scores and categories compiled from the schema
+urutan_skala = skema['label']
+kategori_label = [k.capitalize() for k in skema['kategori']]
+skor_min, skor_maks = skema['skor'].min(), skema['skor'].max()
+
+# Score thresholds derived from categories (default: netral = 4, positif >= 5)
+def ambang_kategori(nama, bawaan):
+    skor_kategori = skema['skor'][skema['kategori_per_kode'][1:] == skema['kategori'].index(nama)] if nama in skema['kategori'] else []
+    return skor_kategori.min() if len(skor_kategori) else bawaan
+
+ambang_netral = ambang_kategori('netral', (skor_min + skor_maks) / 2)
+ambang_positif = ambang_kategori('positif', skor_maks)
+
+warna_skala = (PALET_D3 * (len(urutan_skala) // len(PALET_D3) + 1))[:len(urutan_skala)]
+warna_kategori = {'Positif': '#27ae60', 'Netral': '#f39c12', 'Negatif': '#e74c3c'}
+warna_kategori_list = [warna_kategori.get(k, '#7f8c8d') for k in kategori_label]
 
-# Mapping skala ke skor dan kategori
-skala_ke_skor = {'SS': 6, 'S': 5, 'CS': 4, 'CTS': 3, 'TS': 2, 'STS': 1}
-kategori_mapping = {
-    'SS': 'Positif',
-    'S': 'Positif',
-    'CS': 'Netral',
-    'CTS': 'Negatif',
-    'TS': 'Negatif',
-    'STS': 'Negatif'
-}
-
-# Prepare data for analysis
-all_answers = df_pertanyaan.values.flatten()
-dist_overall = pd.Series(all_answers).value_counts().reindex(['SS', 'S', 'CS', 'CTS', 'TS', 'STS'], fill_value=0)
-
-# Convert to numeric scores
-df_skor = df_pertanyaan.replace(skala_ke_skor)
-rata_rata_per_q = df_skor.mean().round(2)
-rata_rata_keseluruhan = df_skor.values.flatten().mean()
+# Answer validation (normalize labels, handle blank/unknown cells)
+with st.sidebar:
+    st.header("🧹 Kualitas Data")
+    kebijakan_tidak_valid = st.selectbox(
+        "Penanganan jawaban tidak valid",
+        KEBIJAKAN_TIDAK_VALID,
+        index=KEBIJAKAN_TIDAK_VALID.index('missing'),
+        format_func=lambda k: {'drop': 'Buang baris', 'missing': 'Anggap kosong', 'fail': 'Hentikan'}[k],
+        key='kebijakan_tidak_valid'
+    )
+
+label_per_kode = np.array([np.nan] + urutan_skala, dtype=object)
+
+# Cells in a .ksr store were already validated during conversion
+if not mode_store:
+    try:
+        kode_jawaban, baris_dipakai, laporan_validasi = validasi_jawaban(
+            df_pertanyaan.values, urutan_skala, pertanyaan_cols, kebijakan_tidak_valid
+        )
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        st.stop()
+
+    if laporan_validasi['total_tidak_valid'] > 0:
+        with st.sidebar.expander(f"⚠️ {laporan_validasi['total_tidak_valid']} sel tidak valid"):
+            st.text(format_laporan_validasi(laporan_validasi))
+
+    df_pertanyaan = pd.DataFrame(label_per_kode[kode_jawaban], columns=pertanyaan_cols, index=df_pertanyaan.index[baris_dipakai])
+    if bobot_jawaban is not None:
+        bobot_jawaban = bobot_jawaban[baris_dipakai]
+diagnostik.titik("validasi")
+
+# Data quality check (duplicates, straight-liners, low variance, longstring)
+with st.sidebar:
+    with st.expander("Ambang Deteksi"):
+        batas_std = st.slider("Batas standar deviasi skor", 0.0, 1.5, 0.3, 0.05)
+        batas_longstring = st.slider("Batas longstring", 2, max(2, len(pertanyaan_cols)), min(10, max(2, len(pertanyaan_cols))))
+    
+    ringkasan_tanda = st.empty()
+    exclude_flagged = st.checkbox("Kecualikan respon tertandai", value=False)
+    
+    if mode_db:
+        stat_store = os.stat(store_path)
+        frekuensi_store, jumlah_tanda = ringkasan_db(
+            store_path, stat_store.st_mtime_ns, stat_store.st_size, tuple(urutan_skala),
+            skema['skor'], batas_std, batas_longstring, exclude_flagged, tuple(filter_db), bool(kolom_bobot)
+        )
+    elif mode_ruang_kerja:
+        stat_store = os.stat(store_path)
+        frekuensi_store, jumlah_tanda = ruang_kerja.ringkasan(
+            nama_aktif, batas_std, batas_longstring, exclude_flagged, bool(kolom_bobot), n_worker
+        )
+    elif mode_store:
+        stat_store = os.stat(store_path)
+        frekuensi_store, jumlah_tanda = ringkasan_store(
+            store_path, stat_store.st_mtime_ns, stat_store.st_size, tuple(urutan_skala),
+            skema['skor'], batas_std, batas_longstring, exclude_flagged, n_worker, bool(kolom_bobot)
+        )
+    else:
+        kualitas = periksa_kualitas(kode_jawaban, skema['skor_per_kode'], batas_std, batas_longstring)
+        jumlah_tanda = {jenis: int(kualitas[jenis].sum()) for jenis in ['duplikat', 'straightline', 'varians_rendah', 'longstring', 'tertandai']}
+    
+    with ringkasan_tanda.container():
+        st.metric("Respon Tertandai", jumlah_tanda['tertandai'])
+        st.caption(
+            f"Duplikat: {jumlah_tanda['duplikat']} | "
+            f"Straight-liner: {jumlah_tanda['straightline']} | "
+            f"Varians rendah: {jumlah_tanda['varians_rendah']} | "
+            f"Longstring: {jumlah_tanda['longstring']}"
+        )
+
+if mode_ruang_kerja:
+    statistik_cache = ruang_kerja.cache.statistik()
+    info_ruang_kerja.caption(
+        f"{len(ruang_kerja.sumber)} dataset terdaftar | {statistik_cache['n_entri']} entri di memori "
+        f"({statistik_cache['total_byte'] / 2**20:,.1f} / {statistik_cache['batas_byte'] / 2**20:,.0f} MB) | "
+        f"hit {statistik_cache['hit']}, miss {statistik_cache['miss']}, dibuang {statistik_cache['eviksi']}"
+    )
+
+diagnostik.titik("kualitas data")
+
+if exclude_flagged and not mode_store:
+    df_pertanyaan = df_pertanyaan[~kualitas['tertandai']]
+    kode_jawaban = kode_jawaban[~kualitas['tertandai']]
+    if bobot_jawaban is not None:
+        bobot_jawaban = bobot_jawaban[~kualitas['tertandai']]
+
+# Prepare data for analysis: every aggregate comes from one question x scale count matrix
+if mode_store:
+    ringkasan = ringkas_frekuensi(frekuensi_store, skema, pertanyaan_cols)
+    # Only a small preview is decoded from the memory-mapped file
+    df_pertanyaan = pd.DataFrame(label_per_kode[np.asarray(kode_jawaban[:5])], columns=pertanyaan_cols)
+else:
+    ringkasan = hitung_ringkasan(kode_jawaban, skema, pertanyaan_cols, bobot_jawaban)
+# Weighted counts are sums of weights; shown with one decimal
+desimal = 1 if ringkasan['berbobot'] else 0
+if ringkasan['berbobot']:
+    with st.sidebar:
+        st.metric("Ukuran Sampel Efektif (Kish)", f"{ringkasan['n_efektif_responden']:,.1f}",
+                  help=f"Jumlah bobot: {ringkasan['n_responden']:,.1f}")
+dist_overall = pd.Series(ringkasan['distribusi'], index=urutan_skala).round(desimal)
+distribution_per_q = pd.DataFrame(ringkasan['frekuensi'].T, index=urutan_skala, columns=pertanyaan_cols).round(desimal)
+
+rata_rata_per_q = pd.Series(ringkasan['rata_rata_per_q'], index=pertanyaan_cols).round(2)
+rata_rata_keseluruhan = ringkasan['rata_rata']
 
 # Category distribution
-df_kategori = df_pertanyaan.replace(kategori_mapping)
-kategori_counts = pd.Series(df_kategori.values.flatten()).value_counts().reindex(['Positif', 'Netral', 'Negatif'], fill_value=0)
+kategori_counts = pd.Series(ringkasan['distribusi_kategori'], index=kategori_label).round(desimal)
 kategori_persen = (kategori_counts / kategori_counts.sum() * 100).round(1)
+cat_per_q = pd.DataFrame(ringkasan['frekuensi_kategori'].T, index=kategori_label, columns=pertanyaan_cols).round(desimal)
+
+diagnostik.titik("agregasi")
+
+# Every chart tab needs plotly; load it only now that the text content is out
+go = load_plotly()
+diagnostik.titik("impor plotly")
+
+with st.sidebar:
+    with st.expander("Rendering Grafik"):
+        batas_payload_kb = st.number_input(
+            "Batas payload per grafik (KB)", min_value=0, max_value=10_000, value=BATAS_PAYLOAD // 1000, step=50,
+            help="Grafik di atas batas ini diringkas/diturunkan sampelnya; 0 = tanpa batas"
+        )
+        butir_per_halaman = st.number_input(
+            "Butir per halaman grafik", min_value=5, max_value=200, value=25, step=5,
+            help="Dipakai jika skema tidak mendefinisikan bagian pertanyaan"
+        )
+    with st.expander("Pantau Perubahan File"):
+        pantau_aktif = st.checkbox(
+            "Muat ulang otomatis", value=False,
+            help="Stat file sumber diperiksa berkala; dashboard dimuat ulang hanya jika isi file berubah"
+        )
+        interval_pantau = st.number_input("Interval pemeriksaan (detik)", min_value=1.0, max_value=600.0, value=INTERVAL_PANTAU, step=1.0)
+    with st.expander("Diagnostik Kinerja"):
+        diagnostik_tampil = st.checkbox("Tampilkan diagnostik rerun", value=False)
+        diagnostik_log = st.checkbox("Catat ke log kinerja", value=False, help=f"Satu baris JSON per rerun di {LOG_KINERJA} (dirotasi)")
+        panel_diagnostik = st.empty()
+        if path_metrik or port_metrik:
+            st.caption("Metrik Prometheus: " + ", ".join(
+                ([f"file {path_metrik}"] if path_metrik else []) + ([f"http://127.0.0.1:{port_metrik}/metrics"] if port_metrik else [])
+            ))
+
+# Watch mode: a fragment polls the source file stats and waits out bursts of writes;
+# the whole app reruns only when the content hash changed (a bare touch is ignored)
+if mode_ruang_kerja:
+    file_pantau = [ruang_kerja.sumber[nama_aktif]]
+elif mode_store:
+    file_pantau = [store_path] + [p for p in [path_bobot(store_path)] if os.path.exists(p)]
+else:
+    file_pantau = [] if uploaded_file is not None else ["data_kuesioner.xlsx"]
+if pantau_aktif and file_pantau:
+    pemantau_sesi = st.session_state.setdefault('pemantau', {})
+    pemantau_file = [pemantau_sesi.setdefault(os.path.abspath(p), PemantauFile(os.path.abspath(p))) for p in file_pantau]
+    for pemantau in pemantau_file:
+        if pemantau.stat is None:
+            pemantau.periksa()
+
+    @st.fragment(run_every=interval_pantau)
+    def periksa_perubahan():
+        if any(pemantau.berubah() for pemantau in pemantau_file):
+            tunggu_tenang(pemantau_file, min(JEDA_TENANG, interval_pantau), interval_pantau)
+            if {pemantau.periksa() for pemantau in pemantau_file} - {None, 'sama'}:
+                st.rerun()
+        st.caption(f"Diperiksa {pd.Timestamp.now():%H:%M:%S} ({len(pemantau_file)} file)")
+
+    with st.sidebar:
+        periksa_perubahan()
+elif pantau_aktif:
+    st.sidebar.caption("File unggahan tidak dapat dipantau; pakai path file kode atau ruang kerja")
+
+# Every figure goes through the compaction layer (WebGL, no duplicated text, size budget)
+def tampilkan_grafik(fig, nama):
+    bangun = diagnostik.titik("bangun grafik")
+    fig, info = siapkan_grafik(fig, nama, batas_payload_kb * 1000)
+    kompaksi = diagnostik.titik("kompaksi grafik")
+    st.plotly_chart(fig, use_container_width=True)
+    diagnostik.catat_grafik(info, bangun, kompaksi, diagnostik.titik("serialisasi grafik"))
+    return info
+
+# Per-question charts show one section/page of questions at a time, so both the
+# figure payload and the per-respondent work stay bounded for 150+ item instruments
+kelompok_pertanyaan = kelompokkan_pertanyaan(pertanyaan_cols, skema, butir_per_halaman) or [("", [])]
+if len(kelompok_pertanyaan) > 1:
+    nama_kelompok = st.selectbox(
+        f"Kelompok Pertanyaan ({len(kelompok_pertanyaan)} kelompok, {len(pertanyaan_cols)} butir)",
+        [nama for nama, _ in kelompok_pertanyaan]
+    )
+else:
+    nama_kelompok = kelompok_pertanyaan[0][0]
+indeks_tampil = dict(kelompok_pertanyaan)[nama_kelompok]
+kolom_tampil = [pertanyaan_cols[i] for i in indeks_tampil]
+rentang_q = nama_kelompok
+
+distribution_tampil = distribution_per_q.iloc[:, indeks_tampil]
+rata_rata_tampil = rata_rata_per_q.iloc[indeks_tampil]
+cat_tampil = cat_per_q.iloc[:, indeks_tampil]
+# Numeric scores are only materialized for the visible questions (unweighted Excel data only)
+df_skor = None if mode_store or ringkasan['berbobot'] else pd.DataFrame(
+    skema['skor_per_kode'][kode_jawaban[:, indeks_tampil]], columns=kolom_tampil, index=df_pertanyaan.index
+)
+
+# Block source for row-level views (explorer, IRT); Excel data is already in memory, stores are streamed
+if mode_db:
+    kondisi_db = parse_filter(filter_db, header_store)
+    baca_blok_sumber = lambda: iter_blok_db(store_path, kondisi=kondisi_db)
+    kunci_sumber = (store_path, stat_store.st_mtime_ns, stat_store.st_size, tuple(filter_db))
+    bobot_sumber = bobot_db(store_path, kondisi_db) if kolom_bobot else None
+elif mode_ruang_kerja:
+    baca_blok_sumber = lambda: iter_blok(kode_jawaban)
+    kunci_sumber = dataset_aktif['kunci']
+    bobot_sumber = dataset_aktif['bobot'] if kolom_bobot else None
+elif mode_store:
+    baca_blok_sumber = lambda: iter_blok_kode(store_path)
+    kunci_sumber = (store_path, stat_store.st_mtime_ns, stat_store.st_size)
+    bobot_sumber = buka_bobot(store_path) if kolom_bobot else None
+else:
+    baca_blok_sumber = lambda: iter_blok(kode_jawaban)
+    kunci_sumber = kode_jawaban
+    bobot_sumber = bobot_jawaban
+
+diagnostik.titik("persiapan tampilan")
 
 # Main content tabs
 tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
@@ -138,7 +582,7 @@ with tab1:
             go.Bar(
                 x=dist_overall.index,
                 y=dist_overall.values,
-                marker_color=['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b'],
+                marker_color=warna_skala,
                 text=dist_overall.values,
                 textposition='auto',
             )
@@ -150,7 +594,7 @@ with tab1:
             template='plotly_white',
             height=400
         )
-        st.plotly_chart(fig_bar, use_container_width=True)
+        tampilkan_grafik(fig_bar, "distribusi_bar")
     
     with col2:
         # Pie Chart
@@ -159,7 +603,7 @@ with tab1:
                 labels=dist_overall.index,
                 values=dist_overall.values,
                 hole=0.4,
-                marker_colors=['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b'],
+                marker_colors=warna_skala,
                 textinfo='label+percent',
                 hoverinfo='label+value+percent'
             )
@@ -169,47 +613,108 @@ with tab1:
             template='plotly_white',
             height=400
         )
-        st.plotly_chart(fig_pie, use_container_width=True)
+        tampilkan_grafik(fig_pie, "distribusi_pie")
     
     # Display raw data
     st.subheader("Tabel Distribusi Jawaban")
-    st.dataframe(dist_overall.to_frame(name='Jumlah').style.background_gradient(cmap='Blues'))
+    # Bars via column_config instead of a Styler, so no HTML table is materialized
+    st.dataframe(
+        dist_overall.to_frame(name='Jumlah'),
+        column_config={'Jumlah': kolom_batang('Jumlah', dist_overall.max())}
+    )
+
+diagnostik.titik("tab 1")
 
 with tab2:
     st.header("Distribusi Jawaban per Pertanyaan")
     
-    # Stacked Bar Chart
-    distribution_per_q = pd.DataFrame()
-    for col in df_pertanyaan.columns:
-        counts = df_pertanyaan[col].value_counts().reindex(['SS', 'S', 'CS', 'CTS', 'TS', 'STS'], fill_value=0)
-        distribution_per_q[col] = counts
-    
-    fig_stacked = go.Figure()
-    colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b']
-    
-    for i, skala in enumerate(['SS', 'S', 'CS', 'CTS', 'TS', 'STS']):
-        fig_stacked.add_trace(go.Bar(
-            name=skala,
-            x=distribution_per_q.columns,
-            y=distribution_per_q.loc[skala],
-            marker_color=colors[i],
-            text=distribution_per_q.loc[skala],
-            textposition='inside'
-        ))
+    col1, col2 = st.columns(2)
+    with col1:
+        tampilan_q = st.radio("Tampilan", ["Stacked", "Diverging Likert"], horizontal=True)
+    with col2:
+        urutan_q = st.selectbox("Urutkan pertanyaan", ["Urutan data", "Rata-rata skor", f"% {kategori_label[0]}"])
     
-    fig_stacked.update_layout(
-        title='Distribusi Jawaban per Pertanyaan (Q1-Q17)',
-        xaxis_title='Pertanyaan',
-        yaxis_title='Jumlah Responden',
-        barmode='stack',
-        template='plotly_white',
-        height=500,
-        legend_title='Skala Jawaban'
-    )
-    st.plotly_chart(fig_stacked, use_container_width=True)
+    # Ordering within the visible group (highest first)
+    frekuensi_tampil = ringkasan['frekuensi'][indeks_tampil].round(desimal)
+    n_valid_tampil = np.maximum(frekuensi_tampil.sum(axis=1), 1)
+    if urutan_q == "Rata-rata skor":
+        urutan_tampil = np.argsort(-np.nan_to_num(ringkasan['rata_rata_per_q'][indeks_tampil], nan=-np.inf), kind='stable')
+    elif urutan_q != "Urutan data":
+        urutan_tampil = np.argsort(-ringkasan['frekuensi_kategori'][indeks_tampil, 0] / n_valid_tampil, kind='stable')
+    else:
+        urutan_tampil = np.arange(len(indeks_tampil))
+    kolom_urut = [kolom_tampil[i] for i in urutan_tampil]
+    
+    if tampilan_q == "Stacked":
+        # Stacked Bar Chart
+        fig_stacked = go.Figure()
+        
+        for i, skala in enumerate(urutan_skala):
+            fig_stacked.add_trace(go.Bar(
+                name=skala,
+                x=kolom_urut,
+                y=frekuensi_tampil[urutan_tampil, i],
+                marker_color=warna_skala[i],
+                text=frekuensi_tampil[urutan_tampil, i],
+                textposition='inside'
+            ))
+        
+        fig_stacked.update_layout(
+            title=f'Distribusi Jawaban per Pertanyaan ({rentang_q})',
+            xaxis_title='Pertanyaan',
+            yaxis_title='Jumlah Responden',
+            barmode='stack',
+            template='plotly_white',
+            height=500,
+            legend_title='Skala Jawaban'
+        )
+        tampilkan_grafik(fig_stacked, "per_pertanyaan_stacked")
+    else:
+        # Diverging Likert: negative levels extend left, positive right, neutral split at zero;
+        # one compact horizontal row per question, in percent of valid answers
+        persen_tampil = frekuensi_tampil[urutan_tampil] / n_valid_tampil[urutan_tampil, None] * 100
+        skor_tengah = skema['skor'].mean()
+        kategori_level = [skema['kategori'][k] for k in skema['kategori_per_kode'][1:]]
+        netral = [i for i, k in enumerate(kategori_level) if k == 'netral']
+        positif = sorted((i for i in range(len(urutan_skala)) if i not in netral and skema['skor'][i] > skor_tengah), key=lambda i: skema['skor'][i])
+        negatif = sorted((i for i in range(len(urutan_skala)) if i not in netral and i not in positif), key=lambda i: -skema['skor'][i])
+        
+        fig_diverging = go.Figure()
+        for i in netral:
+            for tanda, tampil_legenda in [(1, True), (-1, False)]:
+                fig_diverging.add_trace(go.Bar(
+                    name=urutan_skala[i], y=kolom_urut, x=tanda * persen_tampil[:, i] / 2, orientation='h',
+                    marker_color=warna_skala[i], legendgroup=urutan_skala[i], showlegend=tampil_legenda,
+                    customdata=persen_tampil[:, i], hovertemplate='%{y} ' + urutan_skala[i] + ': %{customdata:.1f}%<extra></extra>'
+                ))
+        for i in positif + negatif:
+            tanda = 1 if i in positif else -1
+            fig_diverging.add_trace(go.Bar(
+                name=urutan_skala[i], y=kolom_urut, x=tanda * persen_tampil[:, i], orientation='h',
+                marker_color=warna_skala[i], legendgroup=urutan_skala[i],
+                customdata=persen_tampil[:, i], hovertemplate='%{y} ' + urutan_skala[i] + ': %{customdata:.1f}%<extra></extra>'
+            ))
+        fig_diverging.update_layout(
+            title=f'Diverging Likert per Pertanyaan ({rentang_q})',
+            xaxis_title='% jawaban valid (negatif ← | → positif)',
+            xaxis=dict(ticksuffix='%', zeroline=True, zerolinewidth=2),
+            yaxis=dict(autorange='reversed'),
+            barmode='relative',
+            template='plotly_white',
+            height=max(300, 26 * len(kolom_urut) + 150),
+            legend_title='Skala Jawaban',
+            legend_traceorder='normal'
+        )
+        tampilkan_grafik(fig_diverging, "per_pertanyaan_diverging")
     
     st.subheader("Tabel Distribusi per Pertanyaan")
-    st.dataframe(distribution_per_q.style.background_gradient(cmap='Blues'))
+    # One row per question: the grid virtualizes rows, so hundreds of questions stay cheap
+    st.dataframe(
+        distribution_per_q.T,
+        column_config={skala: kolom_batang(skala, distribution_per_q.values.max()) for skala in urutan_skala}
+    )
+
+diagnostik.titik("tab 2")
 
 with tab3:
     st.header("Rata-rata Skor per Pertanyaan")
@@ -219,47 +724,47 @@ with tab3:
     with col1:
         # Bar Chart for average scores
         colors_avg = []
-        for score in rata_rata_per_q.values:
-            if score >= 5:
+        for score in rata_rata_tampil.values:
+            if score >= ambang_positif:
                 colors_avg.append('#27ae60')  # Green
-            elif score >= 4:
+            elif score >= ambang_netral:
                 colors_avg.append('#f39c12')  # Orange
             else:
                 colors_avg.append('#e74c3c')  # Red
         
         fig_avg = go.Figure(data=[
             go.Bar(
-                x=rata_rata_per_q.index,
-                y=rata_rata_per_q.values,
+                x=rata_rata_tampil.index,
+                y=rata_rata_tampil.values,
                 marker_color=colors_avg,
-                text=rata_rata_per_q.values,
+                text=rata_rata_tampil.values,
                 textposition='auto',
             )
         ])
-        fig_avg.add_hline(y=4, line_dash="dash", line_color="red", 
-                         annotation_text="Threshold Netral (4)", annotation_position="bottom right")
+        fig_avg.add_hline(y=ambang_netral, line_dash="dash", line_color="red", 
+                         annotation_text=f"Threshold Netral ({ambang_netral:g})", annotation_position="bottom right")
         fig_avg.update_layout(
             title='Rata-rata Skor per Pertanyaan',
             xaxis_title='Pertanyaan',
             yaxis_title='Rata-rata Skor',
             template='plotly_white',
             height=400,
-            yaxis_range=[0, 6.5]
+            yaxis_range=[0, skor_maks + 0.5]
         )
-        st.plotly_chart(fig_avg, use_container_width=True)
+        tampilkan_grafik(fig_avg, "rata_rata_bar")
     
     with col2:
         # Trend Line
         fig_trend = go.Figure()
         fig_trend.add_trace(go.Scatter(
-            x=rata_rata_per_q.index,
-            y=rata_rata_per_q.values,
+            x=rata_rata_tampil.index,
+            y=rata_rata_tampil.values,
             mode='lines+markers',
             line=dict(color='#3498db', width=3),
             marker=dict(size=10, symbol='circle'),
             name='Rata-rata Skor'
         ))
-        fig_trend.add_hline(y=4, line_dash="dash", line_color="orange", 
+        fig_trend.add_hline(y=ambang_netral, line_dash="dash", line_color="orange", 
                            annotation_text="Threshold Netral")
         fig_trend.update_layout(
             title='Trend Rata-rata Skor per Pertanyaan',
@@ -267,9 +772,9 @@ with tab3:
             yaxis_title='Rata-rata Skor',
             template='plotly_white',
             height=400,
-            yaxis_range=[0, 6.5]
+            yaxis_range=[0, skor_maks + 0.5]
         )
-        st.plotly_chart(fig_trend, use_container_width=True)
+        tampilkan_grafik(fig_trend, "rata_rata_trend")
     
     # Statistics summary
     st.subheader("Statistik Rata-rata Skor")
@@ -277,7 +782,57 @@ with tab3:
     col1.metric("Rata-rata Tertinggi", f"{rata_rata_per_q.max():.2f}", f"{rata_rata_per_q.idxmax()}")
     col2.metric("Rata-rata Terendah", f"{rata_rata_per_q.min():.2f}", f"{rata_rata_per_q.idxmin()}")
     col3.metric("Rata-rata Keseluruhan", f"{rata_rata_keseluruhan:.2f}")
-    col4.metric("Standar Deviasi", f"{df_skor.values.flatten().std():.2f}")
+    col4.metric("Standar Deviasi", f"{ringkasan['std']:.2f}")
+    
+    # Ranked question lists: argpartition over the summary arrays, ties broken by column order
+    st.subheader("Peringkat Pertanyaan")
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        pilihan_ukuran = ['mean'] + list(skema['kategori']) + list(urutan_skala) + ['median', 'iqr', 'leik_d', 'konsensus']
+        ukuran_peringkat = st.selectbox(
+            "Ukuran", pilihan_ukuran,
+            format_func=lambda u: "Rata-rata skor" if u == 'mean'
+            else f"% {u.capitalize()}" if u in skema['kategori']
+            else f"% jawaban {u}" if u in urutan_skala else f"Statistik ordinal: {u}"
+        )
+    with col2:
+        arah_peringkat = st.radio("Urutan", ["Tertinggi", "Terendah"], horizontal=True)
+    with col3:
+        k_peringkat = st.number_input("Jumlah (k)", min_value=1, max_value=max(len(pertanyaan_cols), 1), value=min(10, max(len(pertanyaan_cols), 1)))
+    nilai_peringkat, jumlah_peringkat = ukuran_pertanyaan(ringkasan, ukuran_peringkat)
+    indeks_peringkat = peringkat_teratas(nilai_peringkat, k_peringkat, arah_peringkat == "Tertinggi")
+    df_peringkat = pd.DataFrame({
+        "Pertanyaan": [pertanyaan_cols[j] for j in indeks_peringkat],
+        "Nilai": nilai_peringkat[indeks_peringkat],
+    }, index=pd.RangeIndex(1, len(indeks_peringkat) + 1, name="Peringkat"))
+    if jumlah_peringkat is not None:
+        df_peringkat["Jumlah"] = np.round(jumlah_peringkat[indeks_peringkat], desimal)
+    st.dataframe(df_peringkat, column_config={
+        "Nilai": st.column_config.NumberColumn(format="%.1f%%" if jumlah_peringkat is not None else "%.2f")
+    })
+    
+    # Ordinal statistics come from the same count matrix (median, IQR, box scores, dispersion)
+    st.subheader("Statistik Ordinal per Pertanyaan")
+    nama_ordinal = {
+        'median': ("Median", "%g"), 'modus': ("Modus", "%g"), 'q1': ("Q1", "%g"), 'q3': ("Q3", "%g"),
+        'iqr': ("IQR", "%g"), 'persen_atas': (f"Top-{KOTAK_ATAS}-Box %", "%.1f"),
+        'persen_bawah': (f"Bottom-{KOTAK_BAWAH}-Box %", "%.1f"), 'std': ("Std", "%.3f"),
+        'leik_d': ("Leik D", "%.3f"), 'iov': ("IOV", "%.3f"), 'konsensus': ("Konsensus", "%.3f"),
+    }
+    df_ordinal = pd.DataFrame(
+        {nama: ringkasan['ordinal'][k] for k, (nama, _) in nama_ordinal.items()}, index=pertanyaan_cols
+    )
+    df_ordinal.loc["Keseluruhan"] = [ringkasan['ordinal_keseluruhan'][k] for k in nama_ordinal]
+    st.dataframe(
+        df_ordinal,
+        column_config={nama: st.column_config.NumberColumn(format=format) for nama, format in nama_ordinal.values()}
+    )
+    st.caption(
+        "Leik D dan IOV: 0 = semua jawaban pada satu level, 1 = terbelah di kedua ujung skala; "
+        "Konsensus (Tastle-Wierman): 1 = sepakat penuh."
+    )
+
+diagnostik.titik("tab 3")
 
 with tab4:
     st.header("Distribusi Kategori Jawaban")
@@ -290,7 +845,7 @@ with tab4:
             go.Bar(
                 x=kategori_counts.index,
                 y=kategori_counts.values,
-                marker_color=['#27ae60', '#f39c12', '#e74c3c'],
+                marker_color=warna_kategori_list,
                 text=[f"{count} ({persen}%)" for count, persen in zip(kategori_counts.values, kategori_persen.values)],
                 textposition='auto',
             )
@@ -302,24 +857,19 @@ with tab4:
             template='plotly_white',
             height=400
         )
-        st.plotly_chart(fig_cat, use_container_width=True)
+        tampilkan_grafik(fig_cat, "kategori_bar")
     
     with col2:
         # Category stacked bar per question
-        cat_per_q = pd.DataFrame()
-        for col in df_pertanyaan.columns:
-            counts = df_pertanyaan[col].replace(kategori_mapping).value_counts().reindex(['Positif', 'Netral', 'Negatif'], fill_value=0)
-            cat_per_q[col] = counts
-        
         fig_cat_stacked = go.Figure()
-        for i, cat in enumerate(['Positif', 'Netral', 'Negatif']):
-            color = '#27ae60' if cat == 'Positif' else '#f39c12' if cat == 'Netral' else '#e74c3c'
+        for i, cat in enumerate(kategori_label):
+            color = warna_kategori_list[i]
             fig_cat_stacked.add_trace(go.Bar(
                 name=cat,
-                x=cat_per_q.columns,
-                y=cat_per_q.loc[cat],
+                x=cat_tampil.columns,
+                y=cat_tampil.loc[cat],
                 marker_color=color,
-                text=cat_per_q.loc[cat],
+                text=cat_tampil.loc[cat],
                 textposition='inside'
             ))
         
@@ -332,14 +882,16 @@ with tab4:
             height=400,
             legend_title='Kategori'
         )
-        st.plotly_chart(fig_cat_stacked, use_container_width=True)
+        tampilkan_grafik(fig_cat_stacked, "kategori_stacked")
     
     # Category percentages display
     st.subheader("Persentase Kategori")
-    col1, col2, col3 = st.columns(3)
-    col1.markdown(f'<div class="metric-card"><span class="positive">✅ Positif:</span><br>{kategori_counts["Positif"]} ({kategori_persen["Positif"]}%)</div>', unsafe_allow_html=True)
-    col2.markdown(f'<div class="metric-card"><span class="neutral">⚠️ Netral:</span><br>{kategori_counts["Netral"]} ({kategori_persen["Netral"]}%)</div>', unsafe_allow_html=True)
-    col3.markdown(f'<div class="metric-card"><span class="negative">❌ Negatif:</span><br>{kategori_counts["Negatif"]} ({kategori_persen["Negatif"]}%)</div>', unsafe_allow_html=True)
+    gaya_kategori = {'Positif': ('positive', '✅'), 'Netral': ('neutral', '⚠️'), 'Negatif': ('negative', '❌')}
+    for kolom_kartu, cat in zip(st.columns(len(kategori_label)), kategori_label):
+        css, ikon = gaya_kategori.get(cat, ('neutral', '🏷️'))
+        kolom_kartu.markdown(f'<div class="metric-card"><span class="{css}">{ikon} {cat}:</span><br>{kategori_counts[cat]} ({kategori_persen[cat]}%)</div>', unsafe_allow_html=True)
+
+diagnostik.titik("tab 4")
 
 with tab5:
     st.header("Analisis Lanjutan (Bonus)")
@@ -349,8 +901,8 @@ with tab5:
     with col1:
         # Radar Chart
         fig_radar = go.Figure(data=go.Scatterpolar(
-            r=rata_rata_per_q.values.tolist() + [rata_rata_per_q.values[0]],
-            theta=rata_rata_per_q.index.tolist() + [rata_rata_per_q.index[0]],
+            r=rata_rata_tampil.values.tolist() + rata_rata_tampil.values[:1].tolist(),
+            theta=rata_rata_tampil.index.tolist() + rata_rata_tampil.index[:1].tolist(),
             fill='toself',
             marker=dict(size=8),
             line=dict(color='#27ae60', width=3)
@@ -360,7 +912,7 @@ with tab5:
             polar=dict(
                 radialaxis=dict(
                     visible=True,
-                    range=[0, 6],
+                    range=[0, skor_maks],
                     tickmode='linear',
                     tick0=0,
                     dtick=1
@@ -369,37 +921,48 @@ with tab5:
             template='plotly_white',
             height=450
         )
-        st.plotly_chart(fig_radar, use_container_width=True)
+        tampilkan_grafik(fig_radar, "radar")
     
     with col2:
         # Box Plot
         fig_box = go.Figure()
-        for col in df_skor.columns:
+        if df_skor is None:
+            # Quartiles straight from the count matrix (no per-respondent rows)
             fig_box.add_trace(go.Box(
-                y=df_skor[col],
-                name=col,
-                boxpoints='all',
-                jitter=0.3,
-                pointpos=-1.8,
-                marker=dict(size=4),
+                x=kolom_tampil,
+                q1=ringkasan['ordinal']['q1'][indeks_tampil],
+                median=ringkasan['ordinal']['median'][indeks_tampil],
+                q3=ringkasan['ordinal']['q3'][indeks_tampil],
+                lowerfence=kuantil_dari_frekuensi(frekuensi_tampil, skema['skor'], 0.0),
+                upperfence=kuantil_dari_frekuensi(frekuensi_tampil, skema['skor'], 1.0),
+                mean=ringkasan['rata_rata_per_q'][indeks_tampil],
+                name='Skor',
                 line=dict(width=2)
             ))
+        else:
+            for col in df_skor.columns:
+                fig_box.add_trace(go.Box(
+                    y=df_skor[col],
+                    name=col,
+                    boxpoints='all',
+                    jitter=0.3,
+                    pointpos=-1.8,
+                    marker=dict(size=4),
+                    line=dict(width=2)
+                ))
         fig_box.update_layout(
             title='Box Plot: Distribusi Skor per Pertanyaan',
             xaxis_title='Pertanyaan',
             yaxis_title='Skor',
             template='plotly_white',
             height=450,
-            yaxis_range=[0, 7]
+            yaxis_range=[0, skor_maks + 1]
         )
-        st.plotly_chart(fig_box, use_container_width=True)
+        tampilkan_grafik(fig_box, "box")
     
     # Heatmap
     st.subheader("Heatmap: Pola Jawaban")
-    heatmap_data = pd.DataFrame()
-    for col in df_pertanyaan.columns:
-        counts = df_pertanyaan[col].value_counts().reindex(['SS', 'S', 'CS', 'CTS', 'TS', 'STS'], fill_value=0)
-        heatmap_data[col] = counts
+    heatmap_data = distribution_tampil
     
     fig_heatmap = go.Figure(data=go.Heatmap(
         z=heatmap_data.values,
@@ -417,44 +980,231 @@ with tab5:
         template='plotly_white',
         height=500
     )
-    st.plotly_chart(fig_heatmap, use_container_width=True)
+    tampilkan_grafik(fig_heatmap, "heatmap")
+    
+    # Graded response model: ordinal alternative to the raw mean scores
+    st.markdown("---")
+    st.subheader("📐 Item Response Theory (Graded Response Model)")
+    if len(urutan_skala) < 3:
+        st.info("GRM membutuhkan minimal 3 level skala.")
+    elif st.checkbox("Estimasi GRM", help="EM pada pola jawaban unik; hasil disimpan di cache per sumber data"):
+        from irt import peluang_kategori
+        statistik_grm, model_grm, theta_pola, bobot_pola = model_irt(
+            (kunci_sumber, kolom_bobot), tuple(urutan_skala), skema['skor'], list(pertanyaan_cols),
+            baca_blok_sumber, bobot_sumber
+        )
+        
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Responden", f"{statistik_grm['n_responden']:,.{desimal}f}")
+        col2.metric("Pola Unik", f"{statistik_grm['n_pola']:,}")
+        col3.metric("Iterasi EM", statistik_grm['iterasi'], delta=None if statistik_grm['konvergen'] else "belum konvergen",
+                    delta_color="inverse")
+        col4.metric("Log-likelihood", f"{statistik_grm['log_likelihood']:.1f}")
+        
+        df_grm = pd.DataFrame(
+            [[b['diskriminasi']] + list(b['ambang'].values()) for b in statistik_grm['butir']],
+            index=[b['kolom'] for b in statistik_grm['butir']],
+            columns=["a"] + [f"b {k}" for k in statistik_grm['butir'][0]['ambang']]
+        )
+        st.dataframe(df_grm, column_config={c: st.column_config.NumberColumn(format="%.3f") for c in df_grm.columns})
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            butir_grm = st.selectbox("Kurva kategori butir", list(pertanyaan_cols))
+            j = list(pertanyaan_cols).index(butir_grm)
+            theta_kurva = np.linspace(-4, 4, 161)
+            peluang = peluang_kategori(model_grm['a'][j:j + 1], model_grm['d'][j:j + 1], theta_kurva)[0][0]
+            warna_ordinal = [warna_skala[urutan_skala.index(k)] for k in statistik_grm['kategori']]
+            fig_kurva = go.Figure([
+                go.Scatter(x=theta_kurva, y=peluang[k], name=label, mode='lines', line=dict(color=warna_ordinal[k]))
+                for k, label in enumerate(statistik_grm['kategori'])
+            ])
+            fig_kurva.update_layout(
+                title=f'Kurva Respons Kategori: {butir_grm}', xaxis_title='θ', yaxis_title='Peluang',
+                template='plotly_white', height=400
+            )
+            tampilkan_grafik(fig_kurva, "grm_kurva")
+        with col2:
+            # Histogram of EAP scores weighted by pattern counts (no per-respondent array)
+            jumlah_theta, tepi_theta = np.histogram(theta_pola, bins=40, range=(-4, 4), weights=bobot_pola)
+            fig_theta = go.Figure(go.Bar(
+                x=(tepi_theta[:-1] + tepi_theta[1:]) / 2, y=jumlah_theta, marker_color='#1f77b4'
+            ))
+            fig_theta.update_layout(
+                title='Distribusi Skor Laten (EAP θ)', xaxis_title='θ', yaxis_title='Jumlah Responden',
+                template='plotly_white', height=400, bargap=0.05
+            )
+            tampilkan_grafik(fig_theta, "grm_theta")
+        if mode_store and exclude_flagged:
+            st.caption("Respon tertandai tetap diikutkan dalam estimasi GRM untuk file kode/SQLite.")
+
+diagnostik.titik("tab 5")
 
 with tab6:
     st.header("Informasi Dashboard")
     
-    st.markdown("""
+    baris_skala = "\n".join(
+        f"    | {label} ({nama}) | {skor:g} | {skema['kategori'][k].capitalize()} |"
+        for label, nama, skor, k in zip(urutan_skala, skema['nama'], skema['skor'], skema['kategori_per_kode'][1:])
+    )
+    keterangan_kategori = {
+        'Positif': 'Respon yang mendukung/menguntungkan',
+        'Netral': 'Respon yang cenderung netral',
+        'Negatif': 'Respon yang tidak mendukung/kurang menguntungkan',
+    }
+    baris_interpretasi = []
+    for k, cat in enumerate(kategori_label):
+        skor_cat = skema['skor'][skema['kategori_per_kode'][1:] == k]
+        if len(skor_cat) == 0:
+            continue
+        rentang = f"{skor_cat.min():g}" if skor_cat.min() == skor_cat.max() else f"{skor_cat.min():g}-{skor_cat.max():g}"
+        baris_interpretasi.append(f"    - **{cat} (Skor {rentang})**: {keterangan_kategori.get(cat, 'Respon kategori ' + cat.lower())}")
+    baris_interpretasi = "\n".join(baris_interpretasi)
+    st.markdown(f"""
     ### 📊 Skala Penilaian
     
     | Skala | Nilai | Kategori |
     |-------|-------|----------|
-    | SS (Sangat Setuju) | 6 | Positif |
-    | S (Setuju) | 5 | Positif |
-    | CS (Cukup Setuju) | 4 | Netral |
-    | CTS (Cukup Tidak Setuju) | 3 | Negatif |
-    | TS (Tidak Setuju) | 2 | Negatif |
-    | STS (Sangat Tidak Setuju) | 1 | Negatif |
+{baris_skala}
     
     ### 🔍 Interpretasi Kategori
     
-    - **Positif (Skor 5-6)**: Respon yang mendukung/menguntungkan
-    - **Netral (Skor 4)**: Respon yang cenderung netral
-    - **Negatif (Skor 1-3)**: Respon yang tidak mendukung/kurang menguntungkan
+{baris_interpretasi}
     
     ### 📈 Ringkasan Data
     
     Berdasarkan data yang dimuat:
     """)
     
-    st.metric("Total Responden", len(df_pertanyaan))
+    st.metric("Total Responden", f"{ringkasan['n_responden']:,.1f}" if desimal else int(ringkasan['n_responden']))
     st.metric("Total Pertanyaan", len(pertanyaan_cols))
     st.metric("Rata-rata Keseluruhan", f"{rata_rata_keseluruhan:.2f}")
-    st.metric("Persentase Positif", f"{kategori_persen['Positif']}%")
-    st.metric("Persentase Netral", f"{kategori_persen['Netral']}%")
-    st.metric("Persentase Negatif", f"{kategori_persen['Negatif']}%")
+    for cat in kategori_label:
+        st.metric(f"Persentase {cat}", f"{kategori_persen[cat]}%")
+    
+    st.markdown("---")
+    st.subheader("🧮 Skor Responden")
+    from skor_responden import (
+        daftar_ukuran, hitung_skor_responden, jumlah_di_atas, peringkat_persentil, skor_pada_persentil, histogram_indeks
+    )
+    semua_indeks = indeks_skor((kunci_sumber, kolom_bobot), skema['sidik_jari'], skema, baca_blok_sumber, bobot_sumber)
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        ukuran_skor = st.selectbox(
+            "Ukuran skor", daftar_ukuran(skema),
+            format_func=lambda u: {'total': "Skor total", 'rata_rata': "Rata-rata skor"}.get(u, f"% jawaban {u[7:]}")
+        )
+    indeks = semua_indeks[ukuran_skor]
+    with col2:
+        nomor_cari = st.number_input("Nomor responden", min_value=1, value=1, step=1)
+    with col3:
+        ambang_skor = st.number_input("Ambang skor", value=float(skor_pada_persentil(indeks, 50) if indeks['total'] else 0.0))
+    
+    # Lookup: one respondent row is decoded, its rank comes from the index
+    if mode_db:
+        # Respondent number is the import id, as the original row index is in Excel mode
+        kode_cari = ambil_responden_db(store_path, nomor_cari, kondisi_db)
+    elif mode_store:
+        kode_cari = ambil_baris(baca_blok_sumber(), [nomor_cari - 1]) if nomor_cari <= total_responden else np.zeros((0, len(pertanyaan_cols)))
+    else:
+        posisi_cari = np.flatnonzero(df_pertanyaan.index.to_numpy() == nomor_cari - 1)
+        kode_cari = kode_jawaban[posisi_cari]
+    skor_cari = hitung_skor_responden(kode_cari, skema)[ukuran_skor] if len(kode_cari) else np.array([np.nan])
+    col1, col2, col3, col4 = st.columns(4)
+    if np.isnan(skor_cari[0]):
+        col1.metric(f"Skor Responden {nomor_cari}", "-")
+        st.caption("Responden tidak ditemukan, dikecualikan, atau tidak memiliki jawaban.")
+    else:
+        peringkat_cari, persentil_cari = peringkat_persentil(indeks, skor_cari[0])
+        col1.metric(f"Skor Responden {nomor_cari}", f"{skor_cari[0]:.2f}")
+        col2.metric("Peringkat", f"{peringkat_cari:,.{desimal}f} / {indeks['total']:,.{desimal}f}")
+        col3.metric("Persentil", f"{persentil_cari:.1f}")
+    di_atas = jumlah_di_atas(indeks, ambang_skor)
+    col4.metric(f"Skor > {ambang_skor:g}", f"{di_atas:,.{desimal}f}",
+                f"{di_atas / indeks['total'] * 100:.1f}%" if indeks['total'] else None, delta_color="off")
+    
+    jumlah_bin, tepi_bin = histogram_indeks(indeks)
+    fig_skor = go.Figure(go.Bar(
+        x=(tepi_bin[:-1] + tepi_bin[1:]) / 2, y=jumlah_bin, width=np.diff(tepi_bin) * 0.9, marker_color='#1f77b4'
+    ))
+    if not np.isnan(skor_cari[0]):
+        fig_skor.add_vline(x=skor_cari[0], line_dash="dash", line_color="red", annotation_text=f"Responden {nomor_cari}")
+    fig_skor.update_layout(
+        title='Distribusi Skor Responden', xaxis_title='Skor', yaxis_title='Jumlah Responden',
+        template='plotly_white', height=400
+    )
+    tampilkan_grafik(fig_skor, "skor_responden")
+    if mode_store and exclude_flagged:
+        st.caption("Respon tertandai tetap diikutkan dalam skor responden untuk file kode/SQLite.")
     
     st.markdown("---")
-    st.subheader("📋 Contoh Data (5 baris pertama)")
-    st.dataframe(df_pertanyaan.head())
+    st.subheader("🔎 Penjelajah Responden")
+    
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        filter_penjelajah = st.text_input(
+            "Filter", placeholder="Q3=SS; Q1=S,SS", key="filter_penjelajah",
+            help="Kondisi KOLOM=LABEL[,LABEL] dipisah titik koma, digabung dengan AND"
+        )
+    with col2:
+        kolom_urut = st.selectbox("Urutkan menurut", ["(urutan data)"] + list(pertanyaan_cols))
+    with col3:
+        urut_turun = st.checkbox("Skor tertinggi dulu", help="Tanpa kolom urut: baris terakhir dulu")
+    
+    try:
+        kondisi_penjelajah = parse_filter(
+            [f.strip() for f in filter_penjelajah.split(";") if f.strip()],
+            {'kolom': list(pertanyaan_cols), 'label': urutan_skala}
+        )
+    except ValueError as e:
+        st.error(str(e))
+        kondisi_penjelajah = []
+    
+    indeks_urut = urutan_penjelajah(
+        kunci_sumber, kondisi_penjelajah,
+        None if kolom_urut == "(urutan data)" else list(pertanyaan_cols).index(kolom_urut),
+        urut_turun, skema['skor'], baca_blok_sumber
+    )
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        baris_per_halaman = st.selectbox("Baris per halaman", [25, 50, 100, 200], index=1)
+    with col2:
+        n_halaman = max(1, -(-len(indeks_urut) // baris_per_halaman))
+        halaman = st.number_input("Halaman", min_value=1, max_value=n_halaman, value=1)
+    
+    # Only the visible window is decoded and sent to the browser
+    jendela = indeks_urut[(halaman - 1) * baris_per_halaman:halaman * baris_per_halaman]
+    if mode_db:
+        kode_halaman = ambil_baris(baca_blok_sumber(), jendela)
+        nomor_responden = jendela + 1
+    elif mode_store:
+        kode_halaman = np.asarray(kode_jawaban[np.sort(jendela)])[np.argsort(np.argsort(jendela))]
+        nomor_responden = jendela + 1
+    else:
+        kode_halaman = kode_jawaban[jendela]
+        nomor_responden = df_pertanyaan.index.to_numpy()[jendela] + 1
+    skor_halaman = skema['skor_per_kode'][kode_halaman]
+    n_terisi = (~np.isnan(skor_halaman)).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rata_rata_halaman = np.nansum(skor_halaman, axis=1) / n_terisi
+    
+    df_halaman = pd.DataFrame(label_per_kode[kode_halaman], columns=pertanyaan_cols, index=pd.Index(nomor_responden, name="Responden"))
+    df_halaman.insert(0, "Rata-rata", rata_rata_halaman)
+    st.dataframe(
+        df_halaman,
+        column_config={"Rata-rata": st.column_config.NumberColumn(format="%.2f")},
+        height=min(38 + 35 * len(df_halaman), 600)
+    )
+    awal_halaman = (halaman - 1) * baris_per_halaman
+    st.caption(
+        f"Menampilkan {awal_halaman + 1 if len(jendela) else 0}-{awal_halaman + len(jendela)} "
+        f"dari {len(indeks_urut):,} responden"
+        + (" (respon tertandai tetap ditampilkan)" if mode_store and exclude_flagged else "")
+    )
+
+diagnostik.titik("tab 6")
 
 # Footer
 st.markdown("---")
@@ -463,3 +1213,49 @@ st.markdown("""
         <p>Dashboard Kuesioner Analytics &copy; 2026 | Powered by Streamlit & Plotly</p>
     </div>
 """, unsafe_allow_html=True)
+
+# Prometheus metrics: recorded only when an exporter is configured
+if path_metrik or port_metrik:
+    METRIK_RERUN.inc()
+    METRIK_RERUN_DETIK.amati(time.perf_counter() - diagnostik.mulai)
+    titik_tab = ["persiapan tampilan"] + [f"tab {i}" for i in range(1, 7)]
+    for awal, akhir in zip(titik_tab, titik_tab[1:]):
+        detik_tab = diagnostik.selang(awal, akhir)
+        if detik_tab is not None:
+            METRIK_TAB.amati(detik_tab, tab=akhir.split()[1])
+    for nama_fungsi, catatan_cache in diagnostik.cache.items():
+        for hasil_cache in ("hit", "miss"):
+            if catatan_cache[hasil_cache]:
+                METRIK_CACHE.inc(catatan_cache[hasil_cache], function=nama_fungsi, result=hasil_cache)
+    jenis_data = "ruang_kerja" if mode_ruang_kerja else "sqlite" if mode_db else "ksr" if mode_store else "excel"
+    METRIK_RESPONDEN.set(total_responden, source=jenis_data)
+    METRIK_PERTANYAAN.set(len(pertanyaan_cols), source=jenis_data)
+    if path_metrik:
+        try:
+            tulis_textfile(path_metrik)
+        except OSError as e:
+            st.warning(f"Metrik tidak dapat ditulis ke {path_metrik}: {e}")
+
+# Opt-in diagnostics: filled last so every stage of this rerun is included
+if diagnostik_tampil or diagnostik_log:
+    catatan_kinerja = diagnostik.ringkas()
+    if diagnostik_log:
+        tulis_log(catatan_kinerja)
+    if diagnostik_tampil:
+        with panel_diagnostik.container():
+            memori = catatan_kinerja['memori']
+            st.metric("Waktu rerun", f"{catatan_kinerja['total_ms']:,.0f} ms")
+            st.metric("Memori proses (RSS)", "-" if memori['rss_mb'] is None else f"{memori['rss_mb']:,.0f} MB",
+                      help=f"Puncak: {memori['rss_puncak_mb']:,.0f} MB")
+            st.dataframe(pd.DataFrame(
+                {"ms": catatan_kinerja['tahap_ms']}
+            ).rename_axis("Tahap"), column_config={"ms": st.column_config.NumberColumn(format="%.1f")})
+            if catatan_kinerja['cache']:
+                st.dataframe(pd.DataFrame.from_dict(catatan_kinerja['cache'], orient="index").rename_axis("Cache"),
+                             column_config={"detik": st.column_config.NumberColumn("ms", format="%.1f")})
+            if catatan_kinerja['grafik']:
+                df_grafik = pd.DataFrame(catatan_kinerja['grafik']).set_index("nama")
+                df_grafik["KB"] = df_grafik.pop("byte_akhir") / 1000
+                st.dataframe(df_grafik[["bangun", "kompaksi", "serialisasi", "KB"]],
+                             column_config={k: st.column_config.NumberColumn(format="%.1f") for k in ["bangun", "kompaksi", "serialisasi", "KB"]})
+                st.caption(f"Payload grafik: {df_grafik['KB'].sum():,.1f} KB (sebelum pemadatan {df_grafik['byte_awal'].sum() / 1000:,.1f} KB)")
@@ -0,0 +1,432 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import numpy as np
+from kuesioner import UKURAN_BLOK, KEBIJAKAN_TIDAK_VALID, muat_skema, dengan_bobot, hitung_frekuensi
+from penyimpanan import encode_tabel, info_sumber
+
+# =====================================================
+# SKEMA BASIS DATA SQLITE
+# =====================================================
+# Tabel jawaban dinormalisasi (responden, pertanyaan, kode) dan hanya
+# menyimpan sel terisi (kode > 0). Tabel frekuensi adalah matriks
+# pertanyaan x kode yang dimaterialisasi dan diperbarui saat impor,
+# sehingga agregat tanpa filter cukup membaca beberapa puluh baris.
+SKEMA_SQL = """
+CREATE TABLE IF NOT EXISTS meta (
+    kunci TEXT PRIMARY KEY,
+    nilai TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pertanyaan (
+    id INTEGER PRIMARY KEY,
+    kolom TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS responden (
+    id INTEGER PRIMARY KEY,
+    sumber TEXT,
+    baris INTEGER,
+    bobot REAL
+);
+CREATE TABLE IF NOT EXISTS jawaban (
+    responden INTEGER NOT NULL,
+    pertanyaan INTEGER NOT NULL,
+    kode INTEGER NOT NULL,
+    PRIMARY KEY (responden, pertanyaan)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_jawaban_pertanyaan_kode ON jawaban (pertanyaan, kode, responden);
+CREATE TABLE IF NOT EXISTS frekuensi (
+    pertanyaan INTEGER NOT NULL,
+    kode INTEGER NOT NULL,
+    jumlah INTEGER NOT NULL,
+    PRIMARY KEY (pertanyaan, kode)
+) WITHOUT ROWID;
+"""
+
+
+def buka_db(path):
+    """
+    Buka (atau buat) basis data SQLite kuesioner
+
+    Parameters:
+    - path: Lokasi file .db
+
+    Returns:
+    - sqlite3.Connection
+    """
+    con = sqlite3.connect(path)
+    con.executescript(SKEMA_SQL)
+    # Basis data versi lama dibuat tanpa kolom bobot
+    if 'bobot' not in [k[1] for k in con.execute("PRAGMA table_info(responden)")]:
+        con.execute("ALTER TABLE responden ADD COLUMN bobot REAL")
+    return con
+
+
+def baca_meta(con):
+    """
+    Baca metadata basis data (kolom pertanyaan, label skala, skema)
+
+    Parameters:
+    - con: Koneksi SQLite
+
+    Returns:
+    - Dictionary header dengan struktur seperti header file .ksr,
+      atau None jika basis data masih kosong
+    """
+    meta = dict(con.execute("SELECT kunci, nilai FROM meta"))
+    if 'label' not in meta:
+        return None
+    return {
+        'kolom': [k for (k,) in con.execute("SELECT kolom FROM pertanyaan ORDER BY id")],
+        'label': json.loads(meta['label']),
+        'skor': json.loads(meta['skor']),
+        'nama_skema': meta.get('nama_skema', ''),
+        'kolom_bobot': meta.get('kolom_bobot') or None,
+        'sumber': json.loads(meta.get('sumber', '[]')),
+    }
+
+
+def info_db(path, skema=None):
+    """
+    Baca metadata dan jumlah responden basis data tanpa memuat jawabannya
+
+    Parameters:
+    - path: File basis data SQLite
+    - skema: Skema terkompilasi opsional untuk dicek kecocokan labelnya
+
+    Returns:
+    - Header basis data (lihat baca_meta) ditambah kunci n_responden
+    """
+    if not os.path.exists(path):
+        raise ValueError(f"Basis data {path} tidak ditemukan")
+    con = sqlite3.connect(path)
+    try:
+        header = baca_meta(con)
+        if header is None:
+            raise ValueError(f"{path} bukan basis data kuesioner atau masih kosong")
+        if skema is not None and header['label'] != skema['label']:
+            raise ValueError(f"Label skala pada {path} ({header['label']}) tidak cocok dengan skema ({skema['label']})")
+        header['n_responden'] = con.execute("SELECT COUNT(*) FROM responden").fetchone()[0]
+    except sqlite3.DatabaseError as e:
+        raise ValueError(f"{path}: {e}")
+    finally:
+        con.close()
+    return header
+
+
+def inisialisasi_db(con, kolom, skema):
+    """
+    Isi metadata basis data baru, atau cek kecocokan basis data yang sudah ada
+
+    Parameters:
+    - con: Koneksi SQLite
+    - kolom: Nama kolom pertanyaan
+    - skema: Skema terkompilasi
+
+    Returns:
+    - Header basis data (lihat baca_meta)
+    """
+    header = baca_meta(con)
+    if header is not None:
+        if header['label'] != skema['label'] or header['kolom'] != [str(k) for k in kolom]:
+            raise ValueError("Kolom/label data tidak cocok dengan isi basis data; gunakan --replace untuk menimpa")
+        if header['kolom_bobot'] != skema['kolom_bobot']:
+            raise ValueError(f"Kolom bobot tidak cocok dengan isi basis data ({header['kolom_bobot']!r}); "
+                             "gunakan --replace untuk menimpa")
+        return header
+    con.executemany("INSERT INTO meta (kunci, nilai) VALUES (?, ?)", [
+        ('label', json.dumps(skema['label'])),
+        ('skor', json.dumps(skema['skor'].tolist())),
+        ('nama_skema', skema['nama_skema']),
+        ('kolom_bobot', skema['kolom_bobot'] or ''),
+        ('sumber', '[]'),
+    ])
+    con.executemany("INSERT INTO pertanyaan (id, kolom) VALUES (?, ?)", enumerate(str(k) for k in kolom))
+    return baca_meta(con)
+
+
+def tambah_blok(con, kode, sumber=None, baris=None, bobot=None):
+    """
+    Tambahkan satu blok matriks kode: baris responden, sel terisi, dan
+    pembaruan tabel frekuensi (dihitung dengan np.bincount per blok)
+
+    Parameters:
+    - con: Koneksi SQLite (dalam transaksi yang sedang berjalan)
+    - kode: Matriks kode int8 (responden x pertanyaan)
+    - sumber: Nama file sumber blok ini
+    - baris: Nomor baris data pada file sumber untuk setiap baris kode
+      (default 0..n-1); lihat encode_tabel
+    - bobot: Bobot survei opsional per responden
+
+    Returns:
+    - Jumlah responden yang ditambahkan
+    """
+    kode = np.asarray(kode)
+    n_baris, n_pertanyaan = kode.shape
+    id_awal = con.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM responden").fetchone()[0]
+    daftar_bobot = [None] * n_baris if bobot is None else np.asarray(bobot, dtype=float).tolist()
+    daftar_baris = list(range(n_baris)) if baris is None else np.asarray(baris).tolist()
+    con.executemany("INSERT INTO responden (id, sumber, baris, bobot) VALUES (?, ?, ?, ?)", (
+        (id_awal + i, sumber, daftar_baris[i], daftar_bobot[i]) for i in range(n_baris)
+    ))
+    baris, kolom = np.nonzero(kode)
+    con.executemany("INSERT INTO jawaban (responden, pertanyaan, kode) VALUES (?, ?, ?)", zip(
+        (baris + id_awal).tolist(), kolom.tolist(), kode[baris, kolom].tolist()
+    ))
+    frekuensi = hitung_frekuensi(kode, len(baca_meta(con)['label']))
+    q, k = np.nonzero(frekuensi[:, 1:])
+    con.executemany(
+        "INSERT INTO frekuensi (pertanyaan, kode, jumlah) VALUES (?, ?, ?) "
+        "ON CONFLICT (pertanyaan, kode) DO UPDATE SET jumlah = jumlah + excluded.jumlah",
+        zip(q.tolist(), (k + 1).tolist(), frekuensi[q, k + 1].tolist())
+    )
+    return n_baris
+
+
+def bangun_ulang_frekuensi(con):
+    """
+    Hitung ulang tabel frekuensi dari tabel jawaban (mis. setelah baris
+    dihapus langsung lewat SQL)
+
+    Parameters:
+    - con: Koneksi SQLite
+    """
+    with con:
+        con.execute("DELETE FROM frekuensi")
+        con.execute(
+            "INSERT INTO frekuensi (pertanyaan, kode, jumlah) "
+            "SELECT pertanyaan, kode, COUNT(*) FROM jawaban GROUP BY pertanyaan, kode"
+        )
+
+
+def impor_tabel(sumber, path_db, skema, kebijakan='missing', ukuran_blok=UKURAN_BLOK, ganti=False):
+    """
+    Impor file Excel/CSV ke basis data SQLite (ditambahkan ke data yang ada)
+
+    Parameters:
+    - sumber: File Excel/CSV sumber
+    - path_db: File basis data SQLite tujuan
+    - skema: Skema terkompilasi
+    - kebijakan: Kebijakan sel tidak valid ('drop', 'missing', 'fail')
+    - ukuran_blok: Jumlah baris per blok
+    - ganti: Hapus basis data lama sebelum impor
+
+    Returns:
+    - Dictionary ringkasan impor: jumlah responden baru, total responden, sel tidak valid
+    """
+    if ganti and os.path.exists(path_db):
+        os.remove(path_db)
+    con = buka_db(path_db)
+    n_baru = 0
+    n_tidak_valid = 0
+    try:
+        # Satu transaksi per file: impor yang gagal tidak meninggalkan data setengah jadi
+        with con:
+            for kolom_q, kode, laporan, bobot, baris in encode_tabel(sumber, skema, kebijakan, ukuran_blok):
+                inisialisasi_db(con, kolom_q, skema)
+                n_baru += tambah_blok(con, kode, os.path.basename(sumber), baris, bobot)
+                n_tidak_valid += laporan['total_tidak_valid']
+            daftar = json.loads(con.execute("SELECT nilai FROM meta WHERE kunci = 'sumber'").fetchone()[0])
+            daftar.append(info_sumber(sumber))
+            con.execute("UPDATE meta SET nilai = ? WHERE kunci = 'sumber'", (json.dumps(daftar),))
+        total = con.execute("SELECT COUNT(*) FROM responden").fetchone()[0]
+    finally:
+        con.close()
+    return {'n_responden': n_baru, 'total_responden': total, 'total_tidak_valid': n_tidak_valid}
+
+
+# =====================================================
+# FILTER DAN AGREGASI (PUSHDOWN KE SQL)
+# =====================================================
+def klausa_filter(kondisi):
+    """
+    Susun klausa WHERE atas tabel responden dari kondisi filter. Setiap
+    kondisi memakai indeks jawaban (pertanyaan, kode, responden).
+
+    Parameters:
+    - kondisi: List tuple (indeks_pertanyaan, list_kode) dari parse_filter
+
+    Returns:
+    - Tuple (sql, parameter)
+    """
+    if not kondisi:
+        return "1", []
+    bagian, parameter = [], []
+    for pertanyaan, daftar_kode in kondisi:
+        tanda = ", ".join("?" * len(daftar_kode))
+        bagian.append(f"id IN (SELECT responden FROM jawaban WHERE pertanyaan = ? AND kode IN ({tanda}))")
+        parameter += [pertanyaan, *daftar_kode]
+    return " AND ".join(bagian), parameter
+
+
+def jumlah_responden_db(con, kondisi=None):
+    """
+    Hitung jumlah responden yang lolos filter dengan COUNT(*) terindeks
+
+    Parameters:
+    - con: Koneksi SQLite
+    - kondisi: List kondisi dari parse_filter (opsional)
+
+    Returns:
+    - Jumlah responden
+    """
+    where, parameter = klausa_filter(kondisi)
+    return con.execute(f"SELECT COUNT(*) FROM responden WHERE {where}", parameter).fetchone()[0]
+
+
+def frekuensi_db(con, kondisi=None):
+    """
+    Ambil matriks frekuensi pertanyaan x (n_level + 1) langsung dari SQL.
+    Tanpa filter dibaca dari tabel frekuensi yang dimaterialisasi; dengan
+    filter dihitung lewat GROUP BY atas responden yang lolos filter.
+
+    Parameters:
+    - con: Koneksi SQLite
+    - kondisi: List kondisi dari parse_filter (opsional)
+
+    Returns:
+    - Array int64 pertanyaan x (n_level + 1); kolom 0 = sel kosong
+    """
+    header = baca_meta(con)
+    frekuensi = np.zeros((len(header['kolom']), len(header['label']) + 1), dtype=np.int64)
+    if kondisi:
+        where, parameter = klausa_filter(kondisi)
+        baris = con.execute(
+            "SELECT pertanyaan, kode, COUNT(*) FROM jawaban "
+            f"WHERE responden IN (SELECT id FROM responden WHERE {where}) GROUP BY pertanyaan, kode",
+            parameter
+        ).fetchall()
+    else:
+        baris = con.execute("SELECT pertanyaan, kode, jumlah FROM frekuensi").fetchall()
+    n_responden = jumlah_responden_db(con, kondisi)
+    if baris:
+        q, k, n = np.array(baris, dtype=np.int64).T
+        frekuensi[q, k] = n
+    frekuensi[:, 0] = n_responden - frekuensi[:, 1:].sum(axis=1)
+    return frekuensi
+
+
+def iter_blok_db(path_db, ukuran_blok=UKURAN_BLOK, kondisi=None):
+    """
+    Bangun kembali matriks kode padat per blok responden dari tabel jawaban
+    (untuk pemeriksaan kualitas yang membutuhkan baris utuh)
+
+    Parameters:
+    - path_db: File basis data SQLite
+    - ukuran_blok: Jumlah id responden per blok
+    - kondisi: List kondisi dari parse_filter (opsional)
+
+    Returns:
+    - Generator blok int8 (responden x pertanyaan)
+    """
+    con = sqlite3.connect(path_db)
+    try:
+        header = baca_meta(con)
+        n_pertanyaan = len(header['kolom'])
+        where, parameter = klausa_filter(kondisi)
+        id_maks = con.execute("SELECT COALESCE(MAX(id), 0) FROM responden").fetchone()[0]
+        for awal in range(1, id_maks + 1, ukuran_blok):
+            rentang = [awal, awal + ukuran_blok]
+            ids = np.array([i for (i,) in con.execute(
+                f"SELECT id FROM responden WHERE id >= ? AND id < ? AND {where} ORDER BY id", rentang + parameter
+            )], dtype=np.int64)
+            if len(ids) == 0:
+                continue
+            blok = np.zeros((len(ids), n_pertanyaan), dtype=np.int8)
+            sel = con.execute(
+                "SELECT responden, pertanyaan, kode FROM jawaban WHERE responden >= ? AND responden < ?", rentang
+            ).fetchall()
+            if sel:
+                r, q, k = np.array(sel, dtype=np.int64).T
+                posisi = np.searchsorted(ids, r)
+                cocok = (posisi < len(ids)) & (ids[np.minimum(posisi, len(ids) - 1)] == r)
+                blok[posisi[cocok], q[cocok]] = k[cocok]
+            yield blok
+    finally:
+        con.close()
+
+
+def ambil_responden_db(path_db, id_responden, kondisi=None):
+    """
+    Bangun kembali baris kode satu responden berdasarkan id (nomor urut
+    impor), hanya jika responden tersebut lolos filter
+
+    Parameters:
+    - path_db: File basis data SQLite
+    - id_responden: Id responden pada tabel responden (mulai 1)
+    - kondisi: List kondisi dari parse_filter (opsional)
+
+    Returns:
+    - Array int8 (1 x pertanyaan), atau (0 x pertanyaan) jika tidak ada / tidak lolos filter
+    """
+    con = sqlite3.connect(path_db)
+    try:
+        n_pertanyaan = len(baca_meta(con)['kolom'])
+        where, parameter = klausa_filter(kondisi)
+        ada = con.execute(
+            f"SELECT 1 FROM responden WHERE id = ? AND {where}", [int(id_responden)] + parameter
+        ).fetchone()
+        if ada is None:
+            return np.zeros((0, n_pertanyaan), dtype=np.int8)
+        baris = np.zeros((1, n_pertanyaan), dtype=np.int8)
+        for pertanyaan, kode in con.execute(
+            "SELECT pertanyaan, kode FROM jawaban WHERE responden = ?", (int(id_responden),)
+        ):
+            baris[0, pertanyaan] = kode
+        return baris
+    finally:
+        con.close()
+
+
+def bobot_db(path_db, kondisi=None):
+    """
+    Ambil bobot survei responden (urutan id, setelah filter) dengan urutan
+    yang sama seperti baris dari iter_blok_db
+
+    Parameters:
+    - path_db: File basis data SQLite
+    - kondisi: List kondisi dari parse_filter (opsional)
+
+    Returns:
+    - Array float64 bobot per responden, atau None jika basis data tidak berbobot
+    """
+    con = sqlite3.connect(path_db)
+    try:
+        if baca_meta(con)['kolom_bobot'] is None:
+            return None
+        where, parameter = klausa_filter(kondisi)
+        return np.array([b for (b,) in con.execute(
+            f"SELECT COALESCE(bobot, 0) FROM responden WHERE {where} ORDER BY id", parameter
+        )], dtype=np.float64)
+    finally:
+        con.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Impor data kuesioner ke basis data SQLite ternormalisasi")
+    parser.add_argument("sumber", nargs="+", help="File Excel/CSV sumber")
+    parser.add_argument("tujuan", help="File basis data SQLite (.db)")
+    parser.add_argument("--schema", default=None, help="File skema JSON")
+    parser.add_argument("--weight", default=None, metavar="KOLOM",
+                        help="Kolom bobot survei yang disimpan per responden (menggantikan 'bobot' pada skema)")
+    parser.add_argument("--invalid-policy", choices=KEBIJAKAN_TIDAK_VALID, default="missing")
+    parser.add_argument("--block-size", type=int, default=UKURAN_BLOK, help="Jumlah baris per blok")
+    parser.add_argument("--replace", action="store_true", help="Timpa basis data yang sudah ada")
+    args = parser.parse_args()
+
+    skema = muat_skema(args.schema)
+    if args.weight:
+        skema = dengan_bobot(skema, args.weight)
+    for i, sumber in enumerate(args.sumber):
+        try:
+            hasil = impor_tabel(sumber, args.tujuan, skema, args.invalid_policy, args.block_size, args.replace and i == 0)
+        except ValueError as e:
+            print(f"{sumber}: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"{sumber}: +{hasil['n_responden']} responden ({hasil['total_tidak_valid']} sel tidak valid), "
+              f"total {hasil['total_responden']} -> {args.tujuan}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""
+Uji beban dashboard Streamlit dengan streamlit.testing.v1.AppTest
+
+N sesi analis disimulasikan sebagai thread dalam satu proses (seperti server
+Streamlit: satu proses, satu thread per sesi, cache st.cache_data bersama).
+Setiap sesi "mengunggah" dataset, lalu berulang kali mengubah satu widget di
+setiap tab. Dilaporkan persentil latensi rerun, RSS puncak, serta rasio hit
+st.cache_data dan cache ruang kerja, per ukuran dataset dan jumlah sesi.
+Setiap konfigurasi dijalankan di subproses tersendiri (cache dingin, RSS
+puncak terpisah); tidak ada akses jaringan.
+
+AppTest belum mendukung widget file_uploader, sehingga unggahan disimulasikan
+lewat daftar dataset Ruang Kerja (jalur konversi Excel -> .ksr yang sama).
+
+Contoh:
+    python benchmarks/bench_beban_app.py
+    python benchmarks/bench_beban_app.py --rows 1000 100000 --sessions 1 4 16 --rounds 5 --source ksr
+    python benchmarks/bench_beban_app.py --think 2 --output beban.jsonl
+"""
+import argparse
+import contextlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import numpy as np
+
+AKAR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, AKAR)
+from kuesioner import muat_skema  # noqa: E402
+
+LABEL_DILEWATI = {"Estimasi GRM", "Muat ulang otomatis"}
+
+
+# =====================================================
+# APPTEST DALAM BANYAK THREAD
+# =====================================================
+def pasang_apptest_bersama():
+    """
+    AppTest memasang Runtime tiruan dan opsi config global di setiap run lalu
+    melepasnya lagi, sehingga dua run yang tumpang tindih saling merusak.
+    Di sini Runtime tiruan dan opsi global.appTest dipasang sekali untuk
+    seluruh proses, agar banyak AppTest dapat berjalan bersamaan.
+    """
+    from unittest.mock import MagicMock
+    import streamlit.testing.v1.app_test as modul_app_test
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.scriptrunner import ScriptRunner
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+
+    # Semua LocalScriptRunner memakai session_id yang sama; beri id unik per runner
+    init_asli = ScriptRunner.__init__
+
+    def init_runner(self, *args, **kwargs):
+        kwargs['session_id'] = f"{kwargs.get('session_id', 'sesi')} {id(self)}"
+        init_asli(self, *args, **kwargs)
+
+    ScriptRunner.__init__ = init_runner
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = runtime
+    modul_app_test.Runtime = type("RuntimeTetap", (), {'_instance': runtime})
+    modul_app_test.patch_config_options = lambda opsi: contextlib.nullcontext()
+    config.set_option("global.appTest", True)
+
+
+def pasang_penghitung_cache():
+    """
+    Hitung panggilan dan hit fungsi st.cache_data/st.cache_resource dengan
+    membungkus CachedFunc (API internal Streamlit; None jika tidak tersedia)
+
+    Returns:
+    - Dictionary nama fungsi -> [panggilan, hit], atau None
+    """
+    try:
+        from streamlit.runtime.caching.cache_utils import CachedFunc
+        ambil_asli, hit_asli = CachedFunc._get_or_create_cached_value, CachedFunc._handle_cache_hit
+    except (ImportError, AttributeError):
+        return None
+    hitungan, kunci = {}, threading.Lock()
+
+    def catat(fungsi, indeks):
+        with kunci:
+            hitungan.setdefault(fungsi._info.func.__name__, [0, 0])[indeks] += 1
+
+    def ambil(self, *args, **kwargs):
+        catat(self, 0)
+        return ambil_asli(self, *args, **kwargs)
+
+    def hit(self, *args, **kwargs):
+        catat(self, 1)
+        return hit_asli(self, *args, **kwargs)
+
+    CachedFunc._get_or_create_cached_value, CachedFunc._handle_cache_hit = ambil, hit
+    return hitungan
+
+
+# =====================================================
+# DATASET SINTETIS
+# =====================================================
+def buat_dataset(folder, n_baris, skema, format_sumber, seed=0):
+    """
+    Tulis dataset kuesioner sintetis (jawaban condong ke skor tinggi)
+
+    Parameters:
+    - folder: Folder tujuan
+    - n_baris: Jumlah responden
+    - skema: Skema terkompilasi
+    - format_sumber: 'xlsx' (diunggah lewat konversi) atau 'ksr'
+    - seed: Seed generator acak
+
+    Returns:
+    - Path file dataset
+    """
+    rng = np.random.default_rng(seed)
+    kolom = [f"Q{i}" for i in range(1, 18)]
+    peluang = np.arange(1, len(skema['label']) + 1, dtype=float) ** 2
+    kode = rng.choice(np.arange(1, len(skema['label']) + 1), (n_baris, len(kolom)), p=peluang / peluang.sum()).astype(np.int8)
+    path = os.path.join(folder, f"beban_{n_baris}_{seed}.{format_sumber}")
+    if format_sumber == "ksr":
+        from penyimpanan import tulis_kode
+        tulis_kode(path, kode, kolom, skema)
+        return path
+    from openpyxl import Workbook
+    buku = Workbook(write_only=True)
+    lembar = buku.create_sheet(skema['sheet'])
+    lembar.append(kolom)
+    label = np.array(skema['label'], dtype=object)
+    for baris in label[kode - 1]:
+        lembar.append(list(baris))
+    buku.save(path)
+    return path
+
+
+# =====================================================
+# SIMULASI SESI
+# =====================================================
+def ubah_widget(tab, putaran, ikut_grm=False):
+    """
+    Ubah satu widget di tab (radio, number_input, checkbox, atau selectbox
+    tanpa format_func) ke nilai berikutnya secara berputar
+
+    Parameters:
+    - tab: Elemen tab AppTest
+    - putaran: Nomor putaran (menentukan nilai yang dipilih)
+    - ikut_grm: Sertakan checkbox Estimasi GRM (memuat scipy, lambat)
+
+    Returns:
+    - Label widget yang diubah, atau None jika tab tidak memiliki widget
+    """
+    dilewati = LABEL_DILEWATI - ({"Estimasi GRM"} if ikut_grm else set())
+    for widget in tab.radio:
+        if len(widget.options) > 1:
+            widget.set_value(widget.options[(putaran + 1) % len(widget.options)])
+            return widget.label
+    for widget in tab.number_input:
+        if widget.max is not None and widget.min is not None and widget.max > widget.min:
+            nilai = widget.value + (widget.step or 1)
+            widget.set_value(nilai if nilai <= widget.max else widget.min)
+            return widget.label
+    for widget in tab.checkbox:
+        if widget.label not in dilewati:
+            widget.set_value(not widget.value)
+            return widget.label
+    for widget in tab.selectbox:
+        # AppTest memformat ulang nilai pilihan, jadi hanya selectbox tanpa format_func yang aman
+        if len(widget.options) > 1 and widget.format_func(widget.options[0]) == widget.options[0]:
+            widget.select_index((putaran + 1) % len(widget.options))
+            return widget.label
+    return None
+
+
+def jalankan_sesi(indeks, path_data, args, catatan, galat, kosong, mulai_bersama):
+    """
+    Satu sesi analis: unggah dataset, lalu ubah widget di setiap tab
+    sebanyak --rounds putaran; setiap rerun dicatat latensinya
+
+    Parameters:
+    - indeks: Nomor sesi
+    - path_data: Dataset yang diunggah sesi ini
+    - args: Argumen CLI
+    - catatan: List bersama (aksi, detik) tempat latensi ditambahkan
+    - galat: List bersama pesan error
+    - kosong: List bersama aksi yang rerun-nya diulang karena pohon kosong
+    - mulai_bersama: threading.Barrier agar semua sesi mulai serentak
+
+    Returns:
+    - Statistik cache ruang kerja sesi (lihat CacheLRU.statistik) atau None
+    """
+    from streamlit.testing.v1 import AppTest
+
+    def rerun(at, aksi):
+        for _ in range(2):
+            mulai = time.perf_counter()
+            at.run()
+            detik = time.perf_counter() - mulai
+            # AppTest sesekali mengembalikan pohon kosong saat banyak run tumpang
+            # tindih dalam satu proses; run seperti itu diulang sekali dan dihitung
+            if at.main.children or at.exception:
+                break
+            kosong.append(aksi)
+        catatan.append((aksi, detik))
+        if at.exception:
+            galat.append(f"sesi {indeks} {aksi}: {at.exception[0].message}")
+        elif not at.tabs:
+            galat.append(f"sesi {indeks} {aksi}: berhenti sebelum tab dirender {[e.value for e in at.error]}")
+
+    at = AppTest.from_file(os.path.join(AKAR, args.app), default_timeout=args.timeout)
+    mulai_bersama.wait()
+    rerun(at, "buka")
+    at.text_area[0].input(path_data)
+    rerun(at, "unggah")
+    for putaran in range(args.rounds):
+        # Pohon elemen diganti setiap rerun, jadi tab diambil ulang sebelum diubah
+        for i in range(len(at.tabs)):
+            if args.think:
+                time.sleep(args.think)
+            label = ubah_widget(at.tabs[i], putaran + indeks, args.grm) if i < len(at.tabs) else None
+            rerun(at, f"tab{i + 1}:{label or 'rerun'}")
+    ruang_kerja = at.session_state['ruang_kerja'] if 'ruang_kerja' in at.session_state else None
+    return ruang_kerja.cache.statistik() if ruang_kerja is not None else None
+
+
+def jalankan_konfigurasi(n_baris, n_sesi, args):
+    """
+    Jalankan satu konfigurasi (ukuran dataset x jumlah sesi) di proses ini
+
+    Parameters:
+    - n_baris: Jumlah responden dataset
+    - n_sesi: Jumlah sesi bersamaan
+    - args: Argumen CLI
+
+    Returns:
+    - Dictionary hasil (latensi, RSS puncak, rasio hit cache, error)
+    """
+    os.chdir(AKAR)
+    pasang_apptest_bersama()
+    hitungan_cache = pasang_penghitung_cache()
+    skema = muat_skema(args.schema)
+    with tempfile.TemporaryDirectory() as folder:
+        n_file = 1 if args.shared_data else n_sesi
+        data = [buat_dataset(folder, n_baris, skema, args.source, seed) for seed in range(n_file)]
+        catatan, galat, kosong, statistik_sesi = [], [], [], [None] * n_sesi
+        mulai_bersama = threading.Barrier(n_sesi)
+
+        def target(i):
+            try:
+                statistik_sesi[i] = jalankan_sesi(i, data[i % n_file], args, catatan, galat, kosong, mulai_bersama)
+            except Exception as e:
+                lokasi = traceback.extract_tb(e.__traceback__)[-1]
+                galat.append(f"sesi {i}: {type(e).__name__}: {e} ({os.path.basename(lokasi.filename)}:{lokasi.lineno})")
+
+        mulai = time.perf_counter()
+        thread = [threading.Thread(target=target, args=(i,)) for i in range(n_sesi)]
+        for t in thread:
+            t.start()
+        for t in thread:
+            t.join()
+        detik = time.perf_counter() - mulai
+
+    latensi = np.array([d for _, d in catatan]) * 1000
+    ringkasan_latensi = {}
+    if len(latensi):
+        ringkasan_latensi = {f"p{q}": round(float(np.percentile(latensi, q)), 1) for q in (50, 90, 99)}
+        ringkasan_latensi['max'] = round(float(latensi.max()), 1)
+    per_aksi = {}
+    for aksi, d in catatan:
+        per_aksi.setdefault(aksi.split(":")[0], []).append(d * 1000)
+    statistik_sesi = [s for s in statistik_sesi if s]
+    panggilan = sum(p for p, _ in hitungan_cache.values()) if hitungan_cache else 0
+    panggilan_rk = sum(s['hit'] + s['miss'] for s in statistik_sesi)
+    return {
+        'rows': n_baris,
+        'sesi': n_sesi,
+        'n_rerun': len(catatan),
+        'n_rerun_kosong': len(kosong),
+        'detik': round(detik, 3),
+        'rerun_per_detik': round(len(catatan) / detik, 2) if detik else None,
+        'latensi_ms': ringkasan_latensi,
+        'p50_per_aksi_ms': {aksi: round(float(np.median(d)), 1) for aksi, d in per_aksi.items()},
+        'rss_puncak_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'hit_st_cache': round(sum(h for _, h in hitungan_cache.values()) / panggilan, 3) if panggilan else None,
+        'hit_st_cache_per_fungsi': {f: round(h / p, 3) for f, (p, h) in hitungan_cache.items() if p} if hitungan_cache else None,
+        'hit_ruang_kerja': round(sum(s['hit'] for s in statistik_sesi) / panggilan_rk, 3) if panggilan_rk else None,
+        'error': galat[:10],
+    }
+
+
+def format_persen(nilai):
+    return "-" if nilai is None else f"{nilai:.0%}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Uji beban dashboard Streamlit (AppTest, banyak sesi bersamaan)")
+    parser.add_argument("--app", default="app.py", help="Skrip aplikasi relatif terhadap akar repo")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 20_000], help="Ukuran dataset (jumlah responden)")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8], help="Jumlah sesi bersamaan")
+    parser.add_argument("--rounds", type=int, default=2, help="Putaran klik melewati keenam tab per sesi")
+    parser.add_argument("--think", type=float, default=0.0, help="Jeda (detik) antar klik per sesi; 0 = beban maksimum")
+    parser.add_argument("--source", choices=["xlsx", "ksr"], default="xlsx",
+                        help="Format dataset yang diunggah (xlsx melewati konversi ke cache .ksr)")
+    parser.add_argument("--shared-data", action="store_true", help="Semua sesi mengunggah file yang sama")
+    parser.add_argument("--grm", action="store_true", help="Ikut aktifkan Estimasi GRM di tab Analisis Lanjutan")
+    parser.add_argument("--schema", default=None, help="File skema JSON")
+    parser.add_argument("--timeout", type=float, default=600, help="Batas detik per rerun")
+    parser.add_argument("--output", default=None, help="Tambahkan hasil sebagai baris JSON ke file ini")
+    parser.add_argument("--satu", type=int, nargs=2, metavar=("ROWS", "SESI"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.satu:
+        print(json.dumps(jalankan_konfigurasi(*args.satu, args)))
+        return
+
+    print(f"{'rows':>9} {'sesi':>5} {'rerun':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'rerun/s':>8} {'lambat':>7} {'RSS MB':>8} {'st.cache':>9} {'ruang kerja':>12}")
+    for n_baris in args.rows:
+        p50_acuan = None
+        for n_sesi in args.sessions:
+            proses = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), *sys.argv[1:], "--satu", str(n_baris), str(n_sesi)],
+                capture_output=True, text=True, cwd=AKAR
+            )
+            if proses.returncode != 0:
+                print(f"{n_baris:>9} {n_sesi:>5} gagal (kode {proses.returncode}): {proses.stderr.strip().splitlines()[-1:]}")
+                continue
+            hasil = json.loads(proses.stdout.strip().splitlines()[-1])
+            latensi = hasil['latensi_ms']
+            p50_acuan = p50_acuan or latensi.get('p50')
+            print(f"{n_baris:>9,} {n_sesi:>5} {hasil['n_rerun']:>6} {latensi.get('p50', 0):>8.0f} {latensi.get('p90', 0):>8.0f} "
+                  f"{latensi.get('p99', 0):>8.0f} {latensi.get('max', 0):>8.0f} {hasil['rerun_per_detik']:>8.2f} "
+                  f"{latensi.get('p50', 0) / p50_acuan if p50_acuan else 0:>6.1f}x {hasil['rss_puncak_mb']:>8.0f} "
+                  f"{format_persen(hasil['hit_st_cache']):>9} {format_persen(hasil['hit_ruang_kerja']):>12}")
+            if hasil['n_rerun_kosong']:
+                print(f"          ! {hasil['n_rerun_kosong']} rerun AppTest kosong diulang")
+            for pesan in hasil['error']:
+                print(f"          ! {pesan}")
+
+            if args.output:
+                with open(args.output, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({
+                        'waktu': time.strftime("%Y-%m-%dT%H:%M:%S"),
+                        'aplikasi': args.app,
+                        'python': sys.version.split()[0],
+                        'sumber': args.source,
+                        'think': args.think,
+                        **hasil,
+                    }) + "\n")
+
+
+if __name__ == "__main__":
+    main()
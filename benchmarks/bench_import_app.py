@@ -0,0 +1,87 @@
+"""
+Laporan waktu impor (cold start) aplikasi Streamlit berbasis python -X importtime
+
+Skrip aplikasi dijalankan dalam bare mode (tanpa server Streamlit), sehingga
+yang terukur adalah biaya impor modul dan eksekusi pertama skrip, yaitu biaya
+yang dibayar setiap sesi/container baru.
+
+Contoh:
+    python benchmarks/bench_import_app.py
+    python benchmarks/bench_import_app.py app.py --top 20 --output startup.jsonl
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+AKAR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APLIKASI_BAWAAN = ["app.py", os.path.join(".ipynb_checkpoints", "app-checkpoint.py")]
+MODUL_DIPANTAU = ["streamlit", "pandas", "numpy", "plotly.express", "plotly.graph_objects",
+                  "plotly.subplots", "openpyxl", "scipy", "statsmodels"]
+
+
+def ukur_impor(skrip):
+    """
+    Jalankan skrip di bawah python -X importtime dan kumpulkan waktu impor
+
+    Parameters:
+    - skrip: Path skrip aplikasi
+
+    Returns:
+    - Dictionary: detik (waktu dinding), kode_keluar, modul (nama -> mikrodetik kumulatif),
+      atas (list (mikrodetik, nama) modul level atas)
+    """
+    mulai = time.perf_counter()
+    hasil = subprocess.run([sys.executable, "-X", "importtime", skrip], capture_output=True, text=True, cwd=AKAR)
+    detik = time.perf_counter() - mulai
+
+    modul, atas = {}, []
+    for line in hasil.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, kumulatif, nama = line[len("import time:"):].split("|")
+        kumulatif = int(kumulatif)
+        modul[nama.strip()] = kumulatif
+        # Modul tanpa indentasi diimpor langsung oleh skrip/interpreter
+        if not nama.rstrip().startswith(" " * 3):
+            atas.append((kumulatif, nama.strip()))
+    return {'detik': detik, 'kode_keluar': hasil.returncode, 'modul': modul, 'atas': sorted(atas, reverse=True)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Laporan cold start impor aplikasi Streamlit")
+    parser.add_argument("aplikasi", nargs="*", default=APLIKASI_BAWAAN, help="Skrip aplikasi yang diukur")
+    parser.add_argument("--top", type=int, default=10, help="Jumlah modul level atas terlama yang ditampilkan")
+    parser.add_argument("--output", default=None, help="Tambahkan hasil sebagai baris JSON ke file ini (pelacakan antar versi)")
+    args = parser.parse_args()
+
+    for skrip in args.aplikasi:
+        hasil = ukur_impor(skrip)
+        total_us = sum(us for us, _ in hasil['atas'])
+        status = "" if hasil['kode_keluar'] == 0 else f" (keluar dengan kode {hasil['kode_keluar']})"
+        print(f"== {skrip}{status}")
+        print(f"   waktu dinding: {hasil['detik']:.3f} s | total impor level atas: {total_us / 1000:.1f} ms")
+        for us, nama in hasil['atas'][:args.top]:
+            print(f"   {us / 1000:>9.1f} ms  {nama}")
+        dimuat = {m: hasil['modul'].get(m) for m in MODUL_DIPANTAU}
+        print("   modul dipantau: " + ", ".join(
+            f"{m}={'-' if us is None else f'{us / 1000:.1f}ms'}" for m, us in dimuat.items()
+        ))
+
+        if args.output:
+            with open(args.output, "a", encoding="utf-8") as f:
+                f.write(json.dumps({
+                    'waktu': time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    'aplikasi': skrip,
+                    'python': sys.version.split()[0],
+                    'detik': round(hasil['detik'], 4),
+                    'kode_keluar': hasil['kode_keluar'],
+                    'total_impor_ms': round(total_us / 1000, 1),
+                    'modul_dipantau_ms': {m: None if us is None else round(us / 1000, 1) for m, us in dimuat.items()},
+                }) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark agregasi paralel (shard baris di thread pool)
+
+Contoh:
+    python benchmarks/bench_paralel.py --rows 20000000 --workers 1 2 4 8 16 32
+    python benchmarks/bench_paralel.py --store data.ksr --block-size 131072
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from kuesioner import UKURAN_BLOK, iter_blok, hitung_frekuensi_berblok  # noqa: E402
+from penyimpanan import baca_header, iter_blok_kode  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark skalabilitas agregasi berblok multi-thread")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Jumlah responden sintetis")
+    parser.add_argument("--questions", type=int, default=17, help="Jumlah pertanyaan sintetis")
+    parser.add_argument("--levels", type=int, default=6, help="Jumlah level skala")
+    parser.add_argument("--store", default=None, help="Gunakan file .ksr alih-alih data sintetis")
+    parser.add_argument("--block-size", type=int, default=UKURAN_BLOK)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--repeat", type=int, default=3, help="Ambil waktu terbaik dari N kali ulang")
+    args = parser.parse_args()
+
+    if args.store:
+        header, _ = baca_header(args.store)
+        n_pertanyaan, n_level = len(header['kolom']), len(header['label'])
+        baca_blok = lambda: iter_blok_kode(args.store, args.block_size)
+        deskripsi = args.store
+    else:
+        rng = np.random.default_rng(0)
+        kode = rng.integers(0, args.levels + 1, (args.rows, args.questions), dtype=np.int8)
+        n_pertanyaan, n_level = args.questions, args.levels
+        baca_blok = lambda: iter_blok(kode, args.block_size)
+        deskripsi = f"sintetis {args.rows:,} x {args.questions}"
+
+    print(f"Data: {deskripsi} | blok {args.block_size:,} baris | core tersedia: {os.cpu_count()}")
+    print(f"{'worker':>7} {'detik':>9} {'juta sel/s':>11} {'speedup':>8} {'efisiensi':>10}")
+
+    acuan = None
+    waktu_1 = None
+    for n_worker in args.workers:
+        terbaik = float("inf")
+        for _ in range(args.repeat):
+            mulai = time.perf_counter()
+            frekuensi = hitung_frekuensi_berblok(baca_blok(), n_pertanyaan, n_level, n_worker=n_worker)
+            terbaik = min(terbaik, time.perf_counter() - mulai)
+        if acuan is None:
+            acuan = frekuensi
+        elif not np.array_equal(acuan, frekuensi):
+            raise SystemExit(f"Hasil dengan {n_worker} worker berbeda dari acuan!")
+        waktu_1 = waktu_1 or terbaik
+        n_sel = frekuensi.sum()
+        speedup = waktu_1 / terbaik
+        print(f"{n_worker:>7} {terbaik:>9.3f} {n_sel / terbaik / 1e6:>11.1f} {speedup:>8.2f} {speedup / n_worker:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark waktu startup answer.py (cache dingin vs hangat)
+
+Contoh:
+    python benchmarks/bench_startup.py --file data_kuesioner.xlsx --repeat 5
+    python benchmarks/bench_startup.py --importtime 15
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+AKAR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def jalankan(perintah, masukan="q1\n", env=None):
+    """
+    Jalankan perintah dan ukur waktu dinding
+
+    Parameters:
+    - perintah: List argumen perintah
+    - masukan: Teks stdin
+    - env: Environment proses opsional
+
+    Returns:
+    - Tuple (detik, proses_selesai)
+    """
+    mulai = time.perf_counter()
+    hasil = subprocess.run(perintah, input=masukan, capture_output=True, text=True, cwd=AKAR, env=env)
+    detik = time.perf_counter() - mulai
+    if hasil.returncode != 0:
+        raise SystemExit(f"Perintah gagal: {' '.join(perintah)}\n{hasil.stderr}")
+    return detik, hasil
+
+
+def modul_teratas(perintah, n):
+    """
+    Ambil modul dengan waktu impor kumulatif terbesar dari python -X importtime
+
+    Parameters:
+    - perintah: List argumen perintah (diawali sys.executable)
+    - n: Jumlah modul yang ditampilkan
+
+    Returns:
+    - List tuple (mikrodetik_kumulatif, nama_modul)
+    """
+    _, hasil = jalankan([perintah[0], "-X", "importtime"] + perintah[1:])
+    baris = []
+    for line in hasil.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, kumulatif, nama = line[len("import time:"):].split("|")
+        baris.append((int(kumulatif), nama.rstrip()))
+    # Hanya modul level atas (tanpa indentasi) agar tidak terhitung ganda
+    atas = [(us, nama.strip()) for us, nama in baris if not nama.startswith("  ")]
+    return sorted(atas, reverse=True)[:n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark startup CLI answer.py (cache dingin vs hangat)")
+    parser.add_argument("--file", default="data_kuesioner.xlsx", help="File Excel data kuesioner")
+    parser.add_argument("--repeat", type=int, default=5, help="Ambil waktu terbaik dari N kali ulang")
+    parser.add_argument("--importtime", type=int, default=10, help="Tampilkan N modul impor terlama (0 = tidak)")
+    args = parser.parse_args()
+
+    folder_cache = tempfile.mkdtemp(prefix="bench_startup_")
+    answer = [sys.executable, os.path.join(AKAR, "answer.py"), "--file", args.file]
+    skenario = [
+        ("python -c pass", [sys.executable, "-c", "pass"], None),
+        ("tanpa cache", answer + ["--no-cache"], None),
+        ("cache dingin", answer + ["--cache-dir", folder_cache], lambda: shutil.rmtree(folder_cache, ignore_errors=True)),
+        ("cache hangat", answer + ["--cache-dir", folder_cache], None),
+    ]
+
+    try:
+        print(f"{'skenario':<16} {'terbaik (s)':>12} {'median (s)':>11}")
+        for nama, perintah, persiapan in skenario:
+            waktu = []
+            for _ in range(args.repeat):
+                if persiapan:
+                    persiapan()
+                waktu.append(jalankan(perintah)[0])
+            waktu.sort()
+            print(f"{nama:<16} {waktu[0]:>12.3f} {waktu[len(waktu) // 2]:>11.3f}")
+
+        if args.importtime:
+            print("\nImpor terlama (cache hangat, kumulatif):")
+            for us, nama in modul_teratas(answer + ["--cache-dir", folder_cache], args.importtime):
+                print(f"{us / 1000:>9.1f} ms  {nama}")
+    finally:
+        shutil.rmtree(folder_cache, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
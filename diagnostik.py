@@ -0,0 +1,218 @@
+import functools
+import json
+import logging
+import os
+import resource
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+import streamlit as st
+
+# =====================================================
+# DIAGNOSTIK KINERJA DASHBOARD
+# =====================================================
+# Setiap rerun mencatat waktu per tahap dengan titik penanda: sebuah tahap
+# berisi waktu sejak penanda sebelumnya, sehingga jumlah semua tahap sama
+# dengan waktu rerun tanpa perlu membungkus setiap blok kode. Status rerun
+# disimpan per thread skrip (satu thread per sesi Streamlit).
+LOG_KINERJA = os.path.join(".diagnostik", "kinerja.jsonl")
+UKURAN_LOG = 1_000_000  # byte per file log sebelum dirotasi
+CADANGAN_LOG = 3        # jumlah file log lama yang disimpan
+
+_lokal = threading.local()
+
+
+class Diagnostik:
+    """
+    Catatan kinerja satu rerun: waktu per tahap, per grafik, dan hit/miss
+    fungsi st.cache_data
+    """
+
+    def __init__(self):
+        self.mulai = self.penanda = time.perf_counter()
+        self.tahap = {}
+        self.waktu_titik = {}
+        self.grafik = []
+        self.cache = {}
+
+    def titik(self, nama):
+        """
+        Tutup tahap yang berjalan: waktu sejak penanda terakhir ditambahkan
+        ke tahap bernama, lalu penanda dipindah ke sekarang
+
+        Parameters:
+        - nama: Nama tahap
+
+        Returns:
+        - Lama tahap dalam detik
+        """
+        sekarang = time.perf_counter()
+        detik = sekarang - self.penanda
+        self.tahap[nama] = self.tahap.get(nama, 0.0) + detik
+        self.waktu_titik[nama] = self.penanda = sekarang
+        return detik
+
+    def selang(self, awal, akhir):
+        """
+        Waktu antara dua titik penanda, termasuk semua tahap di antaranya
+        (mis. satu tab beserta grafiknya)
+
+        Parameters:
+        - awal: Nama titik awal
+        - akhir: Nama titik akhir
+
+        Returns:
+        - Selang dalam detik, atau None jika salah satu titik belum tercapai
+        """
+        if awal not in self.waktu_titik or akhir not in self.waktu_titik:
+            return None
+        return self.waktu_titik[akhir] - self.waktu_titik[awal]
+
+    def catat_cache(self, nama, miss, detik):
+        """
+        Catat satu panggilan fungsi tercache
+
+        Parameters:
+        - nama: Nama fungsi
+        - miss: True jika badan fungsi dijalankan (cache miss)
+        - detik: Lama panggilan
+        """
+        catatan = self.cache.setdefault(nama, {'hit': 0, 'miss': 0, 'detik': 0.0})
+        catatan['miss' if miss else 'hit'] += 1
+        catatan['detik'] += detik
+
+    def catat_grafik(self, info, bangun, kompaksi, serialisasi):
+        """
+        Catat waktu dan ukuran payload satu grafik
+
+        Parameters:
+        - info: Info dari siapkan_grafik (nama, byte_awal, byte_akhir, langkah)
+        - bangun: Detik membangun figure (sejak penanda terakhir)
+        - kompaksi: Detik siapkan_grafik
+        - serialisasi: Detik st.plotly_chart (serialisasi ke browser)
+        """
+        self.grafik.append({**info, 'bangun': bangun, 'kompaksi': kompaksi, 'serialisasi': serialisasi})
+
+    def ringkas(self):
+        """
+        Ringkasan rerun untuk panel dan log
+
+        Returns:
+        - Dictionary waktu, total_ms, tahap_ms, grafik, cache, memori
+        """
+        return {
+            'waktu': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'total_ms': round((self.penanda - self.mulai) * 1000, 1),
+            'tahap_ms': {nama: round(detik * 1000, 1) for nama, detik in self.tahap.items()},
+            'grafik': [
+                {**g, **{k: round(g[k] * 1000, 1) for k in ('bangun', 'kompaksi', 'serialisasi')}}
+                for g in self.grafik
+            ],
+            'cache': {nama: {**c, 'detik': round(c['detik'] * 1000, 1)} for nama, c in self.cache.items()},
+            'memori': memori_proses(),
+        }
+
+
+def mulai_rerun():
+    """
+    Mulai catatan diagnostik baru untuk rerun di thread ini
+
+    Returns:
+    - Objek Diagnostik
+    """
+    _lokal.diagnostik = Diagnostik()
+    return _lokal.diagnostik
+
+
+def diagnostik_aktif():
+    """
+    Catatan diagnostik rerun yang sedang berjalan di thread ini
+
+    Returns:
+    - Objek Diagnostik (dibuat jika belum ada)
+    """
+    if getattr(_lokal, 'diagnostik', None) is None:
+        mulai_rerun()
+    return _lokal.diagnostik
+
+
+def memori_proses():
+    """
+    Memori proses saat ini dan puncaknya (RSS)
+
+    Returns:
+    - Dictionary rss_mb (None jika /proc tidak tersedia) dan rss_puncak_mb
+    """
+    rss = None
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        pass
+    puncak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB di Linux
+    return {'rss_mb': None if rss is None else round(rss, 1), 'rss_puncak_mb': round(puncak, 1)}
+
+
+def tercache(**opsi):
+    """
+    Dekorator pengganti st.cache_data yang juga mencatat hit/miss dan lama
+    panggilan ke diagnostik rerun. Badan fungsi hanya dijalankan saat miss,
+    sehingga penanda miss dipasang di dalam fungsi yang di-cache.
+
+    Parameters:
+    - **opsi: Opsi st.cache_data (show_spinner, max_entries, ...)
+
+    Returns:
+    - Dekorator
+    """
+    def dekorator(fungsi):
+        @functools.wraps(fungsi)
+        def dalam(*args, **kwargs):
+            _lokal.miss = True
+            return fungsi(*args, **kwargs)
+
+        tersimpan = st.cache_data(**opsi)(dalam)
+
+        @functools.wraps(fungsi)
+        def luar(*args, **kwargs):
+            _lokal.miss = False
+            mulai = time.perf_counter()
+            hasil = tersimpan(*args, **kwargs)
+            diagnostik_aktif().catat_cache(fungsi.__name__, _lokal.miss, time.perf_counter() - mulai)
+            return hasil
+
+        luar.clear = tersimpan.clear
+        return luar
+    return dekorator
+
+
+def logger_kinerja(path=LOG_KINERJA):
+    """
+    Logger JSON-lines dengan rotasi ukuran untuk catatan kinerja
+
+    Parameters:
+    - path: File log
+
+    Returns:
+    - logging.Logger
+    """
+    logger = logging.getLogger(f"kuesioner.kinerja.{os.path.abspath(path)}")
+    if not logger.handlers:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        handler = RotatingFileHandler(path, maxBytes=UKURAN_LOG, backupCount=CADANGAN_LOG, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+def tulis_log(ringkasan, path=LOG_KINERJA):
+    """
+    Tambahkan ringkasan satu rerun ke log kinerja bergulir
+
+    Parameters:
+    - ringkasan: Hasil Diagnostik.ringkas
+    - path: File log
+    """
+    logger_kinerja(path).info(json.dumps(ringkasan, ensure_ascii=False))
@@ -0,0 +1,216 @@
+import logging
+import numpy as np
+
+# Plotly tidak diimpor di tingkat modul: modul ini dipanggil setelah
+# app.py memuat plotly, sehingga startup tetap ringan (lihat load_plotly)
+LOG = logging.getLogger("kuesioner.grafik")
+
+BATAS_PAYLOAD = 300_000  # byte JSON per grafik
+AMBANG_WEBGL = 1_000     # titik per trace sebelum beralih ke WebGL
+
+# =====================================================
+# PEMADATAN PAYLOAD GRAFIK PLOTLY
+# =====================================================
+def ukuran_payload(fig):
+    """
+    Ukur ukuran JSON grafik seperti yang dikirim ke browser
+
+    Parameters:
+    - fig: Figure Plotly
+
+    Returns:
+    - Jumlah byte JSON
+    """
+    return len(fig.to_json().encode("utf-8"))
+
+
+def sama_dengan(teks, nilai):
+    """
+    Cek apakah array teks per titik hanya mengulang nilai sumbu
+
+    Parameters:
+    - teks: Properti text trace
+    - nilai: Nilai sumbu (x, y, atau z)
+
+    Returns:
+    - True jika teks dapat diganti texttemplate
+    """
+    if teks is None or nilai is None or isinstance(teks, str):
+        return False
+    teks, nilai = np.asarray(teks), np.asarray(nilai)
+    if teks.shape != nilai.shape:
+        return False
+    if teks.dtype.kind in "iuf":
+        return bool(np.array_equal(teks, nilai, equal_nan=teks.dtype.kind == "f"))
+    return bool(np.array_equal(teks.astype(str), nilai.astype(str)))
+
+
+def buang_teks_berulang(fig):
+    """
+    Ganti label teks per titik yang sama dengan nilai sumbu (bar, heatmap)
+    dengan texttemplate, sehingga label dibentuk di browser dari data yang sudah ada
+
+    Parameters:
+    - fig: Figure Plotly (diubah di tempat)
+
+    Returns:
+    - Jumlah trace yang diringkas
+    """
+    n = 0
+    for trace in fig.data:
+        if trace.type == "bar":
+            sumbu = "x" if trace.orientation == "h" else "y"
+            if sama_dengan(trace.text, getattr(trace, sumbu)):
+                trace.text = None
+                trace.texttemplate = "%{" + sumbu + "}"
+                n += 1
+        elif trace.type == "heatmap" and sama_dengan(trace.text, trace.z):
+            trace.text = None
+            trace.texttemplate = "%{z}"
+            n += 1
+    return n
+
+
+def pangkas_template(fig):
+    """
+    Pangkas template tema (mis. plotly_white) yang ikut terserialisasi di
+    setiap grafik: hanya default untuk jenis trace yang dipakai dan subplot
+    yang ada yang dipertahankan
+
+    Parameters:
+    - fig: Figure Plotly (diubah di tempat)
+
+    Returns:
+    - True jika template dipangkas
+    """
+    template = fig.layout.template.to_plotly_json()
+    if not template:
+        return False
+    jenis = {trace.type for trace in fig.data}
+    data = {k: v for k, v in template.get('data', {}).items() if k in jenis}
+    tata_letak = dict(template.get('layout', {}))
+    subplot = {'geo': 'geo', 'scene': '3d', 'ternary': 'ternary', 'mapbox': 'mapbox', 'polar': 'polar'}
+    for kunci, penanda in subplot.items():
+        if not any(penanda in j for j in jenis):
+            tata_letak.pop(kunci, None)
+    fig.layout.template = {'data': data, 'layout': tata_letak}
+    return True
+
+
+def ke_webgl(fig, ambang=AMBANG_WEBGL):
+    """
+    Ganti trace Scatter yang besar menjadi Scattergl (render WebGL)
+
+    Parameters:
+    - fig: Figure Plotly
+    - ambang: Jumlah titik minimum agar trace dialihkan ke WebGL
+
+    Returns:
+    - Tuple (figure baru, jumlah trace yang dialihkan)
+    """
+    import plotly.graph_objects as go
+    data, n = [], 0
+    for trace in fig.data:
+        if trace.type == "scatter" and trace.y is not None and len(trace.y) >= ambang:
+            properti = trace.to_plotly_json()
+            properti.pop("type", None)
+            data.append(go.Scattergl(**properti))
+            n += 1
+        else:
+            data.append(trace)
+    if n:
+        fig = go.Figure(data=data, layout=fig.layout)
+    return fig, n
+
+
+def ringkas_box(fig):
+    """
+    Ganti Box berisi seluruh titik responden dengan kuartil yang sudah
+    dihitung (q1/median/q3/pagar/rata-rata), tanpa titik individual
+
+    Parameters:
+    - fig: Figure Plotly (diubah di tempat)
+
+    Returns:
+    - Jumlah trace yang diringkas
+    """
+    n = 0
+    for trace in fig.data:
+        if trace.type != "box" or trace.y is None or trace.q1 is not None:
+            continue
+        y = np.asarray(trace.y, dtype=float)
+        y = y[~np.isnan(y)]
+        if len(y) == 0:
+            continue
+        q1, median, q3 = np.percentile(y, [25, 50, 75])
+        trace.update(
+            y=None, x=[trace.name], q1=[q1], median=[median], q3=[q3],
+            lowerfence=[y.min()], upperfence=[y.max()], mean=[y.mean()],
+            boxpoints=False
+        )
+        n += 1
+    return n
+
+
+def turunkan_sampel(fig, rasio):
+    """
+    Ambil sebagian titik (langkah tetap) dari trace scatter/scattergl
+
+    Parameters:
+    - fig: Figure Plotly (diubah di tempat)
+    - rasio: Perkiraan fraksi titik yang dipertahankan (0-1)
+
+    Returns:
+    - Jumlah trace yang diturunkan sampelnya
+    """
+    langkah = max(2, int(np.ceil(1 / max(rasio, 1e-6))))
+    n = 0
+    for trace in fig.data:
+        if trace.type not in ("scatter", "scattergl") or trace.y is None or len(trace.y) < 2 * langkah:
+            continue
+        perubahan = {'y': np.asarray(trace.y)[::langkah]}
+        if trace.x is not None:
+            perubahan['x'] = np.asarray(trace.x)[::langkah]
+        if trace.text is not None and not isinstance(trace.text, str):
+            perubahan['text'] = np.asarray(trace.text)[::langkah]
+        trace.update(**perubahan)
+        n += 1
+    return n
+
+
+def siapkan_grafik(fig, nama, batas_payload=BATAS_PAYLOAD, ambang_webgl=AMBANG_WEBGL):
+    """
+    Padatkan grafik sebelum dikirim ke browser: pangkas template tema, buang teks berulang, beralih
+    ke WebGL untuk trace besar, lalu jika masih melebihi batas payload,
+    ringkas box plot dan turunkan sampel titik. Ukuran akhir dicatat ke log.
+
+    Parameters:
+    - fig: Figure Plotly
+    - nama: Nama grafik untuk log
+    - batas_payload: Batas ukuran JSON per grafik dalam byte (0 = tanpa batas)
+    - ambang_webgl: Jumlah titik minimum untuk beralih ke WebGL
+
+    Returns:
+    - Tuple (figure, info): info berisi nama, byte_awal, byte_akhir, langkah
+    """
+    langkah = []
+    byte_awal = ukuran_payload(fig)
+    if pangkas_template(fig):
+        langkah.append("template")
+    if buang_teks_berulang(fig):
+        langkah.append("teks")
+    fig, n_gl = ke_webgl(fig, ambang_webgl)
+    if n_gl:
+        langkah.append("webgl")
+    ukuran = ukuran_payload(fig) if langkah else byte_awal
+
+    if batas_payload and ukuran > batas_payload and ringkas_box(fig):
+        langkah.append("box")
+        ukuran = ukuran_payload(fig)
+    if batas_payload and ukuran > batas_payload and turunkan_sampel(fig, batas_payload / ukuran):
+        langkah.append("sampel")
+        ukuran = ukuran_payload(fig)
+
+    level = logging.WARNING if batas_payload and ukuran > batas_payload else logging.INFO
+    LOG.log(level, "grafik %s: %d -> %d byte (%s)", nama, byte_awal, ukuran, ", ".join(langkah) or "tanpa perubahan")
+    return fig, {'nama': nama, 'byte_awal': byte_awal, 'byte_akhir': ukuran, 'langkah': langkah}
@@ -0,0 +1,475 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import numpy as np
+from scipy.optimize import minimize
+from scipy.sparse import csr_matrix
+from scipy.special import expit, logsumexp
+from kuesioner import kunci_baris, nilai_json, format_jumlah
+from answer import tambah_argumen_data, skema_dari_argumen, daftar_sumber, buka_blok, mask_dipakai
+
+# =====================================================
+# GRADED RESPONSE MODEL (SAMEJIMA)
+# =====================================================
+# P(X_j >= k | theta) = sigmoid(a_j * theta + d_jk), k = 1..K-1, dengan
+# d_j1 > d_j2 > ... sehingga peluang kumulatif selalu terurut. Ambang pada
+# skala theta: b_jk = -d_jk / a_j. Estimasi dengan EM (marginal maximum
+# likelihood) di atas titik kuadratur, theta ~ N(0, 1).
+#
+# Likelihood hanya bergantung pada pola jawaban, sehingga EM dijalankan pada
+# pola unik berbobot (jumlah responden per pola), bukan per responden.
+# Dengan bobot survei, bobot pola adalah jumlah bobot respondennya
+# (pseudo-likelihood berbobot).
+
+# Batas parameter L-BFGS-B: menjaga ambang tetap berhingga untuk kategori
+# yang tidak pernah dipilih pada suatu butir
+BATAS_A = (-8.0, 8.0)
+BATAS_D = (-15.0, 15.0)
+BATAS_LOG_JARAK = (-6.0, 3.0)
+P_MIN = 1e-12
+
+
+def peta_kategori(skema):
+    """
+    Petakan kode jawaban ke kategori ordinal menurut urutan skor naik
+
+    Parameters:
+    - skema: Skema terkompilasi
+
+    Returns:
+    - Array int8 panjang n_level + 1: 0 = kosong, 1..K = kategori ordinal
+    """
+    peringkat = np.argsort(np.argsort(skema['skor'], kind='stable'), kind='stable')
+    return np.concatenate([[0], peringkat + 1]).astype(np.int8)
+
+
+def pola_unik(blok_blok, peta, dipakai=None, bobot_survei=None):
+    """
+    Kumpulkan pola jawaban unik beserta bobotnya secara berblok. Pola
+    dikenali lewat kunci_baris (injektif, tanpa tabrakan), sehingga memori
+    bergantung pada jumlah pola, bukan jumlah responden.
+
+    Parameters:
+    - blok_blok: Iterable blok matriks kode
+    - peta: Hasil peta_kategori
+    - dipakai: Mask boolean opsional per responden (seluruh dataset)
+    - bobot_survei: Bobot survei opsional per responden (seluruh dataset)
+
+    Returns:
+    - Tuple (pola, bobot, kunci): matriks kategori int8 (pola x pertanyaan),
+      jumlah responden (atau jumlah bobot survei) per pola, dan kunci pola
+      terurut (untuk pemetaan balik)
+    """
+    pola, bobot, kunci = [], [], []
+    awal = 0
+    for blok in blok_blok:
+        blok = np.asarray(blok)
+        n_baris = len(blok)
+        w = None if bobot_survei is None else np.asarray(bobot_survei[awal:awal + n_baris])
+        if dipakai is not None:
+            blok = blok[dipakai[awal:awal + n_baris]]
+            w = None if w is None else w[dipakai[awal:awal + n_baris]]
+        awal += n_baris
+        k = kunci_baris(blok, len(peta))
+        k_unik, indeks, invers, jumlah = np.unique(k, return_index=True, return_inverse=True, return_counts=True)
+        kunci.append(k_unik)
+        pola.append(peta[blok[indeks]])
+        bobot.append(jumlah if w is None else np.bincount(invers.ravel(), weights=w, minlength=len(k_unik)))
+    if not kunci:
+        return np.zeros((0, 0), dtype=np.int8), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint64)
+
+    # Gabungkan pola antar blok: pola yang sama di beberapa blok dijumlahkan bobotnya
+    kunci, pola, bobot = np.concatenate(kunci), np.concatenate(pola), np.concatenate(bobot)
+    k_unik, indeks, invers = np.unique(kunci, return_index=True, return_inverse=True)
+    bobot = np.bincount(invers.ravel(), weights=bobot)
+    return pola[indeks], bobot if bobot_survei is not None else bobot.astype(np.int64), k_unik
+
+
+def titik_kuadratur(n_titik=41, batas=6.0):
+    """
+    Titik kuadratur theta dan bobot prior normal baku
+
+    Parameters:
+    - n_titik: Jumlah titik kuadratur
+    - batas: Rentang theta [-batas, batas]
+
+    Returns:
+    - Tuple (theta, log_bobot)
+    """
+    theta = np.linspace(-batas, batas, n_titik)
+    log_bobot = -0.5 * theta ** 2
+    return theta, log_bobot - logsumexp(log_bobot)
+
+
+def ke_parameter(x, n_butir, n_kategori):
+    """
+    Uraikan vektor optimasi menjadi diskriminasi dan intersep terurut
+
+    Parameters:
+    - x: Vektor [a (J), d1 (J), log jarak (J x (K-2))]
+    - n_butir: Jumlah butir J
+    - n_kategori: Jumlah kategori K
+
+    Returns:
+    - Tuple (a, d, jarak): a (J,), d (J, K-1) menurun, jarak exp(log jarak)
+    """
+    a = x[:n_butir]
+    d1 = x[n_butir:2 * n_butir]
+    jarak = np.exp(x[2 * n_butir:].reshape(n_butir, n_kategori - 2))
+    d = np.concatenate([d1[:, None], d1[:, None] - np.cumsum(jarak, axis=1)], axis=1)
+    return a, d, jarak
+
+
+def peluang_kategori(a, d, theta):
+    """
+    Peluang setiap kategori per butir di setiap titik theta
+
+    Parameters:
+    - a: Diskriminasi (J,)
+    - d: Intersep (J, K-1), menurun
+    - theta: Titik theta (Q,)
+
+    Returns:
+    - Tuple (P, P_kumulatif): P (J, K, Q) dan P(X >= k) (J, K-1, Q)
+    """
+    kumulatif = expit(a[:, None, None] * theta[None, None, :] + d[:, :, None])
+    satu = np.ones((len(a), 1, len(theta)))
+    lengkap = np.concatenate([satu, kumulatif, np.zeros_like(satu)], axis=1)
+    return np.maximum(lengkap[:, :-1] - lengkap[:, 1:], P_MIN), kumulatif
+
+
+def fungsi_tujuan(x, r, theta, n_butir, n_kategori):
+    """
+    Negatif log-likelihood lengkap yang diharapkan (M-step) beserta gradien
+    analitik, untuk semua butir sekaligus (butir saling terpisah)
+
+    Parameters:
+    - x: Vektor parameter (lihat ke_parameter)
+    - r: Jumlah harapan responden per butir x kategori x titik (J, K, Q)
+    - theta: Titik kuadratur
+    - n_butir: Jumlah butir
+    - n_kategori: Jumlah kategori
+
+    Returns:
+    - Tuple (nilai, gradien)
+    """
+    a, d, jarak = ke_parameter(x, n_butir, n_kategori)
+    p, kumulatif = peluang_kategori(a, d, theta)
+    nilai = -(r * np.log(p)).sum()
+
+    # dP_k/dd_m = W_m ([k = m] - [k = m - 1]) dan dP_k/da = theta * sum_m dP_k/dd_m,
+    # dengan W = P(X >= m) * (1 - P(X >= m))
+    rasio = r / p
+    suku = kumulatif * (1 - kumulatif) * (rasio[:, 1:] - rasio[:, :-1])
+    grad_d = -suku.sum(axis=2)
+    grad_a = -(suku * theta).sum(axis=(1, 2))
+    # Rantai ke d1 dan log jarak: d_m = d1 - sum_{i<=m} jarak_i
+    ekor = np.cumsum(grad_d[:, ::-1], axis=1)[:, ::-1]
+    grad_log_jarak = -jarak * ekor[:, 1:]
+    return nilai, np.concatenate([grad_a, ekor[:, 0], grad_log_jarak.ravel()])
+
+
+def matriks_indikator(pola, n_kategori):
+    """
+    Matriks indikator sparse pola x (butir, kategori); sel kosong tidak
+    memiliki entri, sehingga otomatis diabaikan dalam likelihood
+
+    Parameters:
+    - pola: Matriks kategori (pola x J), 0 = kosong
+    - n_kategori: Jumlah kategori K
+
+    Returns:
+    - scipy.sparse.csr_matrix (pola x J*K)
+    """
+    baris, butir = np.nonzero(pola)
+    kolom = butir * n_kategori + pola[baris, butir].astype(np.int64) - 1
+    return csr_matrix((np.ones(len(baris)), (baris, kolom)), shape=(len(pola), pola.shape[1] * n_kategori))
+
+
+def posterior_pola(indikator, bobot, log_p, log_prior):
+    """
+    E-step: posterior theta per pola dan jumlah harapan per kategori. Kedua
+    arah cukup satu perkalian matriks sparse (tanpa loop per butir).
+
+    Parameters:
+    - indikator: Hasil matriks_indikator
+    - bobot: Jumlah responden per pola
+    - log_p: Log peluang kategori (J, K, Q)
+    - log_prior: Log bobot kuadratur
+
+    Returns:
+    - Tuple (posterior (pola x Q), r (J, K, Q), log-likelihood marginal)
+    """
+    n_butir, n_kategori, n_titik = log_p.shape
+    ll = indikator @ log_p.reshape(n_butir * n_kategori, n_titik) + log_prior
+    maks = ll.max(axis=1, keepdims=True)
+    posterior = np.exp(ll - maks)
+    total = posterior.sum(axis=1, keepdims=True)
+    posterior /= total
+    r = (indikator.T @ (posterior * bobot[:, None])).reshape(n_butir, n_kategori, n_titik)
+    return posterior, r, float(bobot @ (np.log(total[:, 0]) + maks[:, 0]))
+
+
+def parameter_awal(pola, bobot, n_kategori):
+    """
+    Nilai awal: a = 1 dan intersep dari logit proporsi kumulatif per butir
+
+    Parameters:
+    - pola: Matriks kategori (pola x J)
+    - bobot: Jumlah responden per pola
+    - n_kategori: Jumlah kategori K
+
+    Returns:
+    - Vektor parameter (lihat ke_parameter)
+    """
+    n_butir = pola.shape[1]
+    frekuensi = np.stack([bobot @ (pola == k + 1) for k in range(n_kategori)], axis=1) + 0.5
+    kumulatif = np.cumsum(frekuensi[:, ::-1], axis=1)[:, ::-1] / frekuensi.sum(axis=1, keepdims=True)
+    d = np.log(kumulatif[:, 1:] / (1 - kumulatif[:, 1:] + 1e-9))
+    jarak = np.maximum(-np.diff(d, axis=1), 0.1)
+    return np.concatenate([np.ones(n_butir), np.clip(d[:, 0], *BATAS_D), np.log(jarak).ravel()])
+
+
+def fit_grm(pola, bobot, n_kategori, n_kuadratur=41, maks_iterasi=500, toleransi=1e-4):
+    """
+    Estimasi graded response model dengan EM pada pola unik berbobot
+
+    Parameters:
+    - pola: Matriks kategori (pola x J) dari pola_unik
+    - bobot: Jumlah responden per pola
+    - n_kategori: Jumlah kategori K (minimal 3)
+    - n_kuadratur: Jumlah titik kuadratur
+    - maks_iterasi: Batas iterasi EM
+    - toleransi: Berhenti jika perubahan parameter maksimum di bawah nilai ini
+
+    Returns:
+    - Dictionary model: a, d, b (ambang theta), log_likelihood, aic, bic,
+      iterasi, konvergen, theta (titik), log_prior, n_responden, n_pola
+    """
+    if n_kategori < 3:
+        raise ValueError("GRM membutuhkan minimal 3 kategori skala")
+    n_butir = pola.shape[1]
+    if len(pola) == 0 or bobot.sum() == 0:
+        raise ValueError("Tidak ada responden untuk estimasi IRT")
+    theta, log_prior = titik_kuadratur(n_kuadratur)
+    indikator = matriks_indikator(pola, n_kategori)
+    x = parameter_awal(pola, bobot, n_kategori)
+    batas = [BATAS_A] * n_butir + [BATAS_D] * n_butir + [BATAS_LOG_JARAK] * (n_butir * (n_kategori - 2))
+
+    konvergen, log_likelihood = False, -np.inf
+    for iterasi in range(1, maks_iterasi + 1):
+        a, d, _ = ke_parameter(x, n_butir, n_kategori)
+        _, r, log_likelihood = posterior_pola(indikator, bobot, np.log(peluang_kategori(a, d, theta)[0]), log_prior)
+        hasil = minimize(
+            fungsi_tujuan, x, args=(r, theta, n_butir, n_kategori), jac=True,
+            method='L-BFGS-B', bounds=batas, options={'maxiter': 50}
+        )
+        perubahan = np.abs(hasil.x - x).max()
+        x = hasil.x
+        if perubahan < toleransi:
+            konvergen = True
+            break
+
+    a, d, _ = ke_parameter(x, n_butir, n_kategori)
+    _, _, log_likelihood = posterior_pola(indikator, bobot, np.log(peluang_kategori(a, d, theta)[0]), log_prior)
+    n_parameter = len(x)
+    n_responden = int(bobot.sum()) if bobot.dtype.kind in "iu" else float(bobot.sum())
+    with np.errstate(divide='ignore', invalid='ignore'):
+        b = -d / a[:, None]
+    return {
+        'a': a, 'd': d, 'b': b,
+        'log_likelihood': log_likelihood,
+        'aic': -2 * log_likelihood + 2 * n_parameter,
+        'bic': -2 * log_likelihood + np.log(n_responden) * n_parameter,
+        'iterasi': iterasi, 'konvergen': konvergen,
+        'theta': theta, 'log_prior': log_prior,
+        'n_responden': n_responden, 'n_pola': len(pola),
+    }
+
+
+def skor_theta(pola, model):
+    """
+    Skor laten EAP dan galat baku posterior untuk setiap pola
+
+    Parameters:
+    - pola: Matriks kategori (pola x J)
+    - model: Hasil fit_grm
+
+    Returns:
+    - Tuple (eap, se) per pola
+    """
+    log_p = np.log(peluang_kategori(model['a'], model['d'], model['theta'])[0])
+    posterior, _, _ = posterior_pola(matriks_indikator(pola, log_p.shape[1]), np.zeros(len(pola)), log_p, model['log_prior'])
+    theta = model['theta']
+    eap = posterior @ theta
+    return eap, np.sqrt(np.maximum(posterior @ theta ** 2 - eap ** 2, 0.0))
+
+
+def theta_responden(blok_blok, kunci, eap, se, n_kode):
+    """
+    Petakan skor pola kembali ke setiap responden secara berblok
+
+    Parameters:
+    - blok_blok: Iterable blok matriks kode (urutan responden asli)
+    - kunci: Kunci pola terurut dari pola_unik
+    - eap, se: Skor per pola dari skor_theta
+    - n_kode: Jumlah kode (jumlah level skala + 1), sama dengan pola_unik
+
+    Returns:
+    - Generator tuple (eap, se) per blok; NaN untuk responden yang tidak ikut estimasi
+    """
+    for blok in blok_blok:
+        k = kunci_baris(np.asarray(blok), n_kode)
+        posisi = np.minimum(np.searchsorted(kunci, k), max(len(kunci) - 1, 0))
+        cocok = kunci[posisi] == k if len(kunci) else np.zeros(len(k), dtype=bool)
+        yield np.where(cocok, eap[posisi], np.nan), np.where(cocok, se[posisi], np.nan)
+
+
+def estimasi_irt(baca_blok, skema, dipakai=None, n_kuadratur=41, maks_iterasi=500, toleransi=1e-4, bobot=None):
+    """
+    Estimasi GRM dari sumber berblok
+
+    Parameters:
+    - baca_blok: Fungsi penghasil generator blok matriks kode
+    - skema: Skema terkompilasi
+    - dipakai: Mask boolean opsional per responden
+    - n_kuadratur, maks_iterasi, toleransi: Lihat fit_grm
+    - bobot: Bobot survei opsional per responden
+
+    Returns:
+    - Tuple (model, pola, bobot, kunci, eap, se): model GRM dan skor per pola unik
+    """
+    pola, bobot, kunci = pola_unik(baca_blok(), peta_kategori(skema), dipakai, bobot)
+    model = fit_grm(pola, bobot, len(skema['label']), n_kuadratur, maks_iterasi, toleransi)
+    eap, se = skor_theta(pola, model)
+    return model, pola, bobot, kunci, eap, se
+
+
+def statistik_irt(model, kolom, skema):
+    """
+    Susun parameter butir GRM sebagai struktur bertipe (siap JSON)
+
+    Parameters:
+    - model: Hasil fit_grm
+    - kolom: Nama kolom pertanyaan
+    - skema: Skema terkompilasi
+
+    Returns:
+    - Dictionary berisi info estimasi dan parameter per butir
+    """
+    # Label kategori menurut urutan skor naik; ambang ke-k memisahkan kategori k-1 dan k
+    label = [skema['label'][i] for i in np.argsort(skema['skor'], kind='stable')]
+    return {
+        'model': 'graded_response',
+        'n_responden': model['n_responden'],
+        'n_pola': model['n_pola'],
+        'iterasi': model['iterasi'],
+        'konvergen': model['konvergen'],
+        'log_likelihood': nilai_json(model['log_likelihood']),
+        'aic': nilai_json(model['aic']),
+        'bic': nilai_json(model['bic']),
+        'kategori': label,
+        'butir': [
+            {
+                'kolom': k,
+                'diskriminasi': nilai_json(model['a'][j]),
+                'ambang': {f"{label[m]}|{label[m + 1]}": nilai_json(model['b'][j, m]) for m in range(len(label) - 1)},
+            }
+            for j, k in enumerate(kolom)
+        ],
+    }
+
+
+def format_irt(statistik):
+    """
+    Format parameter butir GRM sebagai tabel teks
+
+    Parameters:
+    - statistik: Hasil statistik_irt
+
+    Returns:
+    - String tabel
+    """
+    ambang = list(statistik['butir'][0]['ambang']) if statistik['butir'] else []
+    baris = [
+        f"GRM: {format_jumlah(statistik['n_responden'])} responden, {statistik['n_pola']} pola unik, "
+        f"{statistik['iterasi']} iterasi EM ({'konvergen' if statistik['konvergen'] else 'BELUM konvergen'}), "
+        f"logL={statistik['log_likelihood']:.2f}, AIC={statistik['aic']:.2f}, BIC={statistik['bic']:.2f}",
+        f"{'butir':<10}{'a':>8}" + "".join(f"{k:>10}" for k in ambang),
+    ]
+    for butir in statistik['butir']:
+        nilai = [butir['diskriminasi']] + list(butir['ambang'].values())
+        baris.append(f"{butir['kolom']:<10}" + "".join(
+            f"{'-' if v is None else f'{v:.3f}':>{8 if i == 0 else 10}}" for i, v in enumerate(nilai)
+        ))
+    return "\n".join(baris)
+
+
+def main():
+    parser = tambah_argumen_data(argparse.ArgumentParser(
+        description="Estimasi graded response model (IRT) untuk butir Likert"
+    ))
+    parser.add_argument("--quadrature", type=int, default=41, help="Jumlah titik kuadratur theta")
+    parser.add_argument("--max-iter", type=int, default=500, help="Batas iterasi EM")
+    parser.add_argument("--tol", type=float, default=1e-4, help="Toleransi perubahan parameter maksimum")
+    parser.add_argument("--format", choices=["teks", "json"], default="teks", help="Format parameter butir")
+    parser.add_argument("--theta-output", default=None,
+                        help="Tulis skor theta (EAP, SE) per responden ke file CSV (nomor urut setelah filter --where); "
+                             "untuk beberapa sumber, nama sumber ditambahkan ke nama file")
+    args = parser.parse_args()
+    skema = skema_dari_argumen(args)
+    try:
+        sumber = daftar_sumber(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    hasil = []
+    for lokasi in sumber:
+        nama_sumber = next(iter(lokasi.values()))
+        try:
+            kolom, baca_blok, bobot = buka_blok(args, skema, **lokasi)
+            dipakai = mask_dipakai(args, skema, baca_blok)
+            model, _, _, kunci, eap, se = estimasi_irt(
+                baca_blok, skema, dipakai, args.quadrature, args.max_iter, args.tol, bobot
+            )
+        except ValueError as e:
+            print(f"{nama_sumber}: {e}", file=sys.stderr)
+            sys.exit(1)
+        statistik = statistik_irt(model, kolom, skema)
+
+        if args.theta_output:
+            path = args.theta_output
+            if len(sumber) > 1:
+                dasar, ekstensi = os.path.splitext(path)
+                path = f"{dasar}.{os.path.splitext(os.path.basename(nama_sumber))[0]}{ekstensi}"
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                penulis = csv.writer(f)
+                penulis.writerow(["responden", "theta", "se"])
+                nomor = 1
+                for eap_blok, se_blok in theta_responden(baca_blok(), kunci, eap, se, len(skema['label']) + 1):
+                    if dipakai is not None:
+                        terpakai = dipakai[nomor - 1:nomor - 1 + len(eap_blok)]
+                        eap_blok, se_blok = np.where(terpakai, eap_blok, np.nan), np.where(terpakai, se_blok, np.nan)
+                    # Responden yang tidak ikut estimasi (tertandai) ditulis kosong
+                    penulis.writerows(zip(
+                        range(nomor, nomor + len(eap_blok)),
+                        np.where(np.isnan(eap_blok), "", np.char.mod("%.4f", eap_blok)),
+                        np.where(np.isnan(se_blok), "", np.char.mod("%.4f", se_blok))
+                    ))
+                    nomor += len(eap_blok)
+
+        if args.format == "teks":
+            if len(sumber) > 1:
+                print(f"== {nama_sumber}")
+            print(format_irt(statistik))
+        else:
+            hasil.append({'sumber': nama_sumber, **statistik})
+
+    if args.format == "json":
+        print(json.dumps(hasil, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1487 @@
+import hashlib
+import json
+import os
+import re
+from collections import deque
+import numpy as np
+
+SKEMA_DEFAULT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "skema_kuesioner.json")
+
+# =====================================================
+# SKEMA KUESIONER
+# =====================================================
+def muat_skema(path=None):
+    """
+    Baca file skema (JSON) lalu kompilasi menjadi array lookup
+
+    Parameters:
+    - path: Lokasi file skema (default skema_kuesioner.json di samping modul ini)
+
+    Returns:
+    - Dictionary skema terkompilasi (lihat kompilasi_skema)
+    """
+    with open(path or SKEMA_DEFAULT, encoding="utf-8") as f:
+        return kompilasi_skema(json.load(f))
+
+
+def kompilasi_skema(definisi):
+    """
+    Kompilasi definisi skema menjadi array lookup yang dipakai encoder dan
+    semua agregasi. Kode jawaban = posisi label + 1, kode 0 = kosong.
+
+    Parameters:
+    - definisi: Dictionary berisi 'skala' (label, skor, kategori), 'kategori',
+      'pertanyaan' (pola regex, nomor_min, nomor_maks), opsional 'bagian'
+      (list nama + nomor_min/nomor_maks atau daftar kolom) dan opsional 'bobot'
+      (nama kolom bobot survei per responden)
+
+    Returns:
+    - Dictionary dengan label, nama, kategori, skor_per_kode (float, NaN di
+      indeks 0), kategori_per_kode (int, -1 di indeks 0), matriks_kategori
+      (level x kategori), pola pertanyaan terkompilasi dan metadata lain
+    """
+    skala = definisi.get('skala') or []
+    if not skala:
+        raise ValueError("Skema harus memiliki minimal satu skala")
+    label = [str(s['label']).strip().upper() for s in skala]
+    if len(set(label)) != len(label):
+        raise ValueError(f"Label skala duplikat dalam skema: {label}")
+    if len(label) > np.iinfo(np.int8).max:
+        raise ValueError("Jumlah skala melebihi kapasitas kode int8")
+
+    kategori = list(definisi.get('kategori') or dict.fromkeys(s['kategori'] for s in skala))
+    for s in skala:
+        if s['kategori'] not in kategori:
+            raise ValueError(f"Kategori {s['kategori']!r} untuk skala {s['label']!r} tidak terdaftar")
+
+    skor = np.array([float(s['skor']) for s in skala])
+    kategori_level = np.array([kategori.index(s['kategori']) for s in skala])
+    matriks_kategori = np.zeros((len(label), len(kategori)), dtype=np.int64)
+    matriks_kategori[np.arange(len(label)), kategori_level] = 1
+
+    pertanyaan = definisi.get('pertanyaan') or {}
+    bagian = []
+    for b in definisi.get('bagian') or []:
+        if 'nama' not in b or not ('kolom' in b or 'nomor_min' in b or 'nomor_maks' in b):
+            raise ValueError(f"Bagian skema harus memiliki nama dan kolom atau rentang nomor: {b}")
+        bagian.append({
+            'nama': str(b['nama']),
+            'kolom': [str(c) for c in b['kolom']] if 'kolom' in b else None,
+            'nomor_min': b.get('nomor_min'),
+            'nomor_maks': b.get('nomor_maks'),
+        })
+    return {
+        'nama_skema': definisi.get('nama', ''),
+        'sidik_jari': hashlib.sha1(json.dumps(definisi, sort_keys=True).encode("utf-8")).hexdigest(),
+        'sheet': definisi.get('sheet', 'Kuesioner'),
+        'label': label,
+        'nama': [s.get('nama', s['label']) for s in skala],
+        'skor': skor,
+        'skor_per_kode': np.concatenate([[np.nan], skor]),
+        'kategori': kategori,
+        'kategori_per_kode': np.concatenate([[-1], kategori_level]),
+        'matriks_kategori': matriks_kategori,
+        'pola_pertanyaan': re.compile(pertanyaan.get('pola', r'^Q(\d+)$')),
+        'nomor_min': pertanyaan.get('nomor_min'),
+        'nomor_maks': pertanyaan.get('nomor_maks'),
+        'bagian': bagian,
+        'kolom_bobot': str(definisi['bobot']) if definisi.get('bobot') else None,
+    }
+
+
+def dengan_bobot(skema, kolom_bobot):
+    """
+    Salin skema dengan kolom bobot survei lain (mis. dari opsi --weight).
+    Sidik jari ikut berubah sehingga cache .ksr tidak tertukar.
+
+    Parameters:
+    - skema: Skema terkompilasi
+    - kolom_bobot: Nama kolom bobot, atau None untuk analisis tanpa bobot
+
+    Returns:
+    - Dictionary skema baru
+    """
+    if kolom_bobot == skema['kolom_bobot']:
+        return skema
+    sidik_jari = hashlib.sha1(f"{skema['sidik_jari']}|bobot={kolom_bobot}".encode("utf-8")).hexdigest()
+    return {**skema, 'kolom_bobot': kolom_bobot, 'sidik_jari': sidik_jari}
+
+
+def pilih_kolom_pertanyaan(kolom, skema):
+    """
+    Pilih kolom pertanyaan sesuai pola dan rentang nomor pada skema
+
+    Parameters:
+    - kolom: Daftar nama kolom data
+    - skema: Skema terkompilasi
+
+    Returns:
+    - List nama kolom pertanyaan sesuai urutan aslinya
+    """
+    hasil = []
+    for col in kolom:
+        cocok = skema['pola_pertanyaan'].match(str(col))
+        if not cocok:
+            continue
+        if cocok.groups():
+            nomor = int(cocok.group(1))
+            if skema['nomor_min'] is not None and nomor < skema['nomor_min']:
+                continue
+            if skema['nomor_maks'] is not None and nomor > skema['nomor_maks']:
+                continue
+        hasil.append(col)
+    return hasil
+
+
+def kelompokkan_pertanyaan(kolom, skema, ukuran_halaman=25):
+    """
+    Kelompokkan kolom pertanyaan untuk tampilan bertahap: menurut 'bagian'
+    pada skema jika ada, jika tidak per halaman berisi ukuran_halaman butir
+
+    Parameters:
+    - kolom: Daftar nama kolom pertanyaan (urutan data)
+    - skema: Skema terkompilasi
+    - ukuran_halaman: Jumlah butir per halaman bila skema tanpa bagian
+
+    Returns:
+    - List tuple (nama_kelompok, list_indeks_kolom)
+    """
+    kolom = [str(c) for c in kolom]
+    if not skema.get('bagian'):
+        return [
+            (f"{kolom[i]}-{kolom[min(i + ukuran_halaman, len(kolom)) - 1]}", list(range(i, min(i + ukuran_halaman, len(kolom)))))
+            for i in range(0, len(kolom), ukuran_halaman)
+        ]
+
+    kelompok, terpakai = [], set()
+    for b in skema['bagian']:
+        indeks = []
+        for i, col in enumerate(kolom):
+            if b['kolom'] is not None:
+                masuk = col in b['kolom']
+            else:
+                cocok = skema['pola_pertanyaan'].match(col)
+                nomor = int(cocok.group(1)) if cocok and cocok.groups() else None
+                masuk = nomor is not None \
+                    and (b['nomor_min'] is None or nomor >= b['nomor_min']) \
+                    and (b['nomor_maks'] is None or nomor <= b['nomor_maks'])
+            if masuk:
+                indeks.append(i)
+        if indeks:
+            kelompok.append((b['nama'], indeks))
+            terpakai.update(indeks)
+    sisa = [i for i in range(len(kolom)) if i not in terpakai]
+    if sisa:
+        kelompok.append(("Lainnya", sisa))
+    return kelompok
+
+
+# =====================================================
+# ENCODING JAWABAN
+# =====================================================
+KEBIJAKAN_TIDAK_VALID = ('drop', 'missing', 'fail')
+
+
+def encode_jawaban(nilai, urutan_skala):
+    """
+    Ubah matriks label jawaban (mis. 'SS', 'S', ...) menjadi matriks kode int8
+
+    Parameters:
+    - nilai: Array 2D (responden x pertanyaan) berisi label jawaban
+    - urutan_skala: Daftar label skala; kode = posisi label + 1
+
+    Returns:
+    - Array int8 berukuran sama, 0 untuk sel yang kosong/tidak dikenal
+    """
+    kode, _ = klasifikasi_jawaban(nilai, urutan_skala)
+    return kode
+
+
+def klasifikasi_jawaban(nilai, urutan_skala):
+    """
+    Normalisasi (strip + huruf besar) lalu klasifikasikan setiap sel jawaban.
+    Normalisasi hanya dilakukan pada nilai unik, lalu dipetakan balik ke semua sel.
+
+    Parameters:
+    - nilai: Array 2D (responden x pertanyaan) berisi label jawaban
+    - urutan_skala: Daftar label skala; kode = posisi label + 1
+
+    Returns:
+    - Tuple (kode, status): kode int8 (0 = kosong/tidak dikenal) dan dictionary
+      mask boolean 'kosong', 'tidak_dikenal', 'dinormalisasi' serta array 'teks'
+    """
+    nilai = np.asarray(nilai, dtype=object)
+    if nilai.ndim == 1:
+        nilai = nilai.reshape(-1, 1)
+    teks = nilai.astype(str)
+    unik, invers = np.unique(teks, return_inverse=True)
+    invers = invers.reshape(nilai.shape)
+    unik_normal = np.char.upper(np.char.strip(unik))
+
+    lookup = np.zeros(len(unik), dtype=np.int8)
+    for i, label in enumerate(urutan_skala, start=1):
+        lookup[unik_normal == label] = i
+    kode = lookup[invers]
+
+    # NaN != NaN, sehingga sel kosong dari Excel terdeteksi tanpa pandas
+    kosong = (nilai != nilai) | (nilai == None) | (unik_normal == '')[invers]  # noqa: E711
+    kode[kosong] = 0
+    status = {
+        'kosong': kosong,
+        'tidak_dikenal': (kode == 0) & ~kosong,
+        'dinormalisasi': (kode != 0) & (unik_normal != unik)[invers],
+        'teks': teks,
+    }
+    return kode, status
+
+
+def validasi_jawaban(nilai, urutan_skala, kolom=None, kebijakan='missing', offset_baris=0):
+    """
+    Validasi seluruh sel jawaban dalam satu pass tervektorisasi dan terapkan
+    kebijakan untuk sel yang kosong atau tidak dikenal
+
+    Parameters:
+    - nilai: Array 2D (responden x pertanyaan) berisi label jawaban
+    - urutan_skala: Daftar label skala yang valid
+    - kolom: Nama kolom pertanyaan (default Q1..Qn)
+    - kebijakan: 'drop' (buang baris), 'missing' (anggap kosong) atau 'fail' (error)
+    - offset_baris: Ditambahkan ke indeks baris pada laporan (untuk pemrosesan berblok)
+
+    Returns:
+    - Tuple (kode, baris_dipakai, laporan): matriks kode int8 setelah kebijakan
+      diterapkan, mask baris yang dipertahankan dan laporan validasi
+    """
+    if kebijakan not in KEBIJAKAN_TIDAK_VALID:
+        raise ValueError(f"Kebijakan tidak dikenal: {kebijakan!r} (pilih {', '.join(KEBIJAKAN_TIDAK_VALID)})")
+
+    kode, status = klasifikasi_jawaban(nilai, urutan_skala)
+    if kolom is None:
+        kolom = [f"Q{i}" for i in range(1, kode.shape[1] + 1)]
+
+    tidak_valid = status['kosong'] | status['tidak_dikenal']
+    baris_tidak_valid = np.flatnonzero(tidak_valid.any(axis=1))
+    label_salah, jumlah_salah = np.unique(status['teks'][status['tidak_dikenal']], return_counts=True)
+
+    laporan = {
+        'kebijakan': kebijakan,
+        'total_sel': int(kode.size),
+        'total_tidak_valid': int(tidak_valid.sum()),
+        'per_pertanyaan': {
+            'kolom': list(kolom),
+            'kosong': status['kosong'].sum(axis=0),
+            'tidak_dikenal': status['tidak_dikenal'].sum(axis=0),
+            'dinormalisasi': status['dinormalisasi'].sum(axis=0),
+        },
+        'baris_tidak_valid': baris_tidak_valid + offset_baris,
+        'nilai_tidak_dikenal': dict(zip(label_salah.tolist(), jumlah_salah.tolist())),
+    }
+
+    if kebijakan == 'fail' and laporan['total_tidak_valid'] > 0:
+        raise ValueError("Data mengandung jawaban tidak valid:\n" + format_laporan_validasi(laporan))
+
+    baris_dipakai = np.ones(kode.shape[0], dtype=bool)
+    if kebijakan == 'drop':
+        baris_dipakai[baris_tidak_valid] = False
+    return kode[baris_dipakai], baris_dipakai, laporan
+
+
+def validasi_bobot(nilai, kolom='bobot', offset_baris=0):
+    """
+    Ubah kolom bobot survei menjadi array float64. Bobot adalah data desain
+    sampel, sehingga nilai kosong, bukan angka, atau negatif selalu ditolak
+    (tidak mengikuti kebijakan sel jawaban).
+
+    Parameters:
+    - nilai: Array 1D nilai bobot per responden
+    - kolom: Nama kolom bobot (untuk pesan error)
+    - offset_baris: Ditambahkan ke indeks baris pada pesan error
+
+    Returns:
+    - Array float64 bobot per responden
+    """
+    nilai = np.asarray(nilai, dtype=object)
+    try:
+        # Seluruh kolom dikonversi sekaligus (sel kosong/None menjadi NaN)
+        bobot = nilai.astype(np.float64)
+    except (TypeError, ValueError):
+        # Ada sel bukan angka: konversi per baris hanya untuk menemukannya
+        bobot = np.full(len(nilai), np.nan)
+        for i, v in enumerate(nilai):
+            try:
+                bobot[i] = float(v)
+            except (TypeError, ValueError):
+                pass
+    salah = np.flatnonzero(~(bobot >= 0) | np.isinf(bobot))
+    if len(salah):
+        contoh = ", ".join(f"{b + offset_baris}={nilai[b]!r}" for b in salah[:5])
+        raise ValueError(f"Kolom bobot {kolom!r} berisi {len(salah)} nilai kosong/tidak valid (baris {contoh})")
+    return bobot
+
+
+def gabung_laporan_validasi(laporan_blok):
+    """
+    Gabungkan laporan validasi dari beberapa blok menjadi satu laporan
+
+    Parameters:
+    - laporan_blok: List laporan hasil validasi_jawaban (urutan blok)
+
+    Returns:
+    - Dictionary laporan gabungan dengan struktur yang sama
+    """
+    if not laporan_blok:
+        raise ValueError("Tidak ada laporan untuk digabung")
+    pertama = laporan_blok[0]
+    nilai_salah = {}
+    for laporan in laporan_blok:
+        for nilai, n in laporan['nilai_tidak_dikenal'].items():
+            nilai_salah[nilai] = nilai_salah.get(nilai, 0) + n
+    return {
+        'kebijakan': pertama['kebijakan'],
+        'total_sel': sum(l['total_sel'] for l in laporan_blok),
+        'total_tidak_valid': sum(l['total_tidak_valid'] for l in laporan_blok),
+        'per_pertanyaan': {
+            'kolom': pertama['per_pertanyaan']['kolom'],
+            **{jenis: sum(l['per_pertanyaan'][jenis] for l in laporan_blok)
+               for jenis in ['kosong', 'tidak_dikenal', 'dinormalisasi']},
+        },
+        'baris_tidak_valid': np.concatenate([l['baris_tidak_valid'] for l in laporan_blok]),
+        'nilai_tidak_dikenal': nilai_salah,
+    }
+
+
+def format_laporan_validasi(laporan, maks_baris=20):
+    """
+    Format laporan validasi menjadi teks ringkas
+
+    Parameters:
+    - laporan: Dictionary hasil validasi_jawaban
+    - maks_baris: Jumlah maksimal indeks baris yang ditampilkan
+
+    Returns:
+    - String laporan
+    """
+    baris = [f"Sel tidak valid: {laporan['total_tidak_valid']} dari {laporan['total_sel']} (kebijakan: {laporan['kebijakan']})"]
+    per_q = laporan['per_pertanyaan']
+    for i, q in enumerate(per_q['kolom']):
+        kosong, salah, normal = per_q['kosong'][i], per_q['tidak_dikenal'][i], per_q['dinormalisasi'][i]
+        if kosong or salah or normal:
+            baris.append(f"  {q}: kosong={kosong} tidak_dikenal={salah} dinormalisasi={normal}")
+    if laporan['nilai_tidak_dikenal']:
+        baris.append("  Nilai tidak dikenal: " + ", ".join(f"{v!r}x{n}" for v, n in laporan['nilai_tidak_dikenal'].items()))
+    indeks = laporan['baris_tidak_valid']
+    if len(indeks):
+        sisa = f" ... (+{len(indeks) - maks_baris})" if len(indeks) > maks_baris else ""
+        baris.append("  Baris: " + ", ".join(str(b) for b in indeks[:maks_baris]) + sisa)
+    return "\n".join(baris)
+
+
+# =====================================================
+# PEMERIKSAAN KUALITAS DATA
+# =====================================================
+def kunci_baris(kode, n_kode):
+    """
+    Hitung kunci baris yang injektif: kode tiap baris dikemas sebagai bilangan
+    berbasis n_kode ke dalam kata uint64 (sebanyak mungkin kolom per kata),
+    sehingga dua baris berkunci sama pasti identik (tanpa tabrakan hash).
+    Skala 5 poin (6 kode termasuk kosong) muat 24 pertanyaan per kata.
+
+    Parameters:
+    - kode: Matriks kode int8 (responden x pertanyaan), nilai 0..n_kode-1
+    - n_kode: Jumlah kode yang mungkin (jumlah level skala + 1)
+
+    Returns:
+    - Array 1D satu kunci per responden: uint64 jika baris muat satu kata,
+      selain itu void (8 byte per kata); keduanya dapat diurutkan,
+      dibandingkan, dan dipakai di np.searchsorted/np.unique
+    """
+    kode = np.asarray(kode)
+    n_kode = max(int(n_kode), 2)
+    per_kata = 1
+    while n_kode ** (per_kata + 1) <= 2 ** 64:
+        per_kata += 1
+    n_kata = max(-(-kode.shape[1] // per_kata), 1)
+    pangkat = np.array([n_kode ** i for i in range(per_kata)], dtype=np.uint64)
+    kunci = np.zeros((kode.shape[0], n_kata), dtype=np.uint64)
+    for k in range(n_kata):
+        potongan = kode[:, k * per_kata:(k + 1) * per_kata].astype(np.uint64)
+        # Nilai maksimum n_kode^per_kata - 1 muat di uint64, jadi tidak ada overflow
+        kunci[:, k] = (potongan * pangkat[:potongan.shape[1]]).sum(axis=1, dtype=np.uint64)
+    if n_kata == 1:
+        return kunci[:, 0]
+    return kunci.view(np.dtype((np.void, 8 * n_kata))).ravel()
+
+
+def panjang_longstring(kode):
+    """
+    Hitung run terpanjang jawaban identik berurutan pada setiap baris
+
+    Parameters:
+    - kode: Matriks kode int8 (responden x pertanyaan)
+
+    Returns:
+    - Array int, panjang run terpanjang per responden
+    """
+    kode = np.asarray(kode)
+    if kode.shape[1] == 0:
+        return np.zeros(kode.shape[0], dtype=np.int64)
+    sama = (kode[:, 1:] == kode[:, :-1]) & (kode[:, 1:] != 0)
+    # Cumsum dengan reset setiap kali rangkaian jawaban identik terputus
+    kumulatif = np.cumsum(sama, axis=1)
+    reset = np.maximum.accumulate(np.where(sama, 0, kumulatif), axis=1)
+    run = kumulatif - reset
+    return np.concatenate([np.zeros((kode.shape[0], 1), dtype=run.dtype), run], axis=1).max(axis=1) + 1
+
+
+def tandai_duplikat(kunci):
+    """
+    Tandai kemunculan kedua dan seterusnya dari baris yang sama
+
+    Parameters:
+    - kunci: Array kunci baris (lihat kunci_baris)
+
+    Returns:
+    - Array boolean, True untuk baris duplikat
+    """
+    # argsort biasa + minimum.reduceat lebih cepat daripada np.unique(return_index=True)
+    urutan = np.argsort(kunci)
+    terurut = kunci[urutan]
+    awal_grup = np.flatnonzero(np.r_[True, terurut[1:] != terurut[:-1]]) if len(kunci) else np.empty(0, dtype=np.intp)
+    duplikat = np.ones(len(kunci), dtype=bool)
+    if len(awal_grup):
+        duplikat[np.minimum.reduceat(urutan, awal_grup)] = False
+    return duplikat
+
+
+def periksa_kualitas(kode, skor_per_kode, batas_std=0.3, batas_longstring=10):
+    """
+    Tandai responden duplikat, straight-liner, varians rendah dan longstring
+    dalam satu pass tervektorisasi
+
+    Parameters:
+    - kode: Matriks kode int8 (responden x pertanyaan)
+    - skor_per_kode: Array lookup skor per kode (indeks 0 = kosong, bernilai NaN)
+    - batas_std: Standar deviasi skor di bawah nilai ini dianggap varians rendah
+    - batas_longstring: Run jawaban identik sepanjang ini atau lebih ditandai
+
+    Returns:
+    - Dictionary berisi array per responden: kunci, duplikat, straightline,
+      std_skor, varians_rendah, longstring, panjang_longstring, tertandai
+    """
+    kode = np.asarray(kode)
+    n_responden = kode.shape[0]
+
+    # Duplikat: kemunculan kedua dan seterusnya dari baris yang sama
+    kunci = kunci_baris(kode, len(skor_per_kode))
+    duplikat = tandai_duplikat(kunci)
+
+    # Straight-liner: semua pertanyaan yang terjawab memiliki kode yang sama
+    terjawab = kode != 0
+    kode_maks = kode.max(axis=1) if kode.shape[1] else np.zeros(n_responden)
+    kode_min = np.where(terjawab, kode, np.iinfo(np.int8).max).min(axis=1) if kode.shape[1] else kode_maks
+    straightline = (terjawab.sum(axis=1) > 1) & (kode_maks == kode_min)
+
+    # Varians rendah berdasarkan skor, mengabaikan sel kosong
+    skor = np.asarray(skor_per_kode, dtype=float)[kode]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        n_terjawab = terjawab.sum(axis=1)
+        rata = np.where(terjawab, skor, 0.0).sum(axis=1) / n_terjawab
+        std_skor = np.sqrt(np.where(terjawab, (skor - rata[:, None]) ** 2, 0.0).sum(axis=1) / n_terjawab)
+    varians_rendah = np.nan_to_num(std_skor, nan=0.0) < batas_std
+
+    run = panjang_longstring(kode)
+    longstring = run >= batas_longstring
+
+    return {
+        'kunci': kunci,
+        'duplikat': duplikat,
+        'straightline': straightline,
+        'std_skor': std_skor,
+        'varians_rendah': varians_rendah,
+        'longstring': longstring,
+        'panjang_longstring': run,
+        'tertandai': duplikat | straightline | varians_rendah | longstring,
+    }
+
+
+def periksa_kualitas_berblok(blok_blok, skor_per_kode, batas_std=0.3, batas_longstring=10, n_worker=1):
+    """
+    Versi berblok dari periksa_kualitas. Straight-liner, varians rendah dan
+    longstring dihitung per blok; duplikat ditentukan sekali di akhir dari
+    seluruh kunci baris (umumnya 8 byte per responden, lihat kunci_baris),
+    sehingga duplikat lintas blok ikut terdeteksi.
+
+    Parameters:
+    - blok_blok: Iterable blok matriks kode
+    - skor_per_kode: Array lookup skor per kode
+    - batas_std: Batas standar deviasi untuk varians rendah
+    - batas_longstring: Batas panjang longstring
+    - n_worker: Jumlah thread (lihat peta_berblok)
+
+    Returns:
+    - Tuple (tertandai, jumlah): mask boolean per responden dan dictionary
+      jumlah responden per jenis tanda
+    """
+    jenis_tanda = ['straightline', 'varians_rendah', 'longstring']
+    jumlah = dict.fromkeys(['duplikat'] + jenis_tanda + ['tertandai'], 0)
+    kunci, tanda = [], []
+    periksa = lambda blok: periksa_kualitas(blok, skor_per_kode, batas_std, batas_longstring)
+    for hasil in peta_berblok(periksa, blok_blok, n_worker):
+        kunci.append(hasil['kunci'])
+        tanda.append(hasil['straightline'] | hasil['varians_rendah'] | hasil['longstring'])
+        for jenis in jenis_tanda:
+            jumlah[jenis] += int(hasil[jenis].sum())
+
+    kunci = np.concatenate(kunci) if kunci else np.empty(0, dtype=np.uint64)
+    duplikat = tandai_duplikat(kunci)
+    tertandai = duplikat | (np.concatenate(tanda) if tanda else np.empty(0, dtype=bool))
+    jumlah['duplikat'] = int(duplikat.sum())
+    jumlah['tertandai'] = int(tertandai.sum())
+    return tertandai, jumlah
+
+
+# =====================================================
+# AGREGASI
+# =====================================================
+UKURAN_BLOK = 262_144
+
+def hitung_frekuensi(kode, n_level, bobot=None):
+    """
+    Hitung matriks frekuensi pertanyaan x kode dengan satu bincount. Dengan
+    bobot survei, bincount yang sama diberi bobot (dan kuadrat bobot untuk
+    ukuran sampel efektif).
+
+    Parameters:
+    - kode: Matriks kode int8 (responden x pertanyaan)
+    - n_level: Jumlah level skala pada skema
+    - bobot: Bobot survei opsional per responden
+
+    Returns:
+    - Tanpa bobot: array int64 (pertanyaan x (n_level + 1)); kolom 0 = sel kosong.
+      Dengan bobot: array float64 (2 x pertanyaan x (n_level + 1)) berisi
+      jumlah bobot dan jumlah kuadrat bobot
+    """
+    kode = np.asarray(kode)
+    n_pertanyaan = kode.shape[1]
+    lebar = n_level + 1
+    indeks = (kode.astype(np.intp) + np.arange(n_pertanyaan, dtype=np.intp) * lebar).ravel()
+    if bobot is None:
+        return np.bincount(indeks, minlength=n_pertanyaan * lebar).reshape(n_pertanyaan, lebar)
+    bobot = np.repeat(np.asarray(bobot, dtype=float), n_pertanyaan)
+    return np.stack([
+        np.bincount(indeks, weights=bobot, minlength=n_pertanyaan * lebar),
+        np.bincount(indeks, weights=bobot ** 2, minlength=n_pertanyaan * lebar),
+    ]).reshape(2, n_pertanyaan, lebar)
+
+
+def jumlah_worker(n_worker):
+    """
+    Normalisasi jumlah worker: None/0 = semua core, minimal 1
+
+    Parameters:
+    - n_worker: Jumlah worker yang diminta
+
+    Returns:
+    - Jumlah worker (int >= 1)
+    """
+    if not n_worker:
+        return os.cpu_count() or 1
+    return max(1, int(n_worker))
+
+
+def peta_berblok(fungsi, blok_blok, n_worker=1):
+    """
+    Terapkan fungsi ke setiap blok, berurutan atau paralel di thread pool.
+    Fungsi yang dipakai di sini (bincount, ufunc perbandingan/aritmetika)
+    melepas GIL, sehingga thread benar-benar berjalan paralel. Jumlah blok
+    yang diproses bersamaan dibatasi 2 x n_worker agar memori tetap terikat
+    pada ukuran blok.
+
+    Parameters:
+    - fungsi: Fungsi fungsi(blok) -> hasil
+    - blok_blok: Iterable blok matriks kode
+    - n_worker: Jumlah thread (1 = tanpa thread, 0/None = semua core)
+
+    Returns:
+    - Generator hasil sesuai urutan blok
+    """
+    n_worker = jumlah_worker(n_worker)
+    if n_worker == 1:
+        for blok in blok_blok:
+            yield fungsi(blok)
+        return
+
+    # Diimpor di sini agar jalur CLI satu-thread tidak membayar biaya impornya
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=n_worker) as pool:
+        antrian = deque()
+        for blok in blok_blok:
+            antrian.append(pool.submit(fungsi, blok))
+            if len(antrian) >= 2 * n_worker:
+                yield antrian.popleft().result()
+        while antrian:
+            yield antrian.popleft().result()
+
+
+def iter_blok(kode, ukuran_blok=UKURAN_BLOK):
+    """
+    Potong matriks kode menjadi blok-blok baris
+
+    Parameters:
+    - kode: Matriks kode int8 (responden x pertanyaan)
+    - ukuran_blok: Jumlah baris per blok
+
+    Returns:
+    - Generator blok matriks kode
+    """
+    for awal in range(0, kode.shape[0], ukuran_blok):
+        yield np.asarray(kode[awal:awal + ukuran_blok])
+
+
+def hitung_frekuensi_berblok(blok_blok, n_pertanyaan, n_level, dipakai=None, n_worker=1, bobot=None):
+    """
+    Akumulasi matriks frekuensi dari rangkaian blok baris. Memori hanya
+    bergantung pada ukuran blok, bukan jumlah responden.
+
+    Parameters:
+    - blok_blok: Iterable blok matriks kode (lihat iter_blok / penyimpanan.iter_blok_kode)
+    - n_pertanyaan: Jumlah kolom pertanyaan
+    - n_level: Jumlah level skala
+    - dipakai: Mask boolean opsional per responden (seluruh dataset), mis.
+      kebalikan hasil periksa_kualitas_berblok
+    - n_worker: Jumlah thread; setiap blok menjadi shard baris yang dihitung
+      terpisah lalu matriks parsialnya dijumlahkan
+    - bobot: Bobot survei opsional per responden (seluruh dataset)
+
+    Returns:
+    - Array int64 (pertanyaan x (n_level + 1)), atau float64
+      (2 x pertanyaan x (n_level + 1)) jika bobot diberikan (lihat hitung_frekuensi)
+    """
+    def blok_terpakai():
+        awal = 0
+        for blok in blok_blok:
+            n_baris = len(blok)
+            w = None if bobot is None else np.asarray(bobot[awal:awal + n_baris])
+            if dipakai is not None:
+                terpakai = dipakai[awal:awal + n_baris]
+                blok = np.asarray(blok)[terpakai]
+                w = None if w is None else w[terpakai]
+            yield blok, w
+            awal += n_baris
+
+    if bobot is None:
+        frekuensi = np.zeros((n_pertanyaan, n_level + 1), dtype=np.int64)
+    else:
+        frekuensi = np.zeros((2, n_pertanyaan, n_level + 1))
+    for parsial in peta_berblok(lambda item: hitung_frekuensi(item[0], n_level, item[1]), blok_terpakai(), n_worker):
+        frekuensi += parsial
+    return frekuensi
+
+
+def kuantil_dari_frekuensi(frekuensi, skor, q):
+    """
+    Hitung kuantil skor per pertanyaan langsung dari matriks frekuensi
+
+    Parameters:
+    - frekuensi: Matriks pertanyaan x level (tanpa kolom kosong)
+    - skor: Skor per level
+    - q: Kuantil (0-1)
+
+    Returns:
+    - Array kuantil skor per pertanyaan (NaN jika tidak ada jawaban)
+    """
+    urutan = np.argsort(skor, kind='stable')
+    kumulatif = np.cumsum(np.asarray(frekuensi)[:, urutan], axis=1)
+    total = kumulatif[:, -1:]
+    posisi = np.argmax(kumulatif >= np.maximum(q * total, 1e-12), axis=1)
+    return np.where(total[:, 0] > 0, np.asarray(skor, dtype=float)[urutan][posisi], np.nan)
+
+
+def peringkat_teratas(nilai, k, turun=True):
+    """
+    Indeks k pertanyaan teratas (atau terbawah) per baris dengan
+    argpartition (O(n)) lalu argsort hanya pada k kandidat. Nilai kembar
+    diurutkan menurut indeks terkecil, NaN selalu di urutan terakhir,
+    sehingga hasil deterministik.
+
+    Parameters:
+    - nilai: Array 1D (pertanyaan) atau 2D (segmen x pertanyaan)
+    - k: Jumlah peringkat yang diambil
+    - turun: True untuk nilai tertinggi dulu, False untuk terendah dulu
+
+    Returns:
+    - Array indeks pertanyaan (... x min(k, pertanyaan)), terurut per baris
+    """
+    nilai = np.asarray(nilai, dtype=float)
+    satu_dimensi = nilai.ndim == 1
+    kunci = np.atleast_2d(-nilai if turun else nilai)
+    kunci = np.where(np.isnan(kunci), np.inf, kunci)
+    n = kunci.shape[1]
+    k = min(max(int(k), 0), n)
+    if k == 0:
+        hasil = np.zeros((kunci.shape[0], 0), dtype=np.intp)
+        return hasil[0] if satu_dimensi else hasil
+
+    # Batas = nilai ke-k per baris; elemen kembar pada batas dipilih dari indeks terkecil
+    batas = np.take_along_axis(kunci, np.argpartition(kunci, k - 1, axis=1)[:, k - 1:k], axis=1)
+    lebih_kecil = kunci < batas
+    kembar = kunci == batas
+    sisa = k - lebih_kecil.sum(axis=1, keepdims=True)
+    terpilih = lebih_kecil | (kembar & (np.cumsum(kembar, axis=1) <= sisa))
+    indeks = np.nonzero(terpilih)[1].reshape(kunci.shape[0], k)
+    # Indeks sudah naik, sehingga argsort stabil menjaga urutan indeks untuk nilai kembar
+    urutan = np.argsort(np.take_along_axis(kunci, indeks, axis=1), axis=1, kind='stable')
+    hasil = np.take_along_axis(indeks, urutan, axis=1)
+    return hasil[0] if satu_dimensi else hasil
+
+
+# =====================================================
+# STATISTIK ORDINAL DARI FREKUENSI KUMULATIF
+# =====================================================
+# Semua statistik di bawah adalah fungsi histogram level per pertanyaan,
+# sehingga dihitung dari matriks frekuensi dalam O(pertanyaan x level),
+# berlaku sama untuk data berbobot.
+KOTAK_ATAS = 2   # top-2-box: dua level skor tertinggi
+KOTAK_BAWAH = 3  # bottom-3-box: tiga level skor terendah
+
+def statistik_ordinal(frekuensi, skor, n_atas=KOTAK_ATAS, n_bawah=KOTAK_BAWAH):
+    """
+    Hitung statistik ordinal per pertanyaan dari matriks frekuensi: median,
+    modus, kuartil dan IQR, persentase top-box/bottom-box, standar deviasi,
+    serta indeks dispersi ordinal (Leik D, IOV, konsensus Tastle-Wierman)
+
+    Parameters:
+    - frekuensi: Matriks pertanyaan x level (tanpa kolom kosong)
+    - skor: Skor per level
+    - n_atas: Jumlah level skor tertinggi untuk top-box
+    - n_bawah: Jumlah level skor terendah untuk bottom-box
+
+    Returns:
+    - Dictionary nama statistik -> array per pertanyaan (NaN jika tidak ada jawaban)
+    """
+    skor = np.asarray(skor, dtype=float)
+    urutan = np.argsort(skor, kind='stable')
+    skor_urut = skor[urutan]
+    frekuensi = np.asarray(frekuensi, dtype=float)[:, urutan]
+    n_level = frekuensi.shape[1]
+    n_valid = frekuensi.sum(axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        p = frekuensi / n_valid[:, None]
+        # Proporsi kumulatif di bawah setiap batas antar level (K - 1 batas)
+        kumulatif = np.cumsum(p, axis=1)[:, :-1]
+        rata_rata = p @ skor_urut
+        rentang = skor_urut[-1] - skor_urut[0] if n_level else 0.0
+        jarak = np.abs(skor_urut[None, :] - rata_rata[:, None]) / rentang
+        log_jarak = np.log2(np.maximum(1 - jarak, 1e-300))
+        hasil = {
+            'median': kuantil_dari_frekuensi(frekuensi, skor_urut, 0.5),
+            'modus': np.where(n_valid > 0, skor_urut[np.argmax(frekuensi, axis=1)] if n_level else np.nan, np.nan),
+            'q1': kuantil_dari_frekuensi(frekuensi, skor_urut, 0.25),
+            'q3': kuantil_dari_frekuensi(frekuensi, skor_urut, 0.75),
+            'persen_atas': p[:, n_level - min(n_atas, n_level):].sum(axis=1) * 100,
+            'persen_bawah': p[:, :min(n_bawah, n_level)].sum(axis=1) * 100,
+            'std': np.sqrt(np.maximum(p @ skor_urut ** 2 - rata_rata ** 2, 0.0)),
+            # Leik D: 0 = semua jawaban satu level, 1 = terbelah di dua ujung
+            'leik_d': 2 * np.minimum(kumulatif, 1 - kumulatif).sum(axis=1) / max(n_level - 1, 1),
+            # Index of ordinal variation (Berry-Mielke), skala 0-1
+            'iov': 4 * (kumulatif * (1 - kumulatif)).sum(axis=1) / max(n_level - 1, 1),
+            # Konsensus Tastle-Wierman: 1 = sepakat penuh, 0 = terbelah di dua ujung
+            'konsensus': 1 + np.where(p > 0, p * log_jarak, 0.0).sum(axis=1),
+        }
+    hasil['iqr'] = hasil['q3'] - hasil['q1']
+    kosong = n_valid <= 0
+    return {k: np.where(kosong, np.nan, v) for k, v in hasil.items()}
+
+
+def ringkas_frekuensi(frekuensi, skema, kolom):
+    """
+    Turunkan semua statistik agregat dari matriks frekuensi
+
+    Parameters:
+    - frekuensi: Matriks pertanyaan x (n_level + 1) dari hitung_frekuensi,
+      atau tensor 2 x pertanyaan x (n_level + 1) untuk data berbobot
+    - skema: Skema terkompilasi
+    - kolom: Nama kolom pertanyaan
+
+    Returns:
+    - Dictionary ringkasan: frekuensi per label, distribusi keseluruhan,
+      rata-rata per pertanyaan, frekuensi kategori, statistik ordinal per
+      pertanyaan dan keseluruhan (lihat statistik_ordinal), ukuran sampel
+      efektif (Kish; sama dengan n_valid tanpa bobot), dll.
+    """
+    frekuensi = np.asarray(frekuensi)
+    berbobot = frekuensi.ndim == 3
+    if berbobot:
+        frekuensi, kuadrat = frekuensi
+    else:
+        kuadrat = frekuensi
+    per_label = frekuensi[:, 1:]
+    skor = skema['skor']
+    n_valid = per_label.sum(axis=1)
+    jumlah_skor = per_label @ skor
+    jumlah_kuadrat = per_label @ (skor ** 2)
+    total_jawaban = n_valid.sum()
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rata_rata_per_q = jumlah_skor / n_valid
+        rata_rata = jumlah_skor.sum() / total_jawaban
+        std = np.sqrt(jumlah_kuadrat.sum() / total_jawaban - rata_rata ** 2)
+        # Ukuran sampel efektif Kish: (sum w)^2 / sum w^2
+        n_efektif = n_valid ** 2 / kuadrat[:, 1:].sum(axis=1)
+        n_efektif_responden = frekuensi[0].sum() ** 2 / kuadrat[0].sum() if len(frekuensi) else 0
+
+    return {
+        'kolom': list(kolom),
+        'label': skema['label'],
+        'kategori': skema['kategori'],
+        'n_responden': frekuensi[0].sum() if len(frekuensi) else 0,
+        'frekuensi': per_label,
+        'kosong': frekuensi[:, 0],
+        'n_valid': n_valid,
+        'total_jawaban': total_jawaban,
+        'distribusi': per_label.sum(axis=0),
+        'jumlah_skor': jumlah_skor,
+        'rata_rata_per_q': rata_rata_per_q,
+        'rata_rata': rata_rata,
+        'std': std,
+        'frekuensi_kategori': per_label @ skema['matriks_kategori'],
+        'distribusi_kategori': per_label.sum(axis=0) @ skema['matriks_kategori'],
+        'ordinal': statistik_ordinal(per_label, skor),
+        'ordinal_keseluruhan': {k: v[0] for k, v in statistik_ordinal(per_label.sum(axis=0)[None], skor).items()},
+        'berbobot': berbobot,
+        'n_efektif': np.nan_to_num(n_efektif),
+        'n_efektif_responden': np.nan_to_num(n_efektif_responden),
+    }
+
+
+def hitung_ringkasan(kode, skema, kolom, bobot=None):
+    """
+    Hitung ringkasan agregat langsung dari matriks kode
+
+    Parameters:
+    - kode: Matriks kode int8 (responden x pertanyaan)
+    - skema: Skema terkompilasi
+    - kolom: Nama kolom pertanyaan
+    - bobot: Bobot survei opsional per responden
+
+    Returns:
+    - Dictionary ringkasan (lihat ringkas_frekuensi)
+    """
+    return ringkas_frekuensi(hitung_frekuensi(kode, len(skema['label']), bobot), skema, kolom)
+
+
+# =====================================================
+# FILTER DAN PENJELAJAH RESPONDEN
+# =====================================================
+def parse_filter(teks_filter, header):
+    """
+    Ubah filter teks seperti "Q3=SS,S" menjadi pasangan (indeks pertanyaan, kode)
+
+    Parameters:
+    - teks_filter: List string "KOLOM=LABEL[,LABEL...]" (digabung dengan AND)
+    - header: Dictionary dengan kunci kolom dan label (header .ksr/basis data)
+
+    Returns:
+    - List tuple (indeks_pertanyaan, list_kode)
+    """
+    kondisi = []
+    for teks in teks_filter or []:
+        kolom, _, nilai = teks.partition("=")
+        kolom = kolom.strip()
+        if kolom not in header['kolom'] or not nilai:
+            raise ValueError(f"Filter tidak valid: {teks!r} (format KOLOM=LABEL[,LABEL...])")
+        label = [l.strip().upper() for l in nilai.split(",")]
+        salah = [l for l in label if l not in header['label']]
+        if salah:
+            raise ValueError(f"Label tidak dikenal pada filter {teks!r}: {', '.join(salah)}")
+        kondisi.append((header['kolom'].index(kolom), [header['label'].index(l) + 1 for l in label]))
+    return kondisi
+
+
+def urutkan_responden(blok_blok, kondisi=None, kolom_urut=None, turun=False, skor_per_kode=None):
+    """
+    Cari responden yang lolos filter dan urutkan menurut jawaban satu
+    pertanyaan, dalam satu lintasan blok. Hanya indeks baris yang disimpan,
+    sehingga halaman tampilan dapat diambil belakangan.
+
+    Parameters:
+    - blok_blok: Iterable blok matriks kode (urutan baris asli)
+    - kondisi: List tuple (indeks_pertanyaan, list_kode) dari parse_filter
+    - kolom_urut: Indeks pertanyaan untuk pengurutan (None = urutan asli)
+    - turun: Urutkan dari skor tertinggi (atau baris terakhir jika tanpa kolom_urut)
+    - skor_per_kode: Lookup skor per kode, wajib jika kolom_urut diisi
+
+    Returns:
+    - Array int64 indeks baris (global) yang lolos filter, sudah terurut;
+      sel kosong selalu diletakkan di akhir
+    """
+    indeks, kunci = [], []
+    if kolom_urut is not None:
+        # Kode -> peringkat skor (int8) agar argsort stabil memakai radix sort
+        skor = np.asarray(skor_per_kode[1:], dtype=float)
+        peringkat = np.argsort(np.argsort(skor, kind='stable'), kind='stable')
+        if turun:
+            peringkat = len(skor) - 1 - peringkat
+        tabel_kunci = np.concatenate([[len(skor)], peringkat]).astype(np.int8)
+    awal = 0
+    for blok in blok_blok:
+        blok = np.asarray(blok)
+        cocok = np.ones(len(blok), dtype=bool)
+        for j, daftar_kode in kondisi or []:
+            cocok &= np.isin(blok[:, j], daftar_kode)
+        baris = np.flatnonzero(cocok)
+        indeks.append(baris + awal)
+        if kolom_urut is not None:
+            kunci.append(tabel_kunci[blok[baris, kolom_urut]])
+        awal += len(blok)
+    indeks = np.concatenate(indeks) if indeks else np.zeros(0, dtype=np.int64)
+    if kolom_urut is None:
+        return indeks[::-1] if turun else indeks
+    return indeks[np.argsort(np.concatenate(kunci), kind='stable')]
+
+
+def ambil_baris(blok_blok, indeks):
+    """
+    Ambil baris tertentu dari aliran blok, mengikuti urutan indeks yang diminta
+
+    Parameters:
+    - blok_blok: Iterable blok matriks kode (urutan baris asli)
+    - indeks: Array indeks baris global
+
+    Returns:
+    - Matriks kode int8 (len(indeks) x pertanyaan)
+    """
+    indeks = np.asarray(indeks, dtype=np.int64)
+    urutan = np.argsort(indeks, kind='stable')
+    terurut = indeks[urutan]
+    hasil = None
+    awal = 0
+    for blok in blok_blok:
+        blok = np.asarray(blok)
+        if hasil is None:
+            hasil = np.zeros((len(indeks), blok.shape[1]), dtype=np.int8)
+        kiri, kanan = np.searchsorted(terurut, [awal, awal + len(blok)])
+        hasil[urutan[kiri:kanan]] = blok[terurut[kiri:kanan] - awal]
+        awal += len(blok)
+        if kanan == len(terurut):
+            break
+    return hasil if hasil is not None else np.zeros((len(indeks), 0), dtype=np.int8)
+
+
+# =====================================================
+# BAHASA KUERI RINGKASAN
+# =====================================================
+# Kueri berbentuk "<operasi> [target] [kunci=nilai ...]", mis.
+#   max_q scale=CTS     pct q=Q7 scale=SS     mean q=Q3     topk neg k=5
+#   bottomk mean k=5    topk leik_d k=10
+# Setiap kueri dijawab dari ringkasan (hasil ringkas_frekuensi) dengan
+# operasi pada array pertanyaan x level, tanpa menyentuh data responden.
+# Kode q1-q13 hanyalah alias kueri bawaan (lihat alias_kueri).
+
+def format_jumlah(jumlah):
+    """
+    Format jumlah responden: bilangan bulat apa adanya, jumlah berbobot satu desimal
+
+    Parameters:
+    - jumlah: Jumlah (int atau float)
+
+    Returns:
+    - String jumlah
+    """
+    return str(jumlah) if isinstance(jumlah, int) else f"{jumlah:.1f}"
+
+
+def alias_kueri(skema):
+    """
+    Susun alias q1-q13 sebagai kueri bawaan. q3-q8 mengikuti urutan skala
+    pada skema, q9 memakai level dengan skor terendah.
+
+    Parameters:
+    - skema: Skema terkompilasi
+
+    Returns:
+    - Dictionary alias -> teks kueri
+    """
+    label = skema['label']
+    alias = {'q1': "max_scale", 'q2': "min_scale"}
+    for i in range(min(6, len(label))):
+        alias[f"q{i + 3}"] = f"max_q scale={label[i]}"
+    alias['q9'] = f"list_q scale={label[int(np.argmin(skema['skor']))]}"
+    alias.update({'q10': "mean", 'q11': "max_mean", 'q12': "min_mean", 'q13': "categories"})
+    return alias
+
+
+def parse_kueri(teks, skema):
+    """
+    Uraikan teks kueri (atau alias q1-q13) menjadi operasi, target, dan parameter
+
+    Parameters:
+    - teks: Teks kueri, mis. "pct q=Q7 scale=SS" atau "q3"
+    - skema: Skema terkompilasi
+
+    Returns:
+    - Tuple (operasi, target atau None, dictionary parameter)
+    """
+    teks = alias_kueri(skema).get(teks.strip().lower(), teks)
+    token = teks.split()
+    if not token:
+        raise ValueError("Kueri kosong")
+    operasi, target, parameter = token[0].lower(), None, {}
+    for t in token[1:]:
+        kunci, sama, nilai = t.partition("=")
+        if sama:
+            parameter[kunci.lower()] = nilai
+        elif target is None:
+            target = t
+        else:
+            raise ValueError(f"Kueri {teks!r}: hanya satu target tanpa '=' yang diperbolehkan ({t!r})")
+    if operasi not in OPERASI_KUERI:
+        raise ValueError(f"Operasi kueri tidak dikenal: {operasi!r} (tersedia: {', '.join(OPERASI_KUERI)})")
+    diizinkan = OPERASI_KUERI[operasi][1]
+    salah = [k for k in parameter if k not in diizinkan]
+    if salah:
+        raise ValueError(f"Parameter {', '.join(salah)} tidak berlaku untuk {operasi} (tersedia: {', '.join(diizinkan) or '-'})")
+    return operasi, target, parameter
+
+
+def cari_skala(nilai, ringkasan):
+    """
+    Cari indeks level skala dari label (tanpa membedakan huruf besar/kecil)
+
+    Parameters:
+    - nilai: Label skala dari kueri
+    - ringkasan: Dictionary hasil ringkas_frekuensi
+
+    Returns:
+    - Indeks level (0-based)
+    """
+    label = str(nilai or "").strip().upper()
+    if label not in ringkasan['label']:
+        raise ValueError(f"Skala tidak dikenal: {nilai!r} (tersedia: {', '.join(ringkasan['label'])})")
+    return ringkasan['label'].index(label)
+
+
+def cari_pertanyaan(nilai, ringkasan):
+    """
+    Cari indeks pertanyaan dari nama kolom (tanpa membedakan huruf besar/kecil)
+
+    Parameters:
+    - nilai: Nama kolom dari kueri
+    - ringkasan: Dictionary hasil ringkas_frekuensi
+
+    Returns:
+    - Indeks pertanyaan
+    """
+    kolom = [str(k).lower() for k in ringkasan['kolom']]
+    if str(nilai or "").strip().lower() not in kolom:
+        raise ValueError(f"Pertanyaan tidak dikenal: {nilai!r}")
+    return kolom.index(str(nilai).strip().lower())
+
+
+def cari_kategori(nilai, ringkasan):
+    """
+    Cari indeks kategori dari nama atau awalan unik (mis. neg -> negatif)
+
+    Parameters:
+    - nilai: Nama kategori dari kueri
+    - ringkasan: Dictionary hasil ringkas_frekuensi
+
+    Returns:
+    - Indeks kategori
+    """
+    nama = str(nilai or "").strip().lower()
+    cocok = [i for i, k in enumerate(ringkasan['kategori']) if k == nama] or \
+            [i for i, k in enumerate(ringkasan['kategori']) if nama and k.startswith(nama)]
+    if len(cocok) != 1:
+        raise ValueError(f"Kategori tidak dikenal: {nilai!r} (tersedia: {', '.join(ringkasan['kategori'])})")
+    return cocok[0]
+
+
+def persen_dari(jumlah, dari):
+    """
+    Hitung persentase siap JSON
+
+    Parameters:
+    - jumlah: Pembilang
+    - dari: Penyebut
+
+    Returns:
+    - Persentase (float), atau None jika penyebut nol
+    """
+    return nilai_json(jumlah / dari * 100) if dari else None
+
+
+def kueri_skala_ekstrem(ringkasan, terbanyak):
+    """
+    Skala yang paling banyak (atau paling sedikit, selain nol) dipilih secara keseluruhan
+
+    Parameters:
+    - ringkasan: Dictionary hasil ringkas_frekuensi
+    - terbanyak: True untuk terbanyak, False untuk tersedikit
+
+    Returns:
+    - Dictionary label, jumlah, persen (dari total jawaban)
+    """
+    distribusi = ringkasan['distribusi']
+    if not ringkasan['total_jawaban']:
+        return None
+    if terbanyak:
+        i = int(np.argmax(distribusi))
+    else:
+        i = int(np.argmin(np.where(distribusi > 0, distribusi, np.inf)))
+    return {'label': ringkasan['label'][i], 'jumlah': nilai_json(distribusi[i]),
+            'persen': persen_dari(distribusi[i], ringkasan['total_jawaban'])}
+
+
+def kueri_pertanyaan_ekstrem(ringkasan, parameter, terbanyak):
+    """
+    Pertanyaan dengan jumlah jawaban terbanyak (atau tersedikit) untuk satu skala
+
+    Parameters:
+    - ringkasan: Dictionary hasil ringkas_frekuensi
+    - parameter: Parameter kueri (scale)
+    - terbanyak: True untuk terbanyak, False untuk tersedikit
+
+    Returns:
+    - Dictionary kolom, jumlah, persen (dari jumlah responden)
+    """
+    i = cari_skala(parameter.get('scale'), ringkasan)
+    if not ringkasan['total_jawaban'] or not len(ringkasan['kolom']):
+        return None
+    jumlah = ringkasan['frekuensi'][:, i]
+    j = int(np.argmax(jumlah) if terbanyak else np.argmin(jumlah))
+    return {'kolom': ringkasan['kolom'][j], 'jumlah': nilai_json(jumlah[j]),
+            'persen': persen_dari(jumlah[j], ringkasan['n_responden'])}
+
+
+def kueri_daftar_pertanyaan(ringkasan, parameter):
+    """
+    Semua pertanyaan yang pernah dijawab dengan satu skala
+
+    Parameters:
+    - ringkasan: Dictionary hasil ringkas_frekuensi
+    - parameter: Parameter kueri (scale)
+
+    Returns:
+    - List dictionary kolom, persen (dari jumlah responden)
+    """
+    i = cari_skala(parameter.get('scale'), ringkasan)
+    jumlah = ringkasan['frekuensi'][:, i]
+    return [{'kolom': ringkasan['kolom'][j], 'persen': persen_dari(jumlah[j], ringkasan['n_responden'])}
+            for j in np.flatnonzero(jumlah > 0)]
+
+
+def kueri_rata_rata(ringkasan, parameter):
+    """
+    Rata-rata skor keseluruhan atau satu pertanyaan
+
+    Parameters:
+    - ringkasan: Dictionary hasil ringkas_frekuensi
+    - parameter: Parameter kueri (q opsional)
+
+    Returns:
+    - Dictionary rata_rata
+    """
+    if 'q' in parameter:
+        return {'rata_rata': nilai_json(ringkasan['rata_rata_per_q'][cari_pertanyaan(parameter['q'], ringkasan)])}
+    return {'rata_rata': nilai_json(ringkasan['rata_rata'])} if ringkasan['total_jawaban'] else None
+
+
+def kueri_rata_rata_ekstrem(ringkasan, tertinggi):
+    """
+    Pertanyaan dengan rata-rata skor tertinggi (atau terendah)
+
+    Parameters:
+    - ringkasan: Dictionary hasil ringkas_frekuensi
+    - tertinggi: True untuk tertinggi, False untuk terendah
+
+    Returns:
+    - Dictionary kolom, rata_rata
+    """
+    rata_rata = ringkasan['rata_rata_per_q']
+    if not ringkasan['total_jawaban']:
+        return None
+    j = int(peringkat_teratas(rata_rata, 1, tertinggi)[0])
+    return {'kolom': ringkasan['kolom'][j], 'rata_rata': nilai_json(rata_rata[j])}
+
+
+def kueri_kategori(ringkasan, parameter):
+    """
+    Jumlah dan persentase jawaban per kategori, keseluruhan atau satu pertanyaan
+
+    Parameters:
+    - ringkasan: Dictionary hasil ringkas_frekuensi
+    - parameter: Parameter kueri (q opsional)
+
+    Returns:
+    - List dictionary nama, jumlah, persen
+    """
+    if 'q' in parameter:
+        j = cari_pertanyaan(parameter['q'], ringkasan)
+        jumlah, dari = ringkasan['frekuensi_kategori'][j], ringkasan['n_valid'][j]
+    else:
+        jumlah, dari = ringkasan['distribusi_kategori'], ringkasan['total_jawaban']
+    if not dari:
+        return None
+    return [{'nama': k, 'jumlah': nilai_json(n), 'persen': persen_dari(n, dari)}
+            for k, n in zip(ringkasan['kategori'], jumlah)]
+
+
+def kueri_jumlah(ringkasan, parameter):
+    """
+    Jumlah dan persentase satu skala, keseluruhan (dari total jawaban) atau satu pertanyaan (dari jumlah responden)
+
+    Parameters:
+    - ringkasan: Dictionary hasil ringkas_frekuensi
+    - parameter: Parameter kueri (scale, q opsional)
+
+    Returns:
+    - Dictionary jumlah, persen
+    """
+    i = cari_skala(parameter.get('scale'), ringkasan)
+    if 'q' in parameter:
+        j = cari_pertanyaan(parameter['q'], ringkasan)
+        jumlah, dari = ringkasan['frekuensi'][j, i], ringkasan['n_responden']
+    else:
+        jumlah, dari = ringkasan['distribusi'][i], ringkasan['total_jawaban']
+    return {'jumlah': nilai_json(jumlah), 'persen': persen_dari(jumlah, dari)}
+
+
+def ukuran_pertanyaan(ringkasan, target):
+    """
+    Ambil satu ukuran per pertanyaan untuk diperingkat: persentase jawaban
+    valid untuk label skala atau kategori, rata-rata skor ('mean'), atau
+    statistik ordinal (mis. 'median', 'iqr', 'leik_d')
+
+    Parameters:
+    - ringkasan: Dictionary hasil ringkas_frekuensi
+    - target: Label skala, nama/awalan kategori, 'mean', atau nama statistik ordinal
+
+    Returns:
+    - Tuple (array nilai per pertanyaan, array jumlah atau None untuk ukuran non-persentase)
+    """
+    nama = str(target or "").strip()
+    if nama.lower() == 'mean':
+        return ringkasan['rata_rata_per_q'], None
+    if nama.lower() in ringkasan['ordinal']:
+        return ringkasan['ordinal'][nama.lower()], None
+    if nama.upper() in ringkasan['label']:
+        jumlah = ringkasan['frekuensi'][:, cari_skala(nama, ringkasan)]
+    else:
+        jumlah = ringkasan['frekuensi_kategori'][:, cari_kategori(nama, ringkasan)]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return jumlah / ringkasan['n_valid'] * 100, jumlah
+
+
+def kueri_top_k(ringkasan, target, parameter, turun=True):
+    """
+    k pertanyaan teratas menurut satu ukuran (lihat ukuran_pertanyaan);
+    nilai kembar diurutkan menurut urutan kolom
+
+    Parameters:
+    - ringkasan: Dictionary hasil ringkas_frekuensi
+    - target: Ukuran yang diperingkat
+    - parameter: Parameter kueri (k, default 5; order=asc/desc membalik arah bawaan)
+    - turun: Arah bawaan (True = tertinggi dulu)
+
+    Returns:
+    - List dictionary kolom, jumlah, persen (persentase jawaban valid), atau
+      kolom, nilai untuk rata-rata dan statistik ordinal
+    """
+    nilai, jumlah = ukuran_pertanyaan(ringkasan, target)
+    try:
+        k = int(parameter.get('k', 5))
+    except ValueError:
+        raise ValueError(f"k harus bilangan bulat: {parameter['k']!r}")
+    if 'order' in parameter:
+        if parameter['order'].lower() not in ('asc', 'desc'):
+            raise ValueError(f"order harus asc atau desc: {parameter['order']!r}")
+        turun = parameter['order'].lower() == 'desc'
+    urutan = peringkat_teratas(nilai, k, turun)
+    if jumlah is None:
+        return [{'kolom': ringkasan['kolom'][j], 'nilai': nilai_json(nilai[j])} for j in urutan]
+    return [{'kolom': ringkasan['kolom'][j], 'jumlah': nilai_json(jumlah[j]), 'persen': nilai_json(nilai[j])}
+            for j in urutan]
+
+
+def kueri_ordinal(ringkasan, target, parameter):
+    """
+    Satu statistik ordinal (lihat statistik_ordinal), keseluruhan atau satu pertanyaan
+
+    Parameters:
+    - ringkasan: Dictionary hasil ringkas_frekuensi
+    - target: Nama statistik (atau parameter stat)
+    - parameter: Parameter kueri (stat, q opsional)
+
+    Returns:
+    - Dictionary nilai
+    """
+    nama = parameter.get('stat', target)
+    if nama not in ringkasan['ordinal']:
+        raise ValueError(f"Statistik ordinal tidak dikenal: {nama!r} (tersedia: {', '.join(ringkasan['ordinal'])})")
+    if 'q' in parameter:
+        return {'nilai': nilai_json(ringkasan['ordinal'][nama][cari_pertanyaan(parameter['q'], ringkasan)])}
+    return {'nilai': nilai_json(ringkasan['ordinal_keseluruhan'][nama])}
+
+
+def format_daftar(nilai, kunci):
+    """
+    Format daftar pertanyaan sebagai "kolom:persen|..." (satu desimal) atau
+    "kolom:nilai|..." (dua desimal, untuk rata-rata dan statistik ordinal)
+
+    Parameters:
+    - nilai: List dictionary hasil kueri
+    - kunci: Kunci nama pada setiap elemen
+
+    Returns:
+    - String jawaban
+    """
+    return "|".join(
+        f"{x[kunci]}:{x['persen']:.1f}" if 'persen' in x else f"{x[kunci]}:{x['nilai']:.2f}" for x in nilai or []
+    )
+
+
+# Operasi -> (evaluasi(ringkasan, target, parameter), parameter yang diizinkan, format teks)
+OPERASI_KUERI = {
+    'max_scale': (lambda r, t, p: kueri_skala_ekstrem(r, True), (),
+                  lambda n: f"{n['label']}|{format_jumlah(n['jumlah'])}|{n['persen']:.1f}"),
+    'min_scale': (lambda r, t, p: kueri_skala_ekstrem(r, False), (),
+                  lambda n: f"{n['label']}|{format_jumlah(n['jumlah'])}|{n['persen']:.1f}"),
+    'max_q': (lambda r, t, p: kueri_pertanyaan_ekstrem(r, p, True), ('scale',),
+              lambda n: f"{n['kolom']}|{format_jumlah(n['jumlah'])}|{n['persen']:.1f}"),
+    'min_q': (lambda r, t, p: kueri_pertanyaan_ekstrem(r, p, False), ('scale',),
+              lambda n: f"{n['kolom']}|{format_jumlah(n['jumlah'])}|{n['persen']:.1f}"),
+    'list_q': (lambda r, t, p: kueri_daftar_pertanyaan(r, p), ('scale',), lambda n: format_daftar(n, 'kolom')),
+    'mean': (lambda r, t, p: kueri_rata_rata(r, p), ('q',), lambda n: f"{n['rata_rata']:.2f}"),
+    'max_mean': (lambda r, t, p: kueri_rata_rata_ekstrem(r, True), (), lambda n: f"{n['kolom']}:{n['rata_rata']:.2f}"),
+    'min_mean': (lambda r, t, p: kueri_rata_rata_ekstrem(r, False), (), lambda n: f"{n['kolom']}:{n['rata_rata']:.2f}"),
+    'categories': (lambda r, t, p: kueri_kategori(r, p), ('q',),
+                   lambda n: "|".join(f"{k['nama']}={format_jumlah(k['jumlah'])}:{k['persen']:.1f}" for k in n)),
+    'count': (lambda r, t, p: kueri_jumlah(r, p), ('scale', 'q'),
+              lambda n: f"{format_jumlah(n['jumlah'])}|{n['persen']:.1f}"),
+    'pct': (lambda r, t, p: kueri_jumlah(r, p), ('scale', 'q'), lambda n: f"{n['persen']:.1f}"),
+    'topk': (kueri_top_k, ('k', 'order'), lambda n: format_daftar(n, 'kolom')),
+    'bottomk': (lambda r, t, p: kueri_top_k(r, t, p, turun=False), ('k', 'order'), lambda n: format_daftar(n, 'kolom')),
+    'ordinal': (kueri_ordinal, ('stat', 'q'), lambda n: f"{n['nilai']:.2f}"),
+}
+
+
+def jawab_kueri(teks, ringkasan, skema):
+    """
+    Jawab satu kueri dari ringkasan
+
+    Parameters:
+    - teks: Teks kueri atau alias q1-q13
+    - ringkasan: Dictionary hasil ringkas_frekuensi
+    - skema: Skema terkompilasi
+
+    Returns:
+    - Tuple (nilai terstruktur siap JSON atau None jika tidak ada data, teks jawaban atau None)
+    """
+    operasi, target, parameter = parse_kueri(teks, skema)
+    evaluasi, _, format_teks = OPERASI_KUERI[operasi]
+    nilai = evaluasi(ringkasan, target, parameter)
+    if nilai is None:
+        return None, None
+    try:
+        return nilai, format_teks(nilai)
+    except TypeError:
+        # Persentase/rata-rata tidak terdefinisi (None), mis. pertanyaan tanpa jawaban
+        return nilai, None
+
+
+# =====================================================
+# STATISTIK TERSTRUKTUR
+# =====================================================
+def nilai_json(nilai):
+    """
+    Ubah skalar numpy menjadi tipe Python yang dapat diserialisasi JSON
+
+    Parameters:
+    - nilai: Skalar numpy/Python
+
+    Returns:
+    - int, float, atau None (untuk NaN)
+    """
+    if isinstance(nilai, (np.integer, int)):
+        return int(nilai)
+    nilai = float(nilai)
+    return None if np.isnan(nilai) else nilai
+
+
+def statistik_lengkap(ringkasan, skema):
+    """
+    Susun seluruh statistik ringkasan sebagai struktur bertipe (siap JSON),
+    termasuk jawaban q1-q13 dalam bentuk terstruktur
+
+    Parameters:
+    - ringkasan: Dictionary hasil ringkas_frekuensi
+    - skema: Skema terkompilasi
+
+    Returns:
+    - Dictionary berisi ringkasan, skala, pertanyaan, kategori, dan jawaban
+    """
+    label, kolom = ringkasan['label'], ringkasan['kolom']
+    frekuensi = ringkasan['frekuensi']
+    n_responden = nilai_json(ringkasan['n_responden'])
+    total_jawaban = nilai_json(ringkasan['total_jawaban'])
+    distribusi = ringkasan['distribusi']
+    distribusi_kategori = ringkasan['distribusi_kategori']
+    rata_rata_per_q = ringkasan['rata_rata_per_q']
+    persen = persen_dari
+
+    def terbanyak_per_skala(i_skala):
+        i_max = int(np.argmax(frekuensi[:, i_skala]))
+        jumlah = frekuensi[i_max, i_skala]
+        return {'kolom': kolom[i_max], 'jumlah': nilai_json(jumlah), 'persen': persen(jumlah, n_responden)}
+
+    skala = [
+        {
+            'label': nama,
+            'skor': nilai_json(skema['skor'][i]),
+            'kategori': skema['kategori'][skema['kategori_per_kode'][i + 1]],
+            'jumlah': nilai_json(distribusi[i]),
+            'persen': persen(distribusi[i], total_jawaban),
+            'pertanyaan_terbanyak': terbanyak_per_skala(i) if len(kolom) else None,
+        }
+        for i, nama in enumerate(label)
+    ]
+    pertanyaan = [
+        {
+            'kolom': nama,
+            'n_valid': nilai_json(ringkasan['n_valid'][j]),
+            'kosong': nilai_json(ringkasan['kosong'][j]),
+            'n_efektif': nilai_json(ringkasan['n_efektif'][j]),
+            'rata_rata': nilai_json(rata_rata_per_q[j]),
+            'frekuensi': {l: nilai_json(n) for l, n in zip(label, frekuensi[j])},
+            'kategori': {k: nilai_json(n) for k, n in zip(ringkasan['kategori'], ringkasan['frekuensi_kategori'][j])},
+            'ordinal': {k: nilai_json(v[j]) for k, v in ringkasan['ordinal'].items()},
+        }
+        for j, nama in enumerate(kolom)
+    ]
+    kategori = [
+        {'nama': k, 'jumlah': nilai_json(n), 'persen': persen(n, total_jawaban)}
+        for k, n in zip(ringkasan['kategori'], distribusi_kategori)
+    ]
+
+    # Jawaban q1-q13: alias kueri bawaan, dijawab lewat jalur yang sama dengan kueri bebas
+    jawaban = {}
+    if total_jawaban:
+        jawaban = {q: jawab_kueri(q, ringkasan, skema)[0] for q in alias_kueri(skema)}
+
+    return {
+        'skema': skema['nama_skema'],
+        'n_responden': n_responden,
+        'berbobot': bool(ringkasan['berbobot']),
+        'n_efektif': nilai_json(ringkasan['n_efektif_responden']),
+        'n_pertanyaan': len(kolom),
+        'total_jawaban': total_jawaban,
+        'kosong': nilai_json(ringkasan['kosong'].sum()),
+        'rata_rata': nilai_json(ringkasan['rata_rata']),
+        'std': nilai_json(ringkasan['std']),
+        'ordinal': {k: nilai_json(v) for k, v in ringkasan['ordinal_keseluruhan'].items()},
+        'skala': skala,
+        'pertanyaan': pertanyaan,
+        'kategori': kategori,
+        'jawaban': jawaban,
+    }
@@ -0,0 +1,379 @@
+import bisect
+import contextlib
+import os
+import re
+import threading
+import time
+
+# =====================================================
+# METRIK FORMAT PROMETHEUS
+# =====================================================
+# Penghitung, gauge, dan histogram sederhana yang dirender ke format teks
+# eksposisi Prometheus (tanpa dependensi prometheus_client). Mencatat
+# metrik hanya berupa penjumlahan di dictionary di bawah satu lock, jadi
+# biaya di jalur utama dapat diabaikan; rendering dan penulisan file hanya
+# terjadi di akhir proses/rerun atau saat /metrics diminta.
+#
+# Keluaran:
+# - textfile untuk node_exporter textfile collector (ditulis atomik lewat
+#   os.replace); proses CLI yang berumur pendek menjumlahkan nilainya ke
+#   isi file sebelumnya agar penghitung tetap kumulatif
+# - endpoint HTTP /metrics lokal (server thread latar)
+ENV_FILE_METRIK = "KUESIONER_METRIK_FILE"
+ENV_PORT_METRIK = "KUESIONER_METRIK_PORT"
+BATAS_DETIK = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+JENIS_KUMULATIF = ('counter', 'histogram')
+
+_POLA_SAMPEL = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})?\s+(\S+)$')
+
+
+def format_label(label):
+    """
+    Render pasangan label Prometheus, mis. {query="q3",format="teks"}
+
+    Parameters:
+    - label: Tuple pasangan (nama, nilai)
+
+    Returns:
+    - String label (kosong jika tanpa label)
+    """
+    if not label:
+        return ""
+    isi = ",".join(
+        f'{nama}="{str(nilai).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), chr(92) + "n")}"'
+        for nama, nilai in label
+    )
+    return "{" + isi + "}"
+
+
+def format_nilai(nilai):
+    """
+    Render nilai sampel (bilangan bulat tanpa desimal, +Inf untuk tak hingga)
+
+    Parameters:
+    - nilai: Angka
+
+    Returns:
+    - String nilai
+    """
+    if nilai == float("inf"):
+        return "+Inf"
+    return str(int(nilai)) if float(nilai).is_integer() else repr(float(nilai))
+
+
+class Metrik:
+    """
+    Dasar metrik: nama, teks bantuan, nama label, dan nilai per kombinasi label
+    """
+    jenis = None
+
+    def __init__(self, nama, bantuan, label=()):
+        self.nama = nama
+        self.bantuan = bantuan
+        self.label = tuple(label)
+        self.nilai = {}
+        self.kunci = threading.Lock()
+
+    def kunci_label(self, label):
+        if set(label) != set(self.label):
+            raise ValueError(f"Metrik {self.nama} membutuhkan label {self.label}, diberikan {tuple(label)}")
+        return tuple((nama, label[nama]) for nama in self.label)
+
+    def sampel(self):
+        """
+        Daftar sampel metrik
+
+        Returns:
+        - List (nama sampel, label string, nilai)
+        """
+        with self.kunci:
+            return [(self.nama, format_label(label), nilai) for label, nilai in self.nilai.items()]
+
+
+class Penghitung(Metrik):
+    """Penghitung kumulatif (counter)"""
+    jenis = 'counter'
+
+    def inc(self, nilai=1, **label):
+        """
+        Tambah penghitung
+
+        Parameters:
+        - nilai: Penambahan (>= 0)
+        - **label: Nilai label
+        """
+        kunci = self.kunci_label(label)
+        with self.kunci:
+            self.nilai[kunci] = self.nilai.get(kunci, 0) + nilai
+
+
+class Gauge(Metrik):
+    """Nilai sesaat (gauge)"""
+    jenis = 'gauge'
+
+    def set(self, nilai, **label):
+        """
+        Tetapkan nilai gauge
+
+        Parameters:
+        - nilai: Nilai baru
+        - **label: Nilai label
+        """
+        kunci = self.kunci_label(label)
+        with self.kunci:
+            self.nilai[kunci] = nilai
+
+
+class Histogram(Metrik):
+    """Histogram kumulatif dengan batas bucket tetap"""
+    jenis = 'histogram'
+
+    def __init__(self, nama, bantuan, label=(), batas=BATAS_DETIK):
+        super().__init__(nama, bantuan, label)
+        self.batas = tuple(sorted(batas))
+
+    def amati(self, nilai, **label):
+        """
+        Catat satu pengamatan
+
+        Parameters:
+        - nilai: Nilai yang diamati (mis. detik)
+        - **label: Nilai label
+        """
+        kunci = self.kunci_label(label)
+        indeks = bisect.bisect_left(self.batas, nilai)
+        with self.kunci:
+            bucket, jumlah, n = self.nilai.get(kunci) or ([0] * len(self.batas), 0.0, 0)
+            if indeks < len(bucket):
+                bucket[indeks] += 1
+            self.nilai[kunci] = (bucket, jumlah + nilai, n + 1)
+
+    @contextlib.contextmanager
+    def waktu(self, **label):
+        """
+        Ukur lama blok kode (detik) sebagai satu pengamatan
+
+        Parameters:
+        - **label: Nilai label
+        """
+        mulai = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.amati(time.perf_counter() - mulai, **label)
+
+    def sampel(self):
+        hasil = []
+        with self.kunci:
+            for label, (bucket, jumlah, n) in self.nilai.items():
+                kumulatif = 0
+                for batas, isi in zip(self.batas, bucket):
+                    kumulatif += isi
+                    hasil.append((f"{self.nama}_bucket", format_label(label + (('le', format_nilai(batas)),)), kumulatif))
+                hasil.append((f"{self.nama}_bucket", format_label(label + (('le', '+Inf'),)), n))
+                hasil.append((f"{self.nama}_sum", format_label(label), jumlah))
+                hasil.append((f"{self.nama}_count", format_label(label), n))
+        return hasil
+
+
+class Registri:
+    """
+    Kumpulan metrik satu proses. Pendaftaran bersifat idempoten: nama yang
+    sama mengembalikan metrik yang sudah ada (skrip Streamlit dieksekusi
+    ulang setiap rerun, modul ini tidak).
+    """
+
+    def __init__(self):
+        self.metrik = {}
+        self.kunci = threading.Lock()
+        self.tertulis = {}  # path textfile -> keluarga yang sudah diakumulasikan ke file
+
+    def daftar(self, kelas, nama, bantuan, label=(), **opsi):
+        with self.kunci:
+            if nama not in self.metrik:
+                self.metrik[nama] = kelas(nama, bantuan, label, **opsi)
+            return self.metrik[nama]
+
+    def penghitung(self, nama, bantuan, label=()):
+        return self.daftar(Penghitung, nama, bantuan, label)
+
+    def gauge(self, nama, bantuan, label=()):
+        return self.daftar(Gauge, nama, bantuan, label)
+
+    def histogram(self, nama, bantuan, label=(), batas=BATAS_DETIK):
+        return self.daftar(Histogram, nama, bantuan, label, batas=batas)
+
+    def keluarga(self):
+        """
+        Semua metrik dalam bentuk keluarga sampel (lihat gabung_keluarga)
+
+        Returns:
+        - Dictionary nama -> {'jenis', 'bantuan', 'sampel': {(nama sampel, label): nilai}}
+        """
+        with self.kunci:
+            daftar_metrik = list(self.metrik.values())
+        return {
+            m.nama: {'jenis': m.jenis, 'bantuan': m.bantuan, 'sampel': {(n, l): v for n, l, v in m.sampel()}}
+            for m in daftar_metrik if m.nilai
+        }
+
+
+REGISTRI = Registri()
+
+
+# =====================================================
+# FORMAT TEKS EKSPOSISI
+# =====================================================
+def render_keluarga(keluarga):
+    """
+    Render keluarga metrik ke format teks eksposisi Prometheus
+
+    Parameters:
+    - keluarga: Dictionary hasil Registri.keluarga / parse_teks
+
+    Returns:
+    - String teks (diakhiri baris baru)
+    """
+    baris = []
+    for nama in sorted(keluarga):
+        isi = keluarga[nama]
+        baris.append(f"# HELP {nama} {isi['bantuan']}")
+        baris.append(f"# TYPE {nama} {isi['jenis']}")
+        baris.extend(f"{sampel}{label} {format_nilai(nilai)}" for (sampel, label), nilai in isi['sampel'].items())
+    return "\n".join(baris) + "\n" if baris else ""
+
+
+def parse_teks(teks):
+    """
+    Baca kembali teks eksposisi yang ditulis render_keluarga
+
+    Parameters:
+    - teks: Isi file textfile
+
+    Returns:
+    - Dictionary keluarga metrik (lihat Registri.keluarga)
+    """
+    keluarga, nama = {}, None
+    for baris in teks.splitlines():
+        if baris.startswith("# HELP "):
+            nama, _, bantuan = baris[7:].partition(" ")
+            keluarga.setdefault(nama, {'jenis': 'untyped', 'bantuan': bantuan, 'sampel': {}})
+        elif baris.startswith("# TYPE "):
+            nama, _, jenis = baris[7:].partition(" ")
+            keluarga.setdefault(nama, {'jenis': jenis, 'bantuan': "", 'sampel': {}})['jenis'] = jenis
+        elif baris and not baris.startswith("#") and nama is not None:
+            cocok = _POLA_SAMPEL.match(baris)
+            if cocok:
+                keluarga[nama]['sampel'][(cocok.group(1), cocok.group(2) or "")] = float(cocok.group(3).replace("+Inf", "inf"))
+    return keluarga
+
+
+def gabung_keluarga(lama, baru):
+    """
+    Gabungkan metrik lama (dari file) dengan metrik proses ini: penghitung
+    dan histogram dijumlahkan, gauge diambil dari yang baru
+
+    Parameters:
+    - lama: Keluarga metrik sebelumnya
+    - baru: Keluarga metrik proses ini
+
+    Returns:
+    - Keluarga metrik gabungan
+    """
+    hasil = {nama: {**isi, 'sampel': dict(isi['sampel'])} for nama, isi in lama.items()}
+    for nama, isi in baru.items():
+        tujuan = hasil.setdefault(nama, {'jenis': isi['jenis'], 'bantuan': isi['bantuan'], 'sampel': {}})
+        for kunci, nilai in isi['sampel'].items():
+            tujuan['sampel'][kunci] = tujuan['sampel'].get(kunci, 0) + nilai if isi['jenis'] in JENIS_KUMULATIF else nilai
+    return hasil
+
+
+def selisih_keluarga(baru, lama):
+    """
+    Kurangi nilai penghitung/histogram yang sudah pernah diakumulasikan,
+    sehingga proses berumur panjang dapat menulis berulang tanpa menghitung
+    ganda; gauge tetap diambil dari yang baru
+
+    Parameters:
+    - baru: Keluarga metrik saat ini
+    - lama: Keluarga metrik pada penulisan sebelumnya
+
+    Returns:
+    - Keluarga metrik selisih
+    """
+    hasil = {}
+    for nama, isi in baru.items():
+        sampel_lama = lama.get(nama, {}).get('sampel', {}) if isi['jenis'] in JENIS_KUMULATIF else {}
+        hasil[nama] = {**isi, 'sampel': {k: v - sampel_lama.get(k, 0) for k, v in isi['sampel'].items()}}
+    return hasil
+
+
+def tulis_textfile(path, registri=REGISTRI, akumulasi=False):
+    """
+    Tulis metrik ke file .prom secara atomik (file sementara lalu os.replace)
+
+    Parameters:
+    - path: File tujuan (mis. di folder textfile collector node_exporter)
+    - registri: Registri metrik
+    - akumulasi: Jumlahkan ke isi file sebelumnya (untuk proses CLI); hanya
+      selisih sejak penulisan terakhir proses ini yang ditambahkan, dan file
+      dikunci selama baca-tulis agar proses paralel tidak saling menimpa
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f"{path}.lock", "a") as kunci:
+        try:
+            import fcntl
+            fcntl.flock(kunci, fcntl.LOCK_EX)
+        except ImportError:
+            pass
+        keluarga = sekarang = registri.keluarga()
+        if akumulasi:
+            keluarga = selisih_keluarga(sekarang, registri.tertulis.get(path, {}))
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    keluarga = gabung_keluarga(parse_teks(f.read()), keluarga)
+        sementara = f"{path}.{os.getpid()}.tmp"
+        with open(sementara, "w", encoding="utf-8") as f:
+            f.write(render_keluarga(keluarga))
+        os.replace(sementara, path)
+        registri.tertulis[path] = sekarang
+
+
+# =====================================================
+# ENDPOINT /metrics
+# =====================================================
+def mulai_server_metrik(port, host="127.0.0.1", registri=REGISTRI):
+    """
+    Jalankan server /metrics di thread latar (daemon)
+
+    Parameters:
+    - port: Port HTTP
+    - host: Alamat bind (default hanya localhost)
+    - registri: Registri metrik yang disajikan
+
+    Returns:
+    - ThreadingHTTPServer yang sedang berjalan
+    """
+    # Diimpor di sini agar proses yang hanya menulis textfile (answer.py) tidak memuat http.server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    class HandlerMetrik(BaseHTTPRequestHandler):
+        """Handler HTTP minimal yang hanya melayani GET /metrics"""
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_keluarga(registri.keluarga()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), HandlerMetrik)
+    threading.Thread(target=server.serve_forever, name="server-metrik", daemon=True).start()
+    return server
@@ -0,0 +1,130 @@
+import hashlib
+import os
+import time
+
+# =====================================================
+# PEMANTAUAN FILE SUMBER
+# =====================================================
+# Perubahan dideteksi dengan polling stat (mtime/ukuran) yang murah; isi
+# file hanya di-hash jika stat berubah. Satu pass sha1 sekaligus menghasilkan
+# hash prefiks sepanjang ukuran lama, sehingga file yang hanya bertambah di
+# akhir (mis. baris baru pada .ksr) dapat dibedakan dari file yang ditulis
+# ulang. Rentetan penulisan diredam dengan menunggu stat stabil (debounce).
+INTERVAL_PANTAU = 2.0  # detik antar polling
+JEDA_TENANG = 1.0      # detik tanpa perubahan sebelum file dibaca
+UKURAN_POTONGAN = 1 << 20
+
+
+def stat_file(path):
+    """
+    Ambil stat ringan file untuk polling
+
+    Parameters:
+    - path: Lokasi file
+
+    Returns:
+    - Tuple (mtime_ns, size), atau None jika file tidak ada
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def hash_file(path, panjang_prefiks=None):
+    """
+    Hitung sha1 isi file dalam satu pass, opsional sekaligus sha1 dari
+    sejumlah byte pertama
+
+    Parameters:
+    - path: Lokasi file
+    - panjang_prefiks: Jumlah byte prefiks yang di-hash terpisah (None = tidak)
+
+    Returns:
+    - Tuple (hash seluruh file, hash prefiks atau None)
+    """
+    hasher, hash_prefiks, dibaca = hashlib.sha1(), None, 0
+    with open(path, "rb") as f:
+        while True:
+            potongan = f.read(UKURAN_POTONGAN)
+            if panjang_prefiks is not None and hash_prefiks is None and dibaca + len(potongan) >= panjang_prefiks:
+                salinan = hasher.copy()
+                salinan.update(potongan[:panjang_prefiks - dibaca])
+                hash_prefiks = salinan.hexdigest()
+            if not potongan:
+                break
+            hasher.update(potongan)
+            dibaca += len(potongan)
+    return hasher.hexdigest(), hash_prefiks
+
+
+class PemantauFile:
+    """
+    Status terakhir satu file sumber (stat dan hash isi) untuk menentukan
+    jenis perubahan sejak pemeriksaan sebelumnya
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.stat = None
+        self.hash = None
+
+    def berubah(self):
+        """
+        Cek apakah stat file berbeda dari yang terakhir diproses (tanpa hash)
+
+        Returns:
+        - True jika mtime/ukuran berubah
+        """
+        return stat_file(self.path) != self.stat
+
+    def periksa(self):
+        """
+        Tentukan jenis perubahan file sejak pemeriksaan terakhir dan simpan
+        status barunya
+
+        Returns:
+        - None jika stat tidak berubah, 'baru' pada pemeriksaan pertama,
+          'sama' jika isi identik (hanya mtime berubah), 'tambah' jika isi
+          lama utuh dan hanya ada byte baru di akhir, 'hilang' jika file
+          tidak ada, atau 'ubah'
+        """
+        stat = stat_file(self.path)
+        if stat == self.stat:
+            return None
+        if stat is None:
+            self.stat, self.hash = None, None
+            return 'hilang'
+        ukuran_lama = self.stat[1] if self.stat else None
+        hash_baru, hash_prefiks = hash_file(self.path, ukuran_lama if ukuran_lama and stat[1] > ukuran_lama else None)
+        hash_lama, self.stat, self.hash = self.hash, stat, hash_baru
+        if hash_lama is None:
+            return 'baru'
+        if hash_baru == hash_lama:
+            return 'sama'
+        return 'tambah' if hash_prefiks == hash_lama else 'ubah'
+
+
+def tunggu_tenang(pemantau, jeda=JEDA_TENANG, batas_tunggu=60.0):
+    """
+    Tunggu hingga stat semua file tidak berubah selama jeda tertentu, agar
+    rentetan penulisan (ekspor bertahap, penyalinan) dibaca sekali saja
+
+    Parameters:
+    - pemantau: List PemantauFile
+    - jeda: Lama (detik) tanpa perubahan stat
+    - batas_tunggu: Lama maksimum menunggu (detik) sebelum tetap dibaca
+
+    Returns:
+    - True jika file sudah tenang, False jika batas tunggu terlampaui
+    """
+    mulai = time.monotonic()
+    terakhir = [stat_file(p.path) for p in pemantau]
+    while time.monotonic() - mulai < batas_tunggu:
+        time.sleep(jeda)
+        sekarang = [stat_file(p.path) for p in pemantau]
+        if sekarang == terakhir:
+            return True
+        terakhir = sekarang
+    return False
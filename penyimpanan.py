@@ -0,0 +1,471 @@
+import argparse
+import csv
+import json
+import os
+import struct
+import sys
+import numpy as np
+from kuesioner import (
+    UKURAN_BLOK, KEBIJAKAN_TIDAK_VALID, muat_skema, dengan_bobot, pilih_kolom_pertanyaan, validasi_jawaban,
+    validasi_bobot, gabung_laporan_validasi
+)
+
+# =====================================================
+# FORMAT FILE KODE (.ksr)
+# =====================================================
+# Susunan file:
+#   MAGIC (6 byte) + panjang header (uint32, little-endian) + header JSON
+#   (dipad spasi hingga kelipatan 64 byte) + payload int8 baris-mayor
+# Jumlah responden tidak disimpan di header, melainkan dihitung dari ukuran
+# payload, sehingga baris baru cukup ditambahkan di akhir file.
+# Bobot survei (jika skema memiliki kolom bobot) disimpan di file pendamping
+# <file>.ksr.bobot berisi float64 per responden dengan urutan yang sama.
+MAGIC = b"KSNR\x00\x01"
+PERATAAN_HEADER = 64
+
+
+def tulis_header(f, kolom, skema, sumber=None):
+    """
+    Tulis header file kode
+
+    Parameters:
+    - f: File biner yang terbuka untuk ditulis (posisi di awal)
+    - kolom: Nama kolom pertanyaan
+    - skema: Skema terkompilasi
+    - sumber: Dictionary opsional informasi file sumber (path, mtime, size)
+
+    Returns:
+    - Offset awal payload dalam byte
+    """
+    header = json.dumps({
+        'kolom': [str(k) for k in kolom],
+        'label': skema['label'],
+        'skor': skema['skor'].tolist(),
+        'nama_skema': skema['nama_skema'],
+        'kolom_bobot': skema.get('kolom_bobot'),
+        'sumber': sumber,
+    }).encode("utf-8")
+    offset = len(MAGIC) + 4 + len(header)
+    padding = (-offset) % PERATAAN_HEADER
+    f.write(MAGIC + struct.pack("<I", len(header) + padding) + header + b" " * padding)
+    return offset + padding
+
+
+def baca_header(path):
+    """
+    Baca header file kode
+
+    Parameters:
+    - path: Lokasi file .ksr
+
+    Returns:
+    - Tuple (header, offset_payload)
+    """
+    with open(path, "rb") as f:
+        awal = f.read(len(MAGIC) + 4)
+        if len(awal) < len(MAGIC) + 4 or awal[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} bukan file kode kuesioner")
+        (panjang,) = struct.unpack("<I", awal[len(MAGIC):])
+        header = json.loads(f.read(panjang).decode("utf-8"))
+    return header, len(MAGIC) + 4 + panjang
+
+
+def buka_kode(path, skema=None):
+    """
+    Buka file kode sebagai np.memmap read-only tanpa memuat isinya ke RAM
+
+    Parameters:
+    - path: Lokasi file .ksr
+    - skema: Skema terkompilasi opsional untuk dicek kecocokan labelnya
+
+    Returns:
+    - Tuple (kode, header): kode berupa np.memmap int8 (responden x pertanyaan)
+    """
+    header, offset = baca_header(path)
+    if skema is not None and header['label'] != skema['label']:
+        raise ValueError(f"Label skala pada {path} ({header['label']}) tidak cocok dengan skema ({skema['label']})")
+    n_pertanyaan = len(header['kolom'])
+    ukuran_payload = os.path.getsize(path) - offset
+    n_responden = ukuran_payload // n_pertanyaan if n_pertanyaan else 0
+    if n_responden == 0:
+        return np.zeros((0, n_pertanyaan), dtype=np.int8), header
+    kode = np.memmap(path, dtype=np.int8, mode="r", offset=offset, shape=(n_responden, n_pertanyaan))
+    return kode, header
+
+
+def path_bobot(path):
+    """
+    Lokasi file pendamping bobot survei untuk file kode
+
+    Parameters:
+    - path: Lokasi file .ksr
+
+    Returns:
+    - Path file bobot
+    """
+    return f"{path}.bobot"
+
+
+def buka_bobot(path, skema=None):
+    """
+    Buka bobot survei file kode sebagai np.memmap float64 read-only
+
+    Parameters:
+    - path: Lokasi file .ksr
+    - skema: Skema terkompilasi opsional; jika skema memakai kolom bobot,
+      file kode wajib menyimpan bobot dari kolom yang sama
+
+    Returns:
+    - Array bobot per responden, atau None jika file kode tidak berbobot
+    """
+    header, _ = baca_header(path)
+    kolom_bobot = header.get('kolom_bobot')
+    if skema is not None and skema['kolom_bobot'] != kolom_bobot:
+        if skema['kolom_bobot'] is None:
+            return None
+        raise ValueError(f"{path} tidak menyimpan bobot dari kolom {skema['kolom_bobot']!r} "
+                         f"(tersimpan: {kolom_bobot!r}); konversi ulang dengan skema berbobot")
+    if kolom_bobot is None:
+        return None
+    if not os.path.exists(path_bobot(path)):
+        raise ValueError(f"File bobot {path_bobot(path)} tidak ditemukan")
+    if not os.path.getsize(path_bobot(path)):
+        return np.zeros(0)
+    return np.memmap(path_bobot(path), dtype=np.float64, mode="r")
+
+
+def iter_blok_kode(path, ukuran_blok=UKURAN_BLOK, mulai=0, akhir=None):
+    """
+    Baca file kode per blok baris. Setiap blok dipetakan dengan np.memmap
+    tersendiri lalu dilepas, sehingga halaman file yang sudah diproses tidak
+    menumpuk di memori proses.
+
+    Parameters:
+    - path: Lokasi file .ksr
+    - ukuran_blok: Jumlah baris per blok
+    - mulai: Indeks baris pertama yang dibaca (mis. baris yang baru ditambahkan)
+    - akhir: Batas baris (eksklusif); None = hingga akhir file
+
+    Returns:
+    - Generator blok np.memmap int8 (baris x pertanyaan)
+    """
+    header, offset = baca_header(path)
+    n_pertanyaan = len(header['kolom'])
+    if n_pertanyaan == 0:
+        return
+    n_responden = (os.path.getsize(path) - offset) // n_pertanyaan
+    if akhir is not None:
+        n_responden = min(n_responden, akhir)
+    for awal in range(mulai, n_responden, ukuran_blok):
+        n_baris = min(ukuran_blok, n_responden - awal)
+        blok = np.memmap(path, dtype=np.int8, mode="r", offset=offset + awal * n_pertanyaan, shape=(n_baris, n_pertanyaan))
+        yield blok
+        del blok
+
+
+def tulis_kode(path, kode, kolom, skema, sumber=None, ukuran_blok=UKURAN_BLOK, bobot=None):
+    """
+    Simpan matriks kode ke file .ksr
+
+    Parameters:
+    - path: Lokasi file tujuan
+    - kode: Matriks kode int8 (responden x pertanyaan)
+    - kolom: Nama kolom pertanyaan
+    - skema: Skema terkompilasi
+    - sumber: Informasi file sumber opsional
+    - ukuran_blok: Jumlah baris per penulisan
+    - bobot: Bobot survei per responden (wajib jika skema memiliki kolom bobot)
+    """
+    if (bobot is None) != (skema.get('kolom_bobot') is None):
+        raise ValueError("Bobot harus diberikan tepat jika skema memiliki kolom bobot")
+    with open(path, "wb") as f:
+        tulis_header(f, kolom, skema, sumber)
+        for awal in range(0, len(kode), ukuran_blok):
+            f.write(np.ascontiguousarray(kode[awal:awal + ukuran_blok], dtype=np.int8).tobytes())
+    if bobot is not None:
+        with open(path_bobot(path), "wb") as f:
+            f.write(np.ascontiguousarray(bobot, dtype=np.float64).tobytes())
+
+
+def tambah_kode(path, kode, bobot=None):
+    """
+    Tambahkan baris kode baru di akhir file .ksr yang sudah ada
+
+    Parameters:
+    - path: Lokasi file .ksr
+    - kode: Matriks kode int8 baru dengan jumlah kolom yang sama
+    - bobot: Bobot survei baris baru (wajib jika file kode berbobot)
+    """
+    header, _ = baca_header(path)
+    kode = np.asarray(kode, dtype=np.int8)
+    if kode.ndim != 2 or kode.shape[1] != len(header['kolom']):
+        raise ValueError(f"Jumlah kolom tidak cocok: {kode.shape} vs {len(header['kolom'])} pertanyaan")
+    if (bobot is None) != (header.get('kolom_bobot') is None) or (bobot is not None and len(bobot) != len(kode)):
+        raise ValueError(f"{path}: bobot harus diberikan untuk setiap baris baru tepat jika file kode berbobot")
+    with open(path, "ab") as f:
+        f.write(np.ascontiguousarray(kode).tobytes())
+    if bobot is not None:
+        with open(path_bobot(path), "ab") as f:
+            f.write(np.ascontiguousarray(bobot, dtype=np.float64).tobytes())
+
+
+# =====================================================
+# KONVERSI DARI EXCEL/CSV SECARA BERBLOK
+# =====================================================
+def baca_blok_tabel(path, sheet="Kuesioner", ukuran_blok=UKURAN_BLOK):
+    """
+    Baca file Excel/CSV per blok baris tanpa memuat seluruh isi ke memori
+
+    Parameters:
+    - path: Lokasi file .xlsx atau .csv
+    - sheet: Nama sheet (khusus Excel)
+    - ukuran_blok: Jumlah baris per blok
+
+    Returns:
+    - Generator tuple (kolom, blok) dengan blok berupa list baris
+    """
+    if str(path).lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            pembaca = csv.reader(f)
+            kolom = next(pembaca, [])
+            blok = []
+            for baris in pembaca:
+                # Lewati baris yang seluruh selnya kosong (sisa format di Excel)
+                if not any(v not in (None, '') for v in baris):
+                    continue
+                blok.append(baris)
+                if len(blok) == ukuran_blok:
+                    yield kolom, blok
+                    blok = []
+            if blok:
+                yield kolom, blok
+        return
+
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        baris_iter = wb[sheet].iter_rows(values_only=True)
+        kolom = list(next(baris_iter, []))
+        blok = []
+        for baris in baris_iter:
+            # Lewati baris yang seluruh selnya kosong (sisa format di Excel)
+            if not any(v not in (None, '') for v in baris):
+                continue
+            blok.append(baris)
+            if len(blok) == ukuran_blok:
+                yield kolom, blok
+                blok = []
+        if blok:
+            yield kolom, blok
+    finally:
+        wb.close()
+
+
+def info_sumber(path):
+    """
+    Ambil informasi identitas file sumber (path absolut, mtime, ukuran)
+
+    Parameters:
+    - path: Lokasi file sumber
+
+    Returns:
+    - Dictionary informasi sumber
+    """
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def encode_tabel(sumber, skema, kebijakan='missing', ukuran_blok=UKURAN_BLOK):
+    """
+    Baca dan validasi file Excel/CSV per blok
+
+    Parameters:
+    - sumber: File Excel/CSV sumber
+    - skema: Skema terkompilasi
+    - kebijakan: Kebijakan sel tidak valid ('drop', 'missing', 'fail')
+    - ukuran_blok: Jumlah baris per blok
+
+    Returns:
+    - Generator tuple (kolom_pertanyaan, kode_blok, laporan_blok, bobot_blok,
+      baris_blok); bobot_blok None jika skema tidak memiliki kolom bobot,
+      baris_blok berisi nomor baris data (mulai 0) pada file sumber untuk
+      setiap baris kode_blok (berbeda dari urutan jika kebijakan 'drop')
+    """
+    n_dibaca = 0
+    kolom_q = None
+    kolom_bobot = skema.get('kolom_bobot')
+    for kolom, blok in baca_blok_tabel(sumber, skema['sheet'], ukuran_blok):
+        if kolom_q is None:
+            kolom_q = pilih_kolom_pertanyaan(kolom, skema)
+            posisi = [kolom.index(k) for k in kolom_q]
+            if kolom_bobot is not None and kolom_bobot not in kolom:
+                raise ValueError(f"Kolom bobot {kolom_bobot!r} tidak ditemukan di {sumber}")
+        tabel = np.array(blok, dtype=object)
+        nilai = tabel[:, posisi] if posisi else np.empty((len(blok), 0), dtype=object)
+        kode, baris_dipakai, laporan = validasi_jawaban(nilai, skema['label'], kolom_q, kebijakan, n_dibaca)
+        bobot = None
+        if kolom_bobot is not None:
+            bobot = validasi_bobot(tabel[:, kolom.index(kolom_bobot)], kolom_bobot, n_dibaca)[baris_dipakai]
+        baris = n_dibaca + np.flatnonzero(baris_dipakai)
+        n_dibaca += len(blok)
+        yield kolom_q, kode, laporan, bobot, baris
+    if kolom_q is None:
+        raise ValueError(f"{sumber} tidak berisi data")
+
+
+def muat_kode_tabel(sumber, skema, kebijakan='missing', ukuran_blok=UKURAN_BLOK):
+    """
+    Muat seluruh file Excel/CSV sebagai matriks kode di memori
+
+    Parameters:
+    - sumber: File Excel/CSV sumber
+    - skema: Skema terkompilasi
+    - kebijakan: Kebijakan sel tidak valid
+    - ukuran_blok: Jumlah baris per blok pembacaan
+
+    Returns:
+    - Tuple (kode, kolom_pertanyaan, laporan_validasi, bobot); bobot None
+      jika skema tidak memiliki kolom bobot
+    """
+    kode_blok, laporan_blok, bobot_blok, kolom_q = [], [], [], []
+    for kolom_q, kode, laporan, bobot, _ in encode_tabel(sumber, skema, kebijakan, ukuran_blok):
+        kode_blok.append(kode)
+        laporan_blok.append(laporan)
+        bobot_blok.append(bobot)
+    bobot = None if skema.get('kolom_bobot') is None else np.concatenate(bobot_blok)
+    return np.concatenate(kode_blok), kolom_q, gabung_laporan_validasi(laporan_blok), bobot
+
+
+def konversi_ke_kode(sumber, tujuan, skema, kebijakan='missing', ukuran_blok=UKURAN_BLOK):
+    """
+    Konversi file Excel/CSV menjadi file kode .ksr secara berblok
+
+    Parameters:
+    - sumber: File Excel/CSV sumber
+    - tujuan: File .ksr tujuan
+    - skema: Skema terkompilasi
+    - kebijakan: Kebijakan sel tidak valid ('drop', 'missing', 'fail')
+    - ukuran_blok: Jumlah baris per blok
+
+    Returns:
+    - Dictionary ringkasan konversi: jumlah responden, kolom, laporan validasi
+    """
+    n_responden = 0
+    kolom_q = None
+    laporan_blok = []
+    sementara = f"{tujuan}.{os.getpid()}.tmp"
+    berbobot = skema.get('kolom_bobot') is not None
+    try:
+        with open(sementara, "wb") as f, open(path_bobot(sementara) if berbobot else os.devnull, "wb") as f_bobot:
+            for kolom_q, kode, laporan, bobot, _ in encode_tabel(sumber, skema, kebijakan, ukuran_blok):
+                if not laporan_blok:
+                    tulis_header(f, kolom_q, skema, info_sumber(sumber))
+                f.write(np.ascontiguousarray(kode).tobytes())
+                if berbobot:
+                    f_bobot.write(np.ascontiguousarray(bobot, dtype=np.float64).tobytes())
+                n_responden += len(kode)
+                laporan_blok.append(laporan)
+        # Bobot dipindahkan lebih dulu: file kode yang tampak valid selalu punya bobotnya
+        if berbobot:
+            os.replace(path_bobot(sementara), path_bobot(tujuan))
+        os.replace(sementara, tujuan)
+    finally:
+        for path in (sementara, path_bobot(sementara)):
+            if os.path.exists(path):
+                os.remove(path)
+    laporan = gabung_laporan_validasi(laporan_blok)
+    return {'n_responden': n_responden, 'kolom': kolom_q, 'total_tidak_valid': laporan['total_tidak_valid'], 'laporan': laporan}
+
+
+# =====================================================
+# CACHE FILE KODE
+# =====================================================
+def path_cache(sumber, skema, kebijakan='missing', folder=None):
+    """
+    Tentukan lokasi file cache .ksr untuk suatu file sumber. Nama file memuat
+    sidik jari skema dan kebijakan, sehingga skema lain memakai cache lain.
+
+    Parameters:
+    - sumber: File Excel/CSV sumber
+    - skema: Skema terkompilasi
+    - kebijakan: Kebijakan sel tidak valid
+    - folder: Folder cache (default .cache_kuesioner di samping file sumber)
+
+    Returns:
+    - Path file cache
+    """
+    sumber = os.path.abspath(sumber)
+    folder = folder or os.path.join(os.path.dirname(sumber), ".cache_kuesioner")
+    return os.path.join(folder, f"{os.path.basename(sumber)}.{skema['sidik_jari'][:12]}.{kebijakan}.ksr")
+
+
+def cache_valid(path, sumber):
+    """
+    Cek apakah file cache masih sesuai dengan file sumber (mtime dan ukuran)
+
+    Parameters:
+    - path: File cache .ksr
+    - sumber: File sumber
+
+    Returns:
+    - True jika cache dapat dipakai
+    """
+    try:
+        header, _ = baca_header(path)
+        info = info_sumber(sumber)
+    except (OSError, ValueError):
+        return False
+    tersimpan = header.get('sumber') or {}
+    if header.get('kolom_bobot') is not None and not os.path.exists(path_bobot(path)):
+        return False
+    return tersimpan.get('mtime_ns') == info['mtime_ns'] and tersimpan.get('size') == info['size']
+
+
+def siapkan_cache(sumber, skema, kebijakan='missing', folder=None, ukuran_blok=UKURAN_BLOK):
+    """
+    Pastikan cache .ksr untuk file sumber tersedia dan masih valid. Jika
+    cache dingin, file sumber dibaca (openpyxl diimpor hanya saat itu).
+
+    Parameters:
+    - sumber: File Excel/CSV sumber
+    - skema: Skema terkompilasi
+    - kebijakan: Kebijakan sel tidak valid
+    - folder: Folder cache opsional
+    - ukuran_blok: Jumlah baris per blok saat konversi
+
+    Returns:
+    - Tuple (path_cache, hangat): hangat=True jika cache sudah ada sebelumnya
+    """
+    path = path_cache(sumber, skema, kebijakan, folder)
+    if cache_valid(path, sumber):
+        return path, True
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    konversi_ke_kode(sumber, path, skema, kebijakan, ukuran_blok)
+    return path, False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Konversi data kuesioner ke file kode int8 (.ksr) untuk np.memmap")
+    parser.add_argument("sumber", help="File Excel/CSV sumber")
+    parser.add_argument("tujuan", help="File .ksr tujuan")
+    parser.add_argument("--schema", default=None, help="File skema JSON")
+    parser.add_argument("--weight", default=None, metavar="KOLOM",
+                        help="Kolom bobot survei yang disimpan bersama kode (menggantikan 'bobot' pada skema)")
+    parser.add_argument("--invalid-policy", choices=KEBIJAKAN_TIDAK_VALID, default="missing")
+    parser.add_argument("--block-size", type=int, default=UKURAN_BLOK, help="Jumlah baris per blok")
+    args = parser.parse_args()
+
+    skema = muat_skema(args.schema)
+    if args.weight:
+        skema = dengan_bobot(skema, args.weight)
+    try:
+        hasil = konversi_ke_kode(args.sumber, args.tujuan, skema, args.invalid_policy, args.block_size)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    print(f"{hasil['n_responden']} responden x {len(hasil['kolom'])} pertanyaan -> {args.tujuan} "
+          f"({hasil['total_tidak_valid']} sel tidak valid)")
+
+
+if __name__ == "__main__":
+    main()
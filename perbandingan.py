@@ -0,0 +1,299 @@
+import argparse
+import json
+import os
+import sys
+import numpy as np
+from scipy.special import chdtrc, ndtr
+from statsmodels.stats.multitest import multipletests
+from kuesioner import nilai_json
+from answer import tambah_argumen_data, skema_dari_argumen, daftar_sumber, muat_ringkasan
+
+METODE_KOREKSI = ["fdr_bh", "fdr_by", "holm", "bonferroni", "sidak", "none"]
+
+# =====================================================
+# UJI SIGNIFIKANSI DARI TABEL KONTINGENSI
+# =====================================================
+# Semua uji dihitung dari tensor frekuensi gelombang x pertanyaan x level
+# (hasil ringkas_frekuensi tiap sumber), bukan dari baris responden, dan
+# tervektorisasi untuk semua pertanyaan sekaligus. Biaya tidak bergantung
+# pada jumlah responden.
+
+def susun_frekuensi(ringkasan_gelombang):
+    """
+    Selaraskan matriks frekuensi beberapa gelombang menurut nama kolom
+    pertanyaan (hanya pertanyaan yang ada di semua gelombang). Frekuensi
+    berbobot diskalakan ke ukuran sampel efektif Kish per pertanyaan, sehingga
+    proporsi mengikuti bobot tetapi uji tidak memperlakukan jumlah bobot
+    sebagai jumlah responden.
+
+    Parameters:
+    - ringkasan_gelombang: List dictionary hasil ringkas_frekuensi
+
+    Returns:
+    - Tuple (kolom, frekuensi): nama pertanyaan dan array int64 (float64 jika
+      ada gelombang berbobot) (gelombang x pertanyaan x level)
+    """
+    kolom = [k for k in ringkasan_gelombang[0]['kolom'] if all(k in r['kolom'] for r in ringkasan_gelombang[1:])]
+    berbobot = any(r['berbobot'] for r in ringkasan_gelombang)
+    tabel = []
+    for r in ringkasan_gelombang:
+        posisi = [r['kolom'].index(k) for k in kolom]
+        frekuensi = np.asarray(r['frekuensi'], dtype=float)[posisi]
+        if r['berbobot']:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                skala = np.nan_to_num(np.asarray(r['n_efektif'])[posisi] / np.asarray(r['n_valid'])[posisi])
+            frekuensi = frekuensi * skala[:, None]
+        tabel.append(frekuensi)
+    frekuensi = np.stack(tabel) if tabel else np.zeros((0, 0, 0))
+    return kolom, frekuensi if berbobot else frekuensi.astype(np.int64)
+
+
+def uji_chi_kuadrat(frekuensi):
+    """
+    Uji chi-kuadrat homogenitas per pertanyaan pada tabel gelombang x level.
+    Level yang tidak pernah dipilih di gelombang mana pun tidak dihitung
+    dalam derajat bebas.
+
+    Parameters:
+    - frekuensi: Array (gelombang x pertanyaan x level)
+
+    Returns:
+    - Dictionary array per pertanyaan: statistik, df, p, cramer_v
+    """
+    frekuensi = np.asarray(frekuensi, dtype=float)
+    total_gelombang = frekuensi.sum(axis=2, keepdims=True)
+    total_level = frekuensi.sum(axis=0, keepdims=True)
+    n = frekuensi.sum(axis=(0, 2))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        harapan = total_gelombang * total_level / n[None, :, None]
+        statistik = np.where(harapan > 0, (frekuensi - harapan) ** 2 / harapan, 0.0).sum(axis=(0, 2))
+        n_level = (total_level[0] > 0).sum(axis=1)
+        n_gelombang = (total_gelombang[:, :, 0] > 0).sum(axis=0)
+        df = (n_gelombang - 1) * (n_level - 1)
+        p = np.where(df > 0, chdtrc(np.maximum(df, 1), statistik), np.nan)
+        cramer_v = np.sqrt(statistik / (n * np.maximum(np.minimum(n_gelombang, n_level) - 1, 1)))
+    return {'statistik': statistik, 'df': df, 'p': p, 'cramer_v': np.where(df > 0, cramer_v, np.nan)}
+
+
+def jumlah_peringkat(frekuensi, skor):
+    """
+    Jumlah peringkat per gelombang dengan peringkat tengah (midrank) untuk
+    nilai kembar; setiap level skor adalah satu kelompok kembar
+
+    Parameters:
+    - frekuensi: Array (gelombang x pertanyaan x level)
+    - skor: Skor per level
+
+    Returns:
+    - Tuple (jumlah_peringkat (gelombang x pertanyaan), n_gelombang (gelombang x pertanyaan),
+      n (pertanyaan,), koreksi_kembar sum(t^3 - t) per pertanyaan)
+    """
+    urutan = np.argsort(skor, kind='stable')
+    frekuensi = np.asarray(frekuensi, dtype=float)[:, :, urutan]
+    kembar = frekuensi.sum(axis=0)
+    peringkat_tengah = np.cumsum(kembar, axis=1) - kembar + (kembar + 1) / 2
+    return (
+        (frekuensi * peringkat_tengah[None]).sum(axis=2),
+        frekuensi.sum(axis=2),
+        kembar.sum(axis=1),
+        (kembar ** 3 - kembar).sum(axis=1),
+    )
+
+
+def uji_kruskal_wallis(frekuensi, skor):
+    """
+    Uji Kruskal-Wallis per pertanyaan (dengan koreksi nilai kembar),
+    setara scipy.stats.kruskal pada skor mentah
+
+    Parameters:
+    - frekuensi: Array (gelombang x pertanyaan x level)
+    - skor: Skor per level
+
+    Returns:
+    - Dictionary array per pertanyaan: statistik (H), df, p, epsilon2
+    """
+    r, n_g, n, kembar = jumlah_peringkat(frekuensi, skor)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        h = 12 / (n * (n + 1)) * np.where(n_g > 0, r ** 2 / n_g, 0.0).sum(axis=0) - 3 * (n + 1)
+        h = h / (1 - kembar / (n ** 3 - n))
+        df = (n_g > 0).sum(axis=0) - 1
+        p = np.where(df > 0, chdtrc(np.maximum(df, 1), h), np.nan)
+        epsilon2 = h / (n - 1)
+    return {'statistik': h, 'df': df, 'p': p, 'epsilon2': epsilon2}
+
+
+def uji_mann_whitney(frekuensi, skor):
+    """
+    Uji Mann-Whitney U dua sisi per pertanyaan untuk dua gelombang
+    (pendekatan normal dengan koreksi nilai kembar dan kontinuitas, setara
+    scipy.stats.mannwhitneyu(method='asymptotic'))
+
+    Parameters:
+    - frekuensi: Array (2 x pertanyaan x level)
+    - skor: Skor per level
+
+    Returns:
+    - Dictionary array per pertanyaan: statistik (U gelombang pertama), z, p,
+      rank_biserial (positif jika gelombang pertama cenderung lebih tinggi)
+    """
+    r, n_g, n, kembar = jumlah_peringkat(frekuensi, skor)
+    n1, n2 = n_g
+    u = r[0] - n1 * (n1 + 1) / 2
+    rata = n1 * n2 / 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sd = np.sqrt(n1 * n2 / 12 * ((n + 1) - kembar / (n * (n - 1))))
+        z = (np.abs(u - rata) - 0.5) / sd
+        p = np.minimum(2 * ndtr(-z), 1.0)
+        rank_biserial = 2 * u / (n1 * n2) - 1
+    return {'statistik': u, 'z': np.sign(u - rata) * z, 'p': p, 'rank_biserial': rank_biserial}
+
+
+def koreksi_p(p, metode="fdr_bh"):
+    """
+    Koreksi perbandingan berganda (statsmodels multipletests); nilai NaN
+    (uji tidak terdefinisi) dilewati
+
+    Parameters:
+    - p: Array p-value
+    - metode: Metode multipletests, atau 'none'
+
+    Returns:
+    - Array p-value terkoreksi
+    """
+    p = np.asarray(p, dtype=float)
+    hasil = p.copy()
+    valid = ~np.isnan(p)
+    if metode != "none" and valid.any():
+        hasil[valid] = multipletests(p[valid], method=metode)[1]
+    return hasil
+
+
+def bandingkan_gelombang(ringkasan_gelombang, skema, metode_koreksi="fdr_bh", alpha=0.05):
+    """
+    Bandingkan beberapa gelombang survei per pertanyaan: chi-kuadrat pada
+    frekuensi level dan Mann-Whitney (2 gelombang) atau Kruskal-Wallis
+    (lebih dari 2) pada skor, masing-masing dikoreksi untuk jumlah pertanyaan
+
+    Parameters:
+    - ringkasan_gelombang: List dictionary hasil ringkas_frekuensi (minimal 2)
+    - skema: Skema terkompilasi
+    - metode_koreksi: Metode koreksi perbandingan berganda (lihat METODE_KOREKSI)
+    - alpha: Taraf signifikansi setelah koreksi
+
+    Returns:
+    - Dictionary siap JSON: info uji dan hasil per pertanyaan
+    """
+    if len(ringkasan_gelombang) < 2:
+        raise ValueError("Perbandingan membutuhkan minimal 2 gelombang")
+    kolom, frekuensi = susun_frekuensi(ringkasan_gelombang)
+    if not kolom:
+        raise ValueError("Tidak ada kolom pertanyaan yang sama di semua gelombang")
+    skor = skema['skor']
+
+    chi = uji_chi_kuadrat(frekuensi)
+    chi['p_koreksi'] = koreksi_p(chi['p'], metode_koreksi)
+    if len(ringkasan_gelombang) == 2:
+        nama_uji_skor, peringkat = 'mann_whitney', uji_mann_whitney(frekuensi, skor)
+    else:
+        nama_uji_skor, peringkat = 'kruskal_wallis', uji_kruskal_wallis(frekuensi, skor)
+    peringkat['p_koreksi'] = koreksi_p(peringkat['p'], metode_koreksi)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rata_rata = (frekuensi @ skor) / frekuensi.sum(axis=2)
+
+    return {
+        'n_gelombang': len(ringkasan_gelombang),
+        'n_responden': [nilai_json(r['n_responden']) for r in ringkasan_gelombang],
+        'uji_skor': nama_uji_skor,
+        'koreksi': metode_koreksi,
+        'alpha': alpha,
+        'pertanyaan': [
+            {
+                'kolom': k,
+                'rata_rata': [nilai_json(v) for v in rata_rata[:, j]],
+                'n_valid': [nilai_json(v) for v in frekuensi[:, j].sum(axis=1)],
+                'chi_kuadrat': {kunci: nilai_json(nilai[j]) for kunci, nilai in chi.items()},
+                nama_uji_skor: {kunci: nilai_json(nilai[j]) for kunci, nilai in peringkat.items()},
+                'berubah': bool(min(
+                    np.nan_to_num(chi['p_koreksi'][j], nan=1.0), np.nan_to_num(peringkat['p_koreksi'][j], nan=1.0)
+                ) < alpha),
+            }
+            for j, k in enumerate(kolom)
+        ],
+    }
+
+
+def format_perbandingan(hasil, nama_gelombang):
+    """
+    Format hasil perbandingan gelombang sebagai tabel teks
+
+    Parameters:
+    - hasil: Hasil bandingkan_gelombang
+    - nama_gelombang: Nama singkat setiap gelombang
+
+    Returns:
+    - String tabel
+    """
+    uji = hasil['uji_skor']
+    judul_uji = {'mann_whitney': 'U', 'kruskal_wallis': 'H'}[uji]
+    format_p = lambda p: "-" if p is None else ("<0.001" if p < 0.001 else f"{p:.3f}")
+    baris = [
+        "Gelombang: " + ", ".join(f"{nama} (n={n})" for nama, n in zip(nama_gelombang, hasil['n_responden'])),
+        f"Koreksi: {hasil['koreksi']}, alpha={hasil['alpha']}; * = berubah signifikan",
+        f"{'butir':<10}" + "".join(f"{'rata ' + nama:>14}" for nama in nama_gelombang)
+        + f"{'chi2':>10}{'df':>4}{'p_kor':>8}{judul_uji:>12}{'p_kor':>8}",
+    ]
+    for q in hasil['pertanyaan']:
+        chi, peringkat = q['chi_kuadrat'], q[uji]
+        statistik = "-" if peringkat['statistik'] is None else f"{peringkat['statistik']:.1f}"
+        baris.append(
+            f"{q['kolom']:<10}"
+            + "".join(f"{'-' if v is None else f'{v:.2f}':>14}" for v in q['rata_rata'])
+            + f"{chi['statistik']:>10.2f}{chi['df']:>4}{format_p(chi['p_koreksi']):>8}"
+            + f"{statistik:>12}"
+            + f"{format_p(peringkat['p_koreksi']):>8}"
+            + (" *" if q['berubah'] else "")
+        )
+    return "\n".join(baris)
+
+
+def main():
+    parser = tambah_argumen_data(argparse.ArgumentParser(
+        description="Bandingkan gelombang survei per pertanyaan (chi-kuadrat, Mann-Whitney/Kruskal-Wallis)"
+    ))
+    parser.add_argument("--correction", choices=METODE_KOREKSI, default="fdr_bh",
+                        help="Koreksi perbandingan berganda (statsmodels multipletests)")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Taraf signifikansi setelah koreksi")
+    parser.add_argument("--format", choices=["teks", "json"], default="teks", help="Format keluaran")
+    args = parser.parse_args()
+    skema = skema_dari_argumen(args)
+    try:
+        sumber = daftar_sumber(args)
+    except ValueError as e:
+        parser.error(str(e))
+    if len(sumber) < 2:
+        parser.error("berikan minimal 2 gelombang, mis. --file gelombang1.xlsx gelombang2.xlsx")
+
+    ringkasan_gelombang, nama_gelombang = [], []
+    for lokasi in sumber:
+        nama_sumber = next(iter(lokasi.values()))
+        try:
+            ringkasan_gelombang.append(muat_ringkasan(args, skema, **lokasi))
+        except ValueError as e:
+            print(f"{nama_sumber}: {e}", file=sys.stderr)
+            sys.exit(1)
+        nama_gelombang.append(os.path.splitext(os.path.basename(nama_sumber))[0])
+
+    try:
+        hasil = bandingkan_gelombang(ringkasan_gelombang, skema, args.correction, args.alpha)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    if args.format == "json":
+        print(json.dumps({'gelombang': nama_gelombang, **hasil}, ensure_ascii=False, indent=2))
+    else:
+        print(format_perbandingan(hasil, nama_gelombang))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+import os
+import sys
+from collections import OrderedDict
+import numpy as np
+from kuesioner import iter_blok, periksa_kualitas_berblok, hitung_frekuensi_berblok
+from penyimpanan import buka_kode, buka_bobot, info_sumber, siapkan_cache
+
+# =====================================================
+# CACHE LRU BERBATAS BYTE
+# =====================================================
+# Ruang kerja menyimpan beberapa dataset sekaligus: matriks kode .ksr yang
+# sudah dibuka (np.memmap, halamannya dikelola page cache OS) beserta
+# ringkasannya. Batas cache dinyatakan dalam byte (bukan jumlah entri)
+# karena ukuran kuesioner sangat beragam; entri yang paling lama tidak
+# dipakai dibuang lebih dulu. Dataset yang terbuang dibuka ulang dari cache
+# .ksr di disk, tidak dari Excel.
+BATAS_CACHE = 512 * 1024 * 1024  # byte
+
+
+def ukuran_byte(objek):
+    """
+    Perkirakan ukuran memori suatu nilai cache: array numpy dihitung dari
+    nbytes (np.memmap hanya objeknya, isinya tetap di disk), container
+    ditelusuri, nilai lain memakai sys.getsizeof
+
+    Parameters:
+    - objek: Nilai yang disimpan di cache
+
+    Returns:
+    - Perkiraan jumlah byte
+    """
+    if isinstance(objek, np.memmap):
+        return sys.getsizeof(objek)
+    if isinstance(objek, np.ndarray):
+        return objek.nbytes
+    if isinstance(objek, dict):
+        return sys.getsizeof(objek) + sum(ukuran_byte(k) + ukuran_byte(v) for k, v in objek.items())
+    if isinstance(objek, (list, tuple)):
+        return sys.getsizeof(objek) + sum(ukuran_byte(v) for v in objek)
+    return sys.getsizeof(objek)
+
+
+class CacheLRU:
+    """
+    Cache LRU yang dibatasi total byte. Entri yang lebih besar dari batas
+    tidak disimpan (nilainya tetap dikembalikan ke pemanggil).
+    """
+
+    def __init__(self, batas_byte=BATAS_CACHE):
+        self.batas_byte = batas_byte
+        self.entri = OrderedDict()
+        self.total_byte = 0
+        self.hit = 0
+        self.miss = 0
+        self.eviksi = 0
+
+    def ambil(self, kunci, muat):
+        """
+        Ambil nilai dari cache, atau muat dan simpan jika belum ada
+
+        Parameters:
+        - kunci: Kunci hashable
+        - muat: Fungsi tanpa argumen yang menghasilkan nilai saat miss
+
+        Returns:
+        - Nilai untuk kunci
+        """
+        if kunci in self.entri:
+            self.entri.move_to_end(kunci)
+            self.hit += 1
+            return self.entri[kunci][0]
+        self.miss += 1
+        nilai = muat()
+        self.simpan(kunci, nilai)
+        return nilai
+
+    def simpan(self, kunci, nilai):
+        """
+        Simpan nilai sebagai entri terbaru, lalu buang entri terlama hingga
+        total byte kembali di bawah batas
+
+        Parameters:
+        - kunci: Kunci hashable
+        - nilai: Nilai yang disimpan
+        """
+        self.buang(kunci)
+        ukuran = ukuran_byte(nilai)
+        if ukuran > self.batas_byte:
+            return
+        self.entri[kunci] = (nilai, ukuran)
+        self.total_byte += ukuran
+        self.rapikan()
+
+    def buang(self, kunci):
+        """
+        Hapus satu entri dari cache jika ada
+
+        Parameters:
+        - kunci: Kunci hashable
+
+        Returns:
+        - True jika entri ditemukan
+        """
+        if kunci not in self.entri:
+            return False
+        self.total_byte -= self.entri.pop(kunci)[1]
+        return True
+
+    def rapikan(self):
+        """
+        Buang entri yang paling lama tidak dipakai hingga total byte tidak
+        melebihi batas
+        """
+        while self.total_byte > self.batas_byte and self.entri:
+            _, (_, ukuran) = self.entri.popitem(last=False)
+            self.total_byte -= ukuran
+            self.eviksi += 1
+
+    def atur_batas(self, batas_byte):
+        """
+        Ubah batas byte cache; entri terlama langsung dibuang jika perlu
+
+        Parameters:
+        - batas_byte: Batas baru dalam byte
+        """
+        self.batas_byte = batas_byte
+        self.rapikan()
+
+    def statistik(self):
+        """
+        Statistik pemakaian cache
+
+        Returns:
+        - Dictionary n_entri, total_byte, batas_byte, hit, miss, eviksi
+        """
+        return {
+            'n_entri': len(self.entri), 'total_byte': self.total_byte, 'batas_byte': self.batas_byte,
+            'hit': self.hit, 'miss': self.miss, 'eviksi': self.eviksi,
+        }
+
+
+# =====================================================
+# RUANG KERJA MULTI-SURVEI
+# =====================================================
+class RuangKerja:
+    """
+    Daftar dataset kuesioner (Excel/CSV atau .ksr) yang dapat dipindah-pindah
+    tanpa membaca ulang sumbernya. Matriks kode dan ringkasan disimpan di satu
+    CacheLRU berbatas byte; file Excel dikonversi sekali ke cache .ksr.
+    """
+
+    def __init__(self, skema, batas_byte=BATAS_CACHE, kebijakan='missing', folder_cache=None):
+        self.skema = skema
+        self.kebijakan = kebijakan
+        self.folder_cache = folder_cache
+        self.sumber = {}
+        self.cache = CacheLRU(batas_byte)
+
+    def daftarkan(self, path, nama=None):
+        """
+        Daftarkan satu file sumber ke ruang kerja (belum dimuat)
+
+        Parameters:
+        - path: File Excel/CSV atau file kode .ksr
+        - nama: Nama dataset (default nama file tanpa ekstensi, diberi
+          akhiran angka jika sudah dipakai)
+
+        Returns:
+        - Nama dataset
+        """
+        path = os.path.abspath(path)
+        for nama_lama, path_lama in self.sumber.items():
+            if path_lama == path:
+                return nama_lama
+        dasar = nama or os.path.splitext(os.path.basename(path))[0]
+        nama, i = dasar, 2
+        while nama in self.sumber:
+            nama, i = f"{dasar}_{i}", i + 1
+        self.sumber[nama] = path
+        return nama
+
+    def hapus(self, nama):
+        """
+        Keluarkan dataset dari ruang kerja beserta entri cache-nya
+
+        Parameters:
+        - nama: Nama dataset
+        """
+        self.sumber.pop(nama, None)
+        for kunci in [k for k in self.cache.entri if k[1] == nama]:
+            self.cache.buang(kunci)
+
+    def path_kode(self, nama):
+        """
+        Lokasi file kode .ksr untuk dataset; file Excel/CSV dikonversi ke
+        cache .ksr jika cache belum ada atau sudah usang
+
+        Parameters:
+        - nama: Nama dataset
+
+        Returns:
+        - Path file .ksr
+        """
+        if nama not in self.sumber:
+            raise ValueError(f"Dataset {nama!r} tidak terdaftar di ruang kerja")
+        path = self.sumber[nama]
+        if path.lower().endswith(".ksr"):
+            return path
+        return siapkan_cache(path, self.skema, self.kebijakan, self.folder_cache)[0]
+
+    def dataset(self, nama):
+        """
+        Ambil dataset dari cache, atau buka file .ksr-nya jika belum ada
+        (atau file sumbernya berubah sejak dibuka)
+
+        Parameters:
+        - nama: Nama dataset
+
+        Returns:
+        - Dictionary nama, path_kode, kunci (path, mtime_ns, size), header,
+          kode (np.memmap int8), dan bobot (np.memmap atau None)
+        """
+        if nama not in self.sumber:
+            raise ValueError(f"Dataset {nama!r} tidak terdaftar di ruang kerja")
+        info = info_sumber(self.sumber[nama])
+        kunci = ('kode', nama)
+        data = self.cache.entri.get(kunci, (None,))[0]
+        if data is not None and data['sidik_sumber'] != (info['mtime_ns'], info['size']):
+            self.cache.buang(kunci)
+        return self.cache.ambil(kunci, lambda: self.muat_dataset(nama, info))
+
+    def muat_dataset(self, nama, info):
+        """
+        Buka matriks kode dan bobot dataset dari file .ksr tanpa menyalinnya
+        ke RAM; isinya dibaca dari disk saat ringkasan dihitung
+
+        Parameters:
+        - nama: Nama dataset
+        - info: Informasi file sumber (lihat info_sumber)
+
+        Returns:
+        - Dictionary dataset (lihat dataset)
+        """
+        path = self.path_kode(nama)
+        kode, header = buka_kode(path, self.skema)
+        bobot = buka_bobot(path)
+        stat = os.stat(path)
+        return {
+            'nama': nama,
+            'path_kode': path,
+            'kunci': (path, stat.st_mtime_ns, stat.st_size),
+            'sidik_sumber': (info['mtime_ns'], info['size']),
+            'header': header,
+            'kode': kode,
+            'bobot': bobot,
+        }
+
+    def ringkasan(self, nama, batas_std=0.3, batas_longstring=10, exclude_flagged=False, berbobot=False, n_worker=1):
+        """
+        Matriks frekuensi dan jumlah respon tertandai untuk dataset, dihitung
+        berblok dari matriks kode dan disimpan di cache yang sama
+
+        Parameters:
+        - nama: Nama dataset
+        - batas_std: Batas standar deviasi skor untuk varians rendah
+        - batas_longstring: Batas panjang longstring
+        - exclude_flagged: Buang respon tertandai sebelum agregasi
+        - berbobot: Pakai bobot survei yang tersimpan di file kode
+        - n_worker: Jumlah thread agregasi
+
+        Returns:
+        - Tuple (frekuensi, jumlah_tanda) seperti ringkasan_store di app.py
+        """
+        info = info_sumber(self.sumber[nama]) if nama in self.sumber else {}
+        kunci = ('ringkasan', nama, info.get('mtime_ns'), info.get('size'), batas_std, batas_longstring, exclude_flagged, berbobot)
+
+        # Matriks kode hanya dibutuhkan saat ringkasan belum ada di cache
+        def hitung():
+            data = self.dataset(nama)
+            tertandai, jumlah_tanda = periksa_kualitas_berblok(
+                iter_blok(data['kode']), self.skema['skor_per_kode'], batas_std, batas_longstring, n_worker
+            )
+            frekuensi = hitung_frekuensi_berblok(
+                iter_blok(data['kode']), len(data['header']['kolom']), len(self.skema['label']),
+                ~tertandai if exclude_flagged else None, n_worker, data['bobot'] if berbobot else None
+            )
+            return frekuensi, jumlah_tanda
+
+        return self.cache.ambil(kunci, hitung)
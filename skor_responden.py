@@ -0,0 +1,306 @@
+import argparse
+import json
+import sys
+import numpy as np
+from kuesioner import ambil_baris, nilai_json, format_jumlah
+from answer import tambah_argumen_data, skema_dari_argumen, daftar_sumber, buka_blok, mask_dipakai
+
+# =====================================================
+# SKOR PER RESPONDEN
+# =====================================================
+# Skor responden dihitung dari matriks hitungan level per responden (satu
+# bincount per blok), lalu diringkas menjadi indeks kumulatif: nilai skor
+# unik terurut beserta jumlah responden kumulatif. Skor total dan rata-rata
+# hanya mengambil sedikit nilai berbeda, sehingga indeks jauh lebih kecil
+# dari jumlah responden dan kueri persentil/peringkat cukup searchsorted
+# (O(log nilai unik)).
+DESIMAL_INDEKS = 9  # pembulatan skor sebelum digabung antar blok (hindari selisih floating point)
+
+
+def daftar_ukuran(skema):
+    """
+    Daftar ukuran skor responden yang tersedia untuk skema
+
+    Parameters:
+    - skema: Skema terkompilasi
+
+    Returns:
+    - List nama ukuran: total, rata_rata, dan persen_<kategori>
+    """
+    return ['total', 'rata_rata'] + [f"persen_{k}" for k in skema['kategori']]
+
+
+def hitung_skor_responden(kode, skema):
+    """
+    Hitung skor total, rata-rata, dan persentase jawaban per kategori untuk
+    setiap responden dalam satu pass tervektorisasi
+
+    Parameters:
+    - kode: Matriks kode int8 (responden x pertanyaan)
+    - skema: Skema terkompilasi
+
+    Returns:
+    - Dictionary nama ukuran -> array per responden, ditambah n_terisi;
+      rata-rata dan persentase NaN untuk responden tanpa jawaban
+    """
+    kode = np.asarray(kode)
+    n_baris = kode.shape[0]
+    lebar = len(skema['label']) + 1
+    indeks = (kode.astype(np.intp) + (np.arange(n_baris, dtype=np.intp) * lebar)[:, None]).ravel()
+    per_level = np.bincount(indeks, minlength=n_baris * lebar).reshape(n_baris, lebar)[:, 1:]
+    n_terisi = per_level.sum(axis=1)
+    skor = {'total': (per_level @ skema['skor']).astype(float), 'n_terisi': n_terisi}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        skor['rata_rata'] = skor['total'] / n_terisi
+        per_kategori = per_level @ skema['matriks_kategori'] * 100 / n_terisi[:, None]
+    for i, nama in enumerate(skema['kategori']):
+        skor[f"persen_{nama}"] = per_kategori[:, i]
+    skor['total'] = np.where(n_terisi > 0, skor['total'], np.nan)
+    return skor
+
+
+def bangun_indeks_skor(blok_blok, skema, dipakai=None, bobot=None):
+    """
+    Bangun indeks kumulatif semua ukuran skor secara berblok. Memori
+    bergantung pada jumlah nilai skor unik, bukan jumlah responden.
+
+    Parameters:
+    - blok_blok: Iterable blok matriks kode
+    - skema: Skema terkompilasi
+    - dipakai: Mask boolean opsional per responden (seluruh dataset)
+    - bobot: Bobot survei opsional per responden (seluruh dataset)
+
+    Returns:
+    - Dictionary nama ukuran -> indeks berisi nilai (skor unik terurut),
+      kumulatif (jumlah responden/bobot dengan skor <= nilai), total,
+      dan kosong (responden tanpa jawaban)
+    """
+    ukuran = daftar_ukuran(skema)
+    nilai_blok = {u: [] for u in ukuran}
+    jumlah_blok = {u: [] for u in ukuran}
+    kosong = 0.0
+    awal = 0
+    for blok in blok_blok:
+        blok = np.asarray(blok)
+        n_baris = len(blok)
+        w = np.ones(n_baris) if bobot is None else np.asarray(bobot[awal:awal + n_baris], dtype=float)
+        if dipakai is not None:
+            terpakai = dipakai[awal:awal + n_baris]
+            blok, w = blok[terpakai], w[terpakai]
+        awal += n_baris
+        skor = hitung_skor_responden(blok, skema)
+        terisi = skor['n_terisi'] > 0
+        kosong += w[~terisi].sum()
+        for u in ukuran:
+            unik, invers = np.unique(np.round(skor[u][terisi], DESIMAL_INDEKS), return_inverse=True)
+            nilai_blok[u].append(unik)
+            jumlah_blok[u].append(np.bincount(invers.ravel(), weights=w[terisi], minlength=len(unik)))
+
+    indeks = {}
+    for u in ukuran:
+        # Gabungkan histogram antar blok: nilai yang sama dijumlahkan
+        nilai = np.concatenate(nilai_blok[u]) if nilai_blok[u] else np.zeros(0)
+        jumlah = np.concatenate(jumlah_blok[u]) if jumlah_blok[u] else np.zeros(0)
+        unik, invers = np.unique(nilai, return_inverse=True)
+        kumulatif = np.cumsum(np.bincount(invers.ravel(), weights=jumlah, minlength=len(unik)))
+        if bobot is None:
+            kumulatif = kumulatif.astype(np.int64)
+        indeks[u] = {
+            'nilai': unik,
+            'kumulatif': kumulatif,
+            'total': kumulatif[-1] if len(kumulatif) else 0,
+            'kosong': kosong if bobot is not None else int(kosong),
+        }
+    return indeks
+
+
+def jumlah_di_bawah(indeks, nilai, inklusif=False):
+    """
+    Jumlah responden dengan skor di bawah (atau sama dengan) nilai
+
+    Parameters:
+    - indeks: Indeks satu ukuran dari bangun_indeks_skor
+    - nilai: Skor pembanding
+    - inklusif: True untuk menghitung skor <= nilai
+
+    Returns:
+    - Jumlah responden (atau jumlah bobot)
+    """
+    nilai = round(float(nilai), DESIMAL_INDEKS)
+    posisi = np.searchsorted(indeks['nilai'], nilai, side='right' if inklusif else 'left')
+    return indeks['kumulatif'][posisi - 1] if posisi else indeks['kumulatif'].dtype.type(0)
+
+
+def jumlah_di_atas(indeks, ambang, inklusif=False):
+    """
+    Jumlah responden dengan skor di atas ambang
+
+    Parameters:
+    - indeks: Indeks satu ukuran dari bangun_indeks_skor
+    - ambang: Batas skor
+    - inklusif: True untuk menghitung skor >= ambang
+
+    Returns:
+    - Jumlah responden (atau jumlah bobot)
+    """
+    return indeks['total'] - jumlah_di_bawah(indeks, ambang, inklusif=not inklusif)
+
+
+def peringkat_persentil(indeks, nilai):
+    """
+    Peringkat dan persentil untuk suatu skor: peringkat 1 = skor tertinggi
+    (skor kembar berbagi peringkat terbaik), persentil memakai konvensi
+    titik tengah (di bawah + separuh yang sama)
+
+    Parameters:
+    - indeks: Indeks satu ukuran dari bangun_indeks_skor
+    - nilai: Skor yang dicari
+
+    Returns:
+    - Tuple (peringkat, persentil 0-100); persentil NaN jika indeks kosong
+    """
+    di_bawah = jumlah_di_bawah(indeks, nilai)
+    sampai = jumlah_di_bawah(indeks, nilai, inklusif=True)
+    peringkat = indeks['total'] - sampai + 1
+    if not indeks['total']:
+        return peringkat, np.nan
+    return peringkat, (di_bawah + (sampai - di_bawah) / 2) / indeks['total'] * 100
+
+
+def skor_pada_persentil(indeks, persen):
+    """
+    Skor terkecil yang mencakup persen responden (kebalikan persentil)
+
+    Parameters:
+    - indeks: Indeks satu ukuran dari bangun_indeks_skor
+    - persen: Persentil 0-100
+
+    Returns:
+    - Skor, atau NaN jika indeks kosong
+    """
+    if not indeks['total']:
+        return np.nan
+    target = min(max(persen, 0.0), 100.0) / 100 * indeks['total']
+    posisi = np.searchsorted(indeks['kumulatif'], max(target, 1e-12), side='left')
+    return float(indeks['nilai'][min(posisi, len(indeks['nilai']) - 1)])
+
+
+def histogram_indeks(indeks, n_bin=40):
+    """
+    Histogram skor dari indeks kumulatif (tanpa array per responden)
+
+    Parameters:
+    - indeks: Indeks satu ukuran dari bangun_indeks_skor
+    - n_bin: Jumlah bin maksimum
+
+    Returns:
+    - Tuple (jumlah per bin, tepi bin) seperti np.histogram
+    """
+    jumlah = np.diff(indeks['kumulatif'], prepend=0)
+    if len(indeks['nilai']) <= n_bin:
+        # Sedikit nilai unik (mis. skor total): satu batang per nilai
+        tepi = np.concatenate([indeks['nilai'] - 0.5, indeks['nilai'][-1:] + 0.5]) if len(jumlah) else np.zeros(1)
+        return jumlah, tepi
+    return np.histogram(indeks['nilai'], bins=n_bin, weights=jumlah)
+
+
+def ringkas_indeks(indeks):
+    """
+    Ringkasan satu indeks skor: jumlah, minimum, kuartil, maksimum
+
+    Parameters:
+    - indeks: Indeks satu ukuran dari bangun_indeks_skor
+
+    Returns:
+    - Dictionary siap JSON
+    """
+    return {
+        'n': nilai_json(indeks['total']),
+        'kosong': nilai_json(indeks['kosong']),
+        'n_nilai_unik': len(indeks['nilai']),
+        'minimum': nilai_json(indeks['nilai'][0]) if len(indeks['nilai']) else None,
+        'p25': nilai_json(skor_pada_persentil(indeks, 25)),
+        'median': nilai_json(skor_pada_persentil(indeks, 50)),
+        'p75': nilai_json(skor_pada_persentil(indeks, 75)),
+        'maksimum': nilai_json(indeks['nilai'][-1]) if len(indeks['nilai']) else None,
+    }
+
+
+def main():
+    parser = tambah_argumen_data(argparse.ArgumentParser(
+        description="Skor total/rata-rata/kategori per responden dengan kueri peringkat dan persentil"
+    ))
+    parser.add_argument("--metric", default="total",
+                        help="Ukuran skor: total, rata_rata, atau persen_<kategori> (mis. persen_positif)")
+    parser.add_argument("--respondent", type=int, nargs="+", default=None, metavar="NOMOR",
+                        help="Nomor responden (mulai 1, urutan data setelah filter --where) yang dicari peringkatnya")
+    parser.add_argument("--above", type=float, nargs="+", default=None, metavar="SKOR",
+                        help="Hitung responden dengan skor di atas nilai ini")
+    parser.add_argument("--percentile", type=float, nargs="+", default=None, metavar="P",
+                        help="Skor pada persentil P (0-100)")
+    parser.add_argument("--format", choices=["teks", "json"], default="teks", help="Format keluaran")
+    args = parser.parse_args()
+    skema = skema_dari_argumen(args)
+    if args.metric not in daftar_ukuran(skema):
+        parser.error(f"--metric harus salah satu dari {', '.join(daftar_ukuran(skema))}")
+    try:
+        sumber = daftar_sumber(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    hasil = []
+    for lokasi in sumber:
+        nama_sumber = next(iter(lokasi.values()))
+        try:
+            _, baca_blok, bobot = buka_blok(args, skema, **lokasi)
+            dipakai = mask_dipakai(args, skema, baca_blok)
+            indeks = bangun_indeks_skor(baca_blok(), skema, dipakai, bobot)[args.metric]
+        except ValueError as e:
+            print(f"{nama_sumber}: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        data = {'sumber': nama_sumber, 'ukuran': args.metric, **ringkas_indeks(indeks)}
+        if args.respondent:
+            nomor = np.asarray(args.respondent)
+            kode = ambil_baris(baca_blok(), np.clip(nomor - 1, 0, None))
+            skor = hitung_skor_responden(kode, skema)[args.metric]
+            data['responden'] = []
+            for i, n in enumerate(nomor):
+                ada = 1 <= n and i < len(kode) and not np.isnan(skor[i])
+                if ada and dipakai is not None:
+                    ada = bool(n <= len(dipakai) and dipakai[n - 1])
+                peringkat, persentil = peringkat_persentil(indeks, skor[i]) if ada else (None, None)
+                data['responden'].append({
+                    'nomor': int(n), 'skor': nilai_json(skor[i]) if ada else None,
+                    'peringkat': nilai_json(peringkat) if ada else None,
+                    'persentil': nilai_json(persentil) if ada else None,
+                })
+        if args.above:
+            data['di_atas'] = [{'skor': s, 'jumlah': nilai_json(jumlah_di_atas(indeks, s))} for s in args.above]
+        if args.percentile:
+            data['persentil'] = [{'p': p, 'skor': nilai_json(skor_pada_persentil(indeks, p))} for p in args.percentile]
+
+        if args.format == "json":
+            hasil.append(data)
+            continue
+        if len(sumber) > 1:
+            print(f"== {nama_sumber}")
+        print(f"{args.metric}: n={format_jumlah(data['n'])}, min={data['minimum']}, p25={data['p25']}, "
+              f"median={data['median']}, p75={data['p75']}, maks={data['maksimum']}")
+        for r in data.get('responden', []):
+            if r['skor'] is None:
+                print(f"responden {r['nomor']}: tidak ada skor")
+            else:
+                print(f"responden {r['nomor']}: skor={r['skor']:g}, peringkat={format_jumlah(r['peringkat'])}, "
+                      f"persentil={r['persentil']:.1f}")
+        for r in data.get('di_atas', []):
+            print(f"skor > {r['skor']:g}: {format_jumlah(r['jumlah'])}")
+        for r in data.get('persentil', []):
+            print(f"persentil {r['p']:g}: {r['skor']}")
+
+    if args.format == "json":
+        print(json.dumps(hasil, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()